@@ -0,0 +1,218 @@
+# async_checker.py
+import asyncio
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Mapping
+from urllib.parse import urlparse
+
+import aiohttp
+
+from http_pool import DEFAULT_HEADERS, HEAD_REFUSED_CODES
+from latency import LatencyStats
+from redirects import record_hop, summarize_chain
+from resilience import CircuitOpenError, Resilience
+from url_cache import normalize_url
+
+
+class TokenBucket:
+    """Global rate limiter: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available, then consume it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Worth another try; SSL failures are connection errors too, but retrying will not fix them
+TRANSIENT_ERRORS = (asyncio.TimeoutError, aiohttp.ClientConnectionError)
+FATAL_ERRORS = (aiohttp.ClientSSLError,)
+
+
+class AsyncURLChecker:
+    """Check many URLs concurrently with per-host and global rate limits.
+
+    With a Resilience, every probe (first request and redirect hops) gets its
+    retries, per-host timeouts, circuit breaker and hedging.
+    """
+
+    def __init__(self, classify: Callable[[Dict, int, Mapping], Dict],
+                 request_headers: Callable[[Dict], Dict] = None,
+                 store: Callable[[Dict, Dict, Mapping], None] = None, max_in_flight: int = 200,
+                 per_host: int = 4, rate: float = 50.0, timeout: float = 5,
+                 pool_size: int = 20, keepalive_timeout: float = 30, latency: LatencyStats = None,
+                 resilience: Resilience = None):
+        self.classify = classify
+        self.request_headers = request_headers or (lambda tool: {})
+        self.store = store
+        self.max_in_flight = max_in_flight
+        self.per_host = per_host
+        self.rate = rate
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.latency = latency
+        self.resilience = resilience
+        self._host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        return self._host_limits[urlparse(url).netloc.lower()]
+
+    @staticmethod
+    def _trace_config() -> aiohttp.TraceConfig:
+        """Write each request's phase timings (ms) into the dict passed as trace_request_ctx"""
+        def mark(attribute):
+            async def callback(session, ctx, params):
+                setattr(ctx, attribute, time.perf_counter())
+            return callback
+
+        def measure(phase, attribute, minus=None):
+            async def callback(session, ctx, params):
+                timings = ctx.trace_request_ctx
+                if timings is None or not hasattr(ctx, attribute):
+                    return
+                timings[phase] = (time.perf_counter() - getattr(ctx, attribute)) * 1000
+                if minus in timings and hasattr(ctx, f'{minus}_started'):
+                    timings[phase] -= timings[minus]
+            return callback
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(mark('request_started'))
+        trace.on_dns_resolvehost_start.append(mark('dns_started'))
+        trace.on_dns_resolvehost_end.append(measure('dns', 'dns_started'))
+        trace.on_connection_create_start.append(mark('connect_started'))
+        # Connection creation includes the DNS lookup; keep only TCP+TLS
+        trace.on_connection_create_end.append(measure('connect', 'connect_started', minus='dns'))
+        trace.on_request_end.append(measure('ttfb', 'request_started'))
+        return trace
+
+    async def _probe(self, session: aiohttp.ClientSession, url: str, headers: Dict = None, timeout: float = None):
+        """HEAD a URL without following redirects -> (status, headers)"""
+        headers = headers or {}
+        timings = {}
+        # None keeps the session's timeout
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout is not None else None
+        started = time.perf_counter()
+        try:
+            async with session.head(url, allow_redirects=False, headers=headers, timeout=request_timeout,
+                                    trace_request_ctx=timings) as response:
+                if response.status not in HEAD_REFUSED_CODES:
+                    return response.status, response.headers
+
+            # Server refuses HEAD: ask for the first byte only, read at most one chunk
+            async with session.get(url, allow_redirects=False, headers={'Range': 'bytes=0-0', **headers},
+                                   timeout=request_timeout, trace_request_ctx=timings) as response:
+                await response.content.read(1024)
+                return response.status, response.headers
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            # Failed requests are usually the slowest; keep them in the percentiles
+            timings['failed'] = (time.perf_counter() - started) * 1000
+            raise
+        finally:
+            if self.latency is not None:
+                timings['total'] = (time.perf_counter() - started) * 1000
+                self.latency.record(url, timings)
+
+    async def _fetch(self, session: aiohttp.ClientSession, bucket: TokenBucket, url: str, headers: Dict = None):
+        """Rate-limited probe through the resilience layer (if any) -> (status, headers, latency_ms)
+
+        latency_ms times the answering request only, not the wait for a host slot or token.
+        """
+        async def attempt(timeout=None):
+            async with self._host_semaphore(url):
+                await bucket.acquire()
+                started = time.monotonic()
+                status, response_headers = await self._probe(session, url, headers, timeout)
+                return status, response_headers, round((time.monotonic() - started) * 1000)
+
+        if self.resilience is None:
+            return await attempt()
+        return await self.resilience.call_async(url, attempt, response=lambda result: result[:2],
+                                                transient=TRANSIENT_ERRORS, fatal=FATAL_ERRORS)
+
+    async def follow_redirect_chain(self, session: aiohttp.ClientSession, bucket: TokenBucket,
+                                    url: str, first, max_redirects: int = 5) -> List[Dict]:
+        """Async counterpart of redirects.follow_redirect_chain"""
+        chain = []
+        seen = {normalize_url(url)}
+        current_url = record_hop(chain, seen, url, *first)
+
+        for _ in range(max_redirects - 1):
+            if current_url is None:
+                break
+
+            try:
+                status, headers, _ = await self._fetch(session, bucket, current_url)
+            except (asyncio.TimeoutError, aiohttp.ClientError, CircuitOpenError) as e:
+                chain.append({'url': current_url, 'status': 'Error', 'error': str(e) or 'Timeout'})
+                break
+
+            current_url = record_hop(chain, seen, current_url, status, headers)
+
+        return chain
+
+    async def check_url_health(self, session: aiohttp.ClientSession, bucket: TokenBucket,
+                               in_flight: asyncio.Semaphore, tool: Dict) -> Dict:
+        """Async counterpart of ToolAuditor.check_url_health"""
+        url = tool['source_url']
+
+        async with in_flight:
+            try:
+                status, headers, latency_ms = await self._fetch(session, bucket, url, self.request_headers(tool))
+
+                result = {**self.classify(tool, status, headers), 'latency_ms': latency_ms}
+
+                # Hops are fetched outside the first host's semaphore so hosts never wait on each other
+                if result['status'] == 'redirected' and not result.get('cached'):
+                    chain = await self.follow_redirect_chain(session, bucket, url, (status, headers))
+                    result.update(summarize_chain(url, chain))
+
+                if self.store is not None:
+                    self.store(tool, result, headers)
+                return result
+            except asyncio.TimeoutError:
+                return {'status': 'error', 'message': 'Timeout'}
+            except (aiohttp.ClientError, CircuitOpenError) as e:
+                return {'status': 'error', 'message': str(e)}
+
+    async def _run(self, tools: List[Dict], on_result: Callable[[Dict, Dict], None]):
+        bucket = TokenBucket(self.rate)
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        connector = aiohttp.TCPConnector(
+            limit=self.max_in_flight,
+            limit_per_host=min(self.per_host, self.pool_size),
+            keepalive_timeout=self.keepalive_timeout
+        )
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=DEFAULT_HEADERS,
+                                         trace_configs=[self._trace_config()]) as session:
+            async def check(tool):
+                try:
+                    return tool, await self.check_url_health(session, bucket, in_flight, tool)
+                except Exception as e:
+                    return tool, {'status': 'error', 'error': str(e)}
+
+            tasks = [asyncio.create_task(check(tool)) for tool in tools]
+            for task in asyncio.as_completed(tasks):
+                tool, result = await task
+                on_result(tool, result)
+
+    def check_all(self, tools: List[Dict], on_result: Callable[[Dict, Dict], None]):
+        """Check every tool, calling on_result(tool, result) as each one completes"""
+        asyncio.run(self._run(tools, on_result))
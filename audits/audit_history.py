@@ -0,0 +1,240 @@
+# audit_history.py
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from url_cache import normalize_url
+
+DEFAULT_HISTORY_PATH = Path(__file__).parent / 'audit-history.sqlite'
+
+FAILING_STATUSES = ('notFound', 'error')
+
+# Checks are written in batches of this many rows
+BATCH_SIZE = 200
+
+
+class AuditHistory:
+    """Every URL check of every audit run, for run-to-run comparisons.
+
+    One row per (run, URL) with status, HTTP code, latency and redirect
+    target. Only finished runs take part in the queries, so an interrupted
+    audit never shows up as a wave of missing URLs.
+    """
+
+    def __init__(self, db_path=DEFAULT_HISTORY_PATH):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                tool_count INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS checks (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                url TEXT NOT NULL,
+                tool_id TEXT,
+                name TEXT,
+                status TEXT NOT NULL,
+                code INTEGER,
+                latency_ms INTEGER,
+                target TEXT,
+                cached INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (run_id, url)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS checks_url ON checks (url, run_id);
+            CREATE INDEX IF NOT EXISTS checks_status ON checks (run_id, status);
+            CREATE INDEX IF NOT EXISTS runs_finished ON runs (finished_at);
+        """)
+        self._conn.commit()
+
+    def start_run(self, tool_count: int) -> int:
+        with self._lock:
+            cursor = self._conn.execute("INSERT INTO runs (started_at, tool_count) VALUES (?, ?)",
+                                        (time.time(), tool_count))
+            self._conn.commit()
+        return cursor.lastrowid
+
+    def record(self, run_id: int, tool: Dict, result: Dict):
+        """Queue one check result; written on the next flush"""
+        with self._lock:
+            self._pending.append((
+                run_id,
+                normalize_url(tool['source_url']),
+                str(tool.get('id')),
+                tool.get('name'),
+                result['status'],
+                result.get('code') if isinstance(result.get('code'), int) else None,
+                result.get('latency_ms'),
+                result.get('final_url') or result.get('location'),
+                1 if result.get('cached') else 0
+            ))
+            if len(self._pending) >= BATCH_SIZE:
+                self._flush()
+
+    def _flush(self):
+        self._conn.executemany("INSERT OR REPLACE INTO checks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self._pending)
+        self._conn.commit()
+        self._pending = []
+
+    def finish_run(self, run_id: int):
+        with self._lock:
+            self._flush()
+            self._conn.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), run_id))
+            self._conn.commit()
+
+    def _rows(self, sql: str, params=()) -> List[Dict]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def runs(self, limit: int = 10) -> List[Dict]:
+        """Most recent finished runs with their status counts"""
+        return self._rows(
+            "SELECT r.id, r.started_at, r.finished_at, r.tool_count, "
+            "SUM(c.status = 'healthy') AS healthy, SUM(c.status = 'redirected') AS redirected, "
+            "SUM(c.status = 'notFound') AS not_found, SUM(c.status = 'error') AS errors "
+            "FROM runs r LEFT JOIN checks c ON c.run_id = r.id "
+            "WHERE r.finished_at IS NOT NULL GROUP BY r.id ORDER BY r.id DESC LIMIT ?",
+            (limit,)
+        )
+
+    def _finished_run_ids(self, limit: int, before: Optional[int] = None) -> List[int]:
+        rows = self._rows(
+            "SELECT id FROM runs WHERE finished_at IS NOT NULL AND id <= ? ORDER BY id DESC LIMIT ?",
+            (before if before is not None else 2 ** 62, limit)
+        )
+        return [row['id'] for row in rows]
+
+    def changes(self, run_id: Optional[int] = None) -> List[Dict]:
+        """URLs whose status, code or target differ from the previous finished run.
+
+        URLs that appear in only one of the two runs are reported as added or
+        removed. Defaults to the latest finished run.
+        """
+        ids = self._finished_run_ids(2, before=run_id)
+        if len(ids) < 2:
+            return []
+        current, previous = ids
+        return self._rows(
+            "SELECT cur.url, cur.name, prev.status AS old_status, cur.status AS new_status, "
+            "prev.code AS old_code, cur.code AS new_code, prev.target AS old_target, cur.target AS new_target "
+            "FROM checks cur LEFT JOIN checks prev ON prev.run_id = ? AND prev.url = cur.url "
+            "WHERE cur.run_id = ? AND (prev.url IS NULL OR prev.status != cur.status "
+            "OR prev.code IS NOT cur.code OR prev.target IS NOT cur.target) "
+            "UNION ALL "
+            "SELECT prev.url, prev.name, prev.status, NULL, prev.code, NULL, prev.target, NULL "
+            "FROM checks prev WHERE prev.run_id = ? "
+            "AND NOT EXISTS (SELECT 1 FROM checks cur WHERE cur.run_id = ? AND cur.url = prev.url) "
+            "ORDER BY 1",
+            (previous, current, previous, current)
+        )
+
+    def failing_streaks(self, runs: int = 3) -> List[Dict]:
+        """URLs that failed (404 or error) in each of the last `runs` finished runs"""
+        ids = self._finished_run_ids(runs)
+        if len(ids) < runs:
+            return []
+        placeholders = ','.join('?' * len(ids))
+        statuses = ','.join('?' * len(FAILING_STATUSES))
+        return self._rows(
+            f"SELECT url, MAX(name) AS name, GROUP_CONCAT(status) AS statuses "
+            f"FROM checks WHERE run_id IN ({placeholders}) AND status IN ({statuses}) "
+            f"GROUP BY url HAVING COUNT(*) = ? ORDER BY url",
+            (*ids, *FAILING_STATUSES, len(ids))
+        )
+
+    def latency_trend(self, url: Optional[str] = None, runs: int = 10) -> List[Dict]:
+        """One URL's latency per run, or the average and maximum across all URLs"""
+        ids = self._finished_run_ids(runs)
+        if not ids:
+            return []
+        placeholders = ','.join('?' * len(ids))
+        if url is not None:
+            return self._rows(
+                f"SELECT c.run_id, r.started_at, c.status, c.latency_ms FROM checks c "
+                f"JOIN runs r ON r.id = c.run_id "
+                f"WHERE c.url = ? AND c.run_id IN ({placeholders}) ORDER BY c.run_id",
+                (normalize_url(url), *ids)
+            )
+        return self._rows(
+            f"SELECT c.run_id, r.started_at, COUNT(c.latency_ms) AS samples, "
+            f"ROUND(AVG(c.latency_ms)) AS avg_ms, MAX(c.latency_ms) AS max_ms "
+            f"FROM checks c JOIN runs r ON r.id = c.run_id "
+            f"WHERE c.run_id IN ({placeholders}) GROUP BY c.run_id ORDER BY c.run_id",
+            ids
+        )
+
+    def latency_samples(self, runs: int = 3) -> List[tuple]:
+        """(url, latency_ms) of every timed check in the last `runs` finished runs"""
+        ids = self._finished_run_ids(runs)
+        if not ids:
+            return []
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT url, latency_ms FROM checks "
+                f"WHERE run_id IN ({','.join('?' * len(ids))}) AND latency_ms IS NOT NULL",
+                ids
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            if self._pending:
+                self._flush()
+            self._conn.close()
+
+
+def _print_rows(rows: List[Dict], empty: str):
+    if not rows:
+        print(empty)
+        return
+    for row in rows:
+        print("  " + "  ".join(f"{key}={value}" for key, value in row.items() if value is not None))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Query the URL check history of past audits')
+    parser.add_argument('--db', type=str, default=str(DEFAULT_HISTORY_PATH),
+                        help='Path to the audit history database')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('runs', help='List recent finished runs')
+
+    changes_parser = commands.add_parser('changes', help='What changed since the previous run')
+    changes_parser.add_argument('--run', type=int, help='Compare this run instead of the latest one')
+
+    failing_parser = commands.add_parser('failing', help='URLs failing N runs in a row')
+    failing_parser.add_argument('--runs', type=int, default=3, help='Number of consecutive runs')
+
+    latency_parser = commands.add_parser('latency', help='Latency trend per run')
+    latency_parser.add_argument('--url', type=str, help='Show one URL instead of the whole catalog')
+    latency_parser.add_argument('--last', type=int, default=10, help='Number of runs to show')
+
+    args = parser.parse_args()
+    history = AuditHistory(args.db)
+
+    if args.command == 'runs':
+        print("📚 Recent audit runs:")
+        _print_rows(history.runs(), "No finished runs yet")
+    elif args.command == 'changes':
+        rows = history.changes(args.run)
+        print(f"🔀 {len(rows)} URLs changed since the previous run:")
+        _print_rows(rows, "  (nothing to compare: fewer than two finished runs, or no changes)")
+    elif args.command == 'failing':
+        rows = history.failing_streaks(args.runs)
+        print(f"❌ {len(rows)} URLs failing {args.runs} runs in a row:")
+        _print_rows(rows, "  (none)")
+    elif args.command == 'latency':
+        print("⏱️  Latency by run:")
+        _print_rows(history.latency_trend(args.url, args.last), "  (no data)")
+
+    history.close()
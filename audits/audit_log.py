@@ -0,0 +1,147 @@
+# audit_log.py
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+
+DEFAULT_LOG_PATH = Path(__file__).parent / 'audit-results.jsonl'
+
+# 'always': fsync after every line; 'batch': every batch_size lines or interval seconds;
+# 'never': flush to the OS only (survives a crashed process, not a crashed machine)
+FSYNC_POLICIES = ('always', 'batch', 'never')
+
+# Result buckets written to the log, in report order
+CHECK_BUCKETS = ('healthy', 'redirected', 'notFound', 'error')
+
+
+def _repair_tail(path: Path):
+    """Cut a half-written last line left behind by a crash"""
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        if pos != end:
+            f.truncate(pos)
+            print(f"🩹 Dropped {end - pos} bytes of a partial line from {path}")
+
+
+def read_log(path) -> Iterator[Dict]:
+    """Yield the check records of a log one at a time (run headers are skipped)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn final line of a crashed run
+            if 'tool' in record:
+                yield record
+
+
+class AuditLog:
+    """Append-only JSON Lines log of URL check results.
+
+    Each finished check is written as one line ({'tool': ..., **result}) the
+    moment it completes, so a crash loses at most the unsynced tail. With
+    resume=True the existing log is kept and checked_ids() tells the auditor
+    which tools to skip; otherwise the log starts empty.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_PATH, fsync: str = 'batch', batch_size: int = 50,
+                 interval: float = 2.0, resume: bool = False):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync policy must be one of {FSYNC_POLICIES}, got '{fsync}'")
+
+        self.path = Path(path)
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        resuming = resume and self.path.exists()
+        if resuming:
+            _repair_tail(self.path)
+        self._file = open(self.path, 'a' if resuming else 'w', encoding='utf-8')
+        self._write({'run': {'started_at': time.time(), 'resumed': resuming}})
+
+    def _write(self, record: Dict):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+            self._unsynced += 1
+            if self.fsync == 'always' or (
+                    self.fsync == 'batch' and (self._unsynced >= self.batch_size
+                                               or time.monotonic() - self._last_sync >= self.interval)):
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, tool: Dict, result: Dict):
+        self._write({'tool': tool, **result})
+
+    def checked_ids(self) -> Set[str]:
+        """Ids of the tools that already have a result in the log"""
+        return {str(record['tool'].get('id')) for record in read_log(self.path)}
+
+    def counts(self) -> Dict[str, int]:
+        """Number of logged results per bucket, in one streaming pass"""
+        counts = dict.fromkeys(CHECK_BUCKETS, 0)
+        for record in read_log(self.path):
+            counts[record['status']] = counts.get(record['status'], 0) + 1
+        return counts
+
+    def records(self, status: Optional[str] = None) -> Iterator[Dict]:
+        return (record for record in read_log(self.path) if status is None or record['status'] == status)
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            if self.fsync != 'never':
+                self._sync()
+            self._file.close()
+
+
+def write_streamed_report(report_path: Path, report: Dict, log: AuditLog, extra_details: Dict[str, List]):
+    """Write audit-report.json with 'details' streamed from the log.
+
+    report holds everything but the details; the check buckets are copied
+    from the log one record at a time, extra_details (duplicates, outdated)
+    are small and come from memory. The file is written to a temp path and
+    renamed, so a crash never leaves a truncated report.
+    """
+    buckets = list(CHECK_BUCKETS) + list(extra_details)
+    tmp_path = report_path.with_name(f".{report_path.name}.tmp")
+
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        # Reopen the pretty-printed object to append the details key
+        f.write(json.dumps(report, indent=2, ensure_ascii=False)[:-2] + ',\n  "details": {\n')
+        for n, bucket in enumerate(buckets):
+            f.write(f"    {json.dumps(bucket)}: [")
+            items = extra_details[bucket] if bucket in extra_details else log.records(bucket)
+            empty = True
+            for item in items:
+                f.write(('\n' if empty else ',\n') + '      ' + json.dumps(item, ensure_ascii=False))
+                empty = False
+            f.write(']' if empty else '\n    ]')
+            f.write(',\n' if n < len(buckets) - 1 else '\n')
+        f.write('  }\n}')
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, report_path)
@@ -0,0 +1,222 @@
+# build_catalog.py
+import gzip
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from duplicates import name_key
+from tool_data import parse_tool_data
+from tool_data_writer import atomic_write, default_tool_data_path, write_tool_data
+
+FRONTEND_DIR = Path(__file__).parent.parent / 'frontend'
+SRC_JSON_PATH = FRONTEND_DIR / 'src' / 'data' / 'tools.json'
+PUBLIC_DATA_DIR = FRONTEND_DIR / 'public' / 'data'
+SHARDS_DIR = PUBLIC_DATA_DIR / 'shards'
+
+# Fields that get a value -> [positions] index
+INDEX_FIELDS = ('type', 'sector', 'category')
+
+# Sector groups served by /api/tools?group=...
+SECTOR_GROUPS = {
+    'ai': ['Agent Builders', 'LLM Frameworks & Orchestration', 'Model Hubs & Customization',
+           'AI Coding & App Platforms', 'Embeddings & Vector Search'],
+    'sports': ['Fan Intelligence', 'Advertising & Media', 'Creative & Personalization',
+               'Sponsorship & Revenue', 'Measurement & Analytics'],
+}
+
+
+def build_indexes(tools: List[Dict]) -> Dict:
+    """Positions into the tool array by id, normalized name, type, sector and category"""
+    indexes = {'by_id': {}, 'by_name': {}}
+    for field in INDEX_FIELDS:
+        indexes[f'by_{field}'] = {}
+
+    for i, tool in enumerate(tools):
+        indexes['by_id'][str(tool.get('id', ''))] = i
+        indexes['by_name'].setdefault(name_key(tool.get('name', '')), i)
+        for field in INDEX_FIELDS:
+            indexes[f'by_{field}'].setdefault(tool.get(field) or '', []).append(i)
+
+    return indexes
+
+
+def minify(data) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def compressed_variants(payload: bytes) -> Dict[str, bytes]:
+    """Pre-compressed copies keyed by file suffix (brotli only if the module is installed)"""
+    # mtime=0 keeps the gzip bytes stable, so unchanged payloads are not rewritten
+    variants = {'.gz': gzip.compress(payload, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(payload, quality=11)
+    return variants
+
+
+def write_if_changed(path: Path, content) -> bool:
+    """Atomically write a file unless it already has exactly this content"""
+    data = content if isinstance(content, bytes) else content.encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, content)
+    return True
+
+
+def write_payload(path: Path, payload: bytes) -> Dict[str, int]:
+    """Write a minified payload plus its .gz/.br siblings; returns sizes per file"""
+    sizes = {path.name: len(payload)}
+    write_if_changed(path, payload)
+    for suffix, compressed in compressed_variants(payload).items():
+        write_if_changed(path.with_name(path.name + suffix), compressed)
+        sizes[path.name + suffix] = len(compressed)
+    return sizes
+
+
+def shard_slug(value: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-') or 'none'
+
+
+def partition_tools(tools: List[Dict]) -> Dict[str, Dict[str, List[Dict]]]:
+    """Group tools the way /api/tools filters them: {type: {shard key: tools}}
+
+    Shard keys are 'all', 'group:<name>' and 'sector:<sector>'; types are
+    lowercased, matching the route's case-insensitive type filter.
+    """
+    partitions = {}
+    for tool in tools:
+        shards = partitions.setdefault((tool.get('type') or '').lower(), {})
+        shards.setdefault('all', []).append(tool)
+        shards.setdefault(f"sector:{tool.get('sector') or ''}", []).append(tool)
+        for group, sectors in SECTOR_GROUPS.items():
+            if tool.get('sector') in sectors:
+                shards.setdefault(f"group:{group}", []).append(tool)
+
+    # Every type gets every group, even an empty one, so the route never falls back
+    for shards in partitions.values():
+        for group in SECTOR_GROUPS:
+            shards.setdefault(f"group:{group}", [])
+    return partitions
+
+
+def write_shards(tools: List[Dict], shards_dir: Path = SHARDS_DIR) -> Dict:
+    """Write one minified (plus .gz/.br) JSON file per partition and a manifest.
+
+    Returns the manifest: {'groups': ..., 'shards': {type: {key: {file, count,
+    etag, encodings}}}}. Shard files that are no longer listed are removed.
+    """
+    manifest = {'groups': SECTOR_GROUPS, 'shards': {}}
+    written = set()
+
+    for tool_type, shards in sorted(partition_tools(tools).items()):
+        for key, members in sorted(shards.items()):
+            kind, _, value = key.partition(':')
+            stem = f"{shard_slug(tool_type)}/{'all' if kind == 'all' else f'{kind}-{shard_slug(value)}'}"
+            # Sectors like 'None' and 'N/A' slug alike; number the later ones
+            relative, n = f"{stem}.json", 1
+            while relative in written:
+                n += 1
+                relative = f"{stem}-{n}.json"
+
+            payload = minify(members)
+            sizes = write_payload(shards_dir / relative, payload)
+            written.update(f"{Path(relative).parent}/{name}" for name in sizes)
+            manifest['shards'].setdefault(tool_type, {})[key] = {
+                'file': relative,
+                'count': len(members),
+                'etag': f'"{hashlib.sha1(payload).hexdigest()[:16]}"',
+                'encodings': [suffix.lstrip('.') for suffix in ('.br', '.gz')
+                              if f"{Path(relative).name}{suffix}" in sizes]
+            }
+
+    write_if_changed(shards_dir / 'manifest.json', json.dumps(manifest, indent=2, ensure_ascii=False))
+
+    for path in shards_dir.glob('*/*.json*'):
+        if f"{path.parent.name}/{path.name}" not in written:
+            path.unlink()
+
+    return manifest
+
+
+def check_catalog(tools: List[Dict]) -> List[str]:
+    """Problems that would make the indexes ambiguous"""
+    problems = []
+    seen = {}
+    for tool in tools:
+        tool_id = str(tool.get('id', ''))
+        if not tool_id:
+            problems.append(f"'{tool.get('name')}' has no id")
+        elif tool_id in seen:
+            problems.append(f"id {tool_id} is used by both '{seen[tool_id]}' and '{tool.get('name')}'")
+        seen[tool_id] = tool.get('name')
+    return problems
+
+
+def compile_catalog(source=None, tool_data_path=None, src_json_path: Path = SRC_JSON_PATH,
+                    public_dir: Path = PUBLIC_DATA_DIR) -> Optional[Dict]:
+    """Build every catalog artifact from one canonical source.
+
+    The source defaults to toolData.js (the file the fixers edit); a JSON
+    array works too, in which case toolData.js is regenerated from it.
+    Writes src/data/tools.json, public/data/tools.json, a minified
+    tools.min.json, a tools.index.json of lookup indexes, and .gz/.br copies
+    of the minified files, and the /api/tools shards (see write_shards).
+    Files whose content is unchanged are left alone.
+    """
+    tool_data_path = Path(tool_data_path or default_tool_data_path())
+    source = Path(source or tool_data_path)
+
+    tools, _, _ = parse_tool_data(source)
+    print(f"📦 Compiling {len(tools)} tools from {source}")
+
+    problems = check_catalog(tools)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        print("⚠️  Fix the catalog before compiling; nothing was written")
+        return None
+
+    if source.resolve() != tool_data_path.resolve():
+        _, prefix, suffix = parse_tool_data(tool_data_path)
+        write_tool_data(tool_data_path, tools, prefix, suffix, label='build_catalog')
+
+    pretty = json.dumps(tools, indent=2, ensure_ascii=False)
+    for path in (src_json_path, public_dir / 'tools.json'):
+        if write_if_changed(path, pretty):
+            print(f"📝 Wrote {path}")
+
+    sizes = write_payload(public_dir / 'tools.min.json', minify(tools))
+    sizes.update(write_payload(public_dir / 'tools.index.json',
+                               minify({'count': len(tools), 'indexes': build_indexes(tools)})))
+
+    manifest = write_shards(tools, public_dir / 'shards')
+
+    print(f"✅ Catalog artifacts in {public_dir}:")
+    for name, size in sizes.items():
+        print(f"   - {name}: {size / 1024:.1f}KB")
+    shard_count = sum(len(shards) for shards in manifest['shards'].values())
+    print(f"   - shards/: {shard_count} /api/tools partitions across {len(manifest['shards'])} types")
+    if brotli is None:
+        print("ℹ️  brotli is not installed; skipped .br variants")
+
+    return sizes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compile toolData.js, tools.json copies, lookup indexes and /api/tools shards')
+    parser.add_argument('--source', type=str,
+                        help='Canonical catalog (toolData.js or a JSON array); defaults to toolData.js')
+    parser.add_argument('--path', type=str, default=str(default_tool_data_path()),
+                        help='Path to toolData.js file')
+
+    args = parser.parse_args()
+    compile_catalog(source=args.source, tool_data_path=args.path)
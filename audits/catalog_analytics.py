@@ -0,0 +1,230 @@
+# catalog_analytics.py
+import glob
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from catalog_model import ENUM_FIELDS, Catalog, Tool, ToolColumns
+from compact_report import load_report
+from tool_data import load_tool_data
+
+AUDITS_DIR = Path(__file__).parent
+DEFAULT_REPORT = AUDITS_DIR / 'audit-report.json'
+HISTORY_DIR = AUDITS_DIR / 'history'
+HISTORY_GLOB = str(HISTORY_DIR / 'audit-report-*')
+OUTPUT_DIR = AUDITS_DIR / 'analytics'
+
+# Minimum tools per personal category / enterprise sector before it counts as a gap
+PERSONAL_MIN = 5
+ENTERPRISE_MIN = 3
+
+# Report buckets that hold one URL check per tool
+CHECK_STATUSES = ('healthy', 'redirected', 'notFound', 'error')
+
+
+def catalog_frame(tools: Iterable[Dict]) -> pd.DataFrame:
+    """One row per valid tool; type, category and sector as categoricals
+
+    The categoricals reuse the catalog's columnar codes and value tables, so
+    the enum strings are not hashed a second time.
+    """
+    catalog = tools if isinstance(tools, Catalog) else Catalog(tools)
+    return pd.DataFrame({
+        field: _categorical(catalog.columns, field) if field in ENUM_FIELDS
+        else [getattr(tool, field) for tool in catalog.tools]
+        for field in Tool.__slots__
+    })
+
+
+def _categorical(columns: ToolColumns, field: str) -> pd.Categorical:
+    """A ToolColumns field as a categorical, with categories sorted like astype('category')"""
+    codes = np.asarray(columns.codes[field], dtype=np.int32)
+    categorical = pd.Categorical.from_codes(codes, columns.values[field])
+    return categorical.reorder_categories(sorted(columns.values[field]))
+
+
+def load_catalog_frame(path) -> pd.DataFrame:
+    return catalog_frame(load_tool_data(path))
+
+
+def _grouping(frame: pd.DataFrame) -> pd.Series:
+    """Personal tools are grouped by category, everything else by sector"""
+    return pd.Series(np.where(frame['type'] == 'personal', frame['category'], frame['sector']),
+                     index=frame.index, name='group')
+
+
+def distribution(frame: pd.DataFrame) -> pd.DataFrame:
+    """Tool counts and catalog share per type and category/sector"""
+    counts = (frame.assign(group=_grouping(frame))
+              .groupby(['type', 'group'], observed=True)
+              .size()
+              .rename('count')
+              .reset_index())
+    counts['share'] = counts['count'] / max(len(frame), 1)
+    return counts.sort_values(['type', 'count'], ascending=[True, False], ignore_index=True)
+
+
+def category_gaps(frame: pd.DataFrame, personal_min: int = PERSONAL_MIN,
+                  enterprise_min: int = ENTERPRISE_MIN) -> pd.DataFrame:
+    """Categories (personal) and sectors (other types) below their minimum tool count"""
+    counts = distribution(frame)
+    minimum = np.where(counts['type'] == 'personal', personal_min, enterprise_min)
+    counts['needs_more'] = (minimum - counts['count']).clip(lower=0)
+    gaps = counts.loc[counts['needs_more'] > 0, ['type', 'group', 'count', 'needs_more']]
+    # Personal rows first, so an enterprise sector wins a name clash in gaps_to_dict
+    return gaps.sort_values(['type', 'count'], ascending=[False, True], ignore_index=True)
+
+
+def gaps_to_dict(gaps: pd.DataFrame) -> Dict:
+    """The {name: {type, count, needs_more}} shape used by audit-report.json"""
+    return {
+        row['group']: {
+            'type': 'personal' if row['type'] == 'personal' else 'enterprise',
+            'count': int(row['count']),
+            'needs_more': int(row['needs_more'])
+        }
+        for row in gaps.to_dict('records')
+    }
+
+
+def report_checks(report: Dict) -> pd.DataFrame:
+    """Flatten an audit report into one row per URL check"""
+    records = []
+    for status in CHECK_STATUSES:
+        for item in report.get('details', {}).get(status, []):
+            tool = item.get('tool') or {}
+            records.append({
+                'id': tool.get('id'),
+                'name': tool.get('name'),
+                'type': tool.get('type'),
+                'sector': tool.get('sector') or 'Unknown',
+                'category': tool.get('category') or 'Unknown',
+                'status': status,
+                'code': item.get('code')
+            })
+    return pd.DataFrame.from_records(records, columns=['id', 'name', 'type', 'sector', 'category', 'status', 'code'])
+
+
+def health_by_sector(checks: pd.DataFrame) -> pd.DataFrame:
+    """URL check outcomes per type and sector, with the healthy share"""
+    if checks.empty:
+        return pd.DataFrame(columns=['type', 'sector', *CHECK_STATUSES, 'total', 'healthy_share'])
+
+    frame = checks.assign(group=_grouping(checks.fillna({'type': ''})))
+    table = pd.crosstab([frame['type'], frame['group']], frame['status'])
+    table = table.reindex(columns=list(CHECK_STATUSES), fill_value=0)
+    table['total'] = table.sum(axis=1)
+    table['healthy_share'] = table['healthy'] / table['total']
+    table.index.names = ['type', 'sector']
+    return table.reset_index().sort_values('healthy_share', ignore_index=True)
+
+
+def load_reports(paths: Iterable[str]) -> List[Dict]:
+    """Read audit reports (.json or compact .npz), skipping unreadable files, oldest first"""
+    reports = []
+    for path in paths:
+        try:
+            report = load_report(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Skipping {path}: {e}")
+            continue
+        report['_path'] = str(path)
+        reports.append(report)
+    return sorted(reports, key=lambda report: report.get('timestamp', ''))
+
+
+def summary_trends(reports: List[Dict]) -> pd.DataFrame:
+    """One row per audit: its timestamp, every summary counter and latency percentiles"""
+    frame = pd.json_normalize([
+        {'timestamp': report.get('timestamp'), 'report': report['_path'], **report.get('summary', {}),
+         'latency': report.get('latency', {}).get('run', {})}
+        for report in reports
+    ])
+    if frame.empty:
+        return frame
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], errors='coerce', format='ISO8601')
+    counters = [column for column in frame.columns
+                if column not in ('timestamp', 'report', 'total') and not column.startswith('latency')]
+    if 'total' in frame:
+        for column in counters:
+            frame[f"{column}_share"] = frame[column] / frame['total'].replace(0, np.nan)
+    return frame.sort_values('timestamp', ignore_index=True)
+
+
+def sector_health_trends(reports: List[Dict]) -> pd.DataFrame:
+    """Health-by-sector tables of every audit stacked into one long table"""
+    tables = []
+    for report in reports:
+        table = health_by_sector(report_checks(report))
+        if not table.empty:
+            tables.append(table.assign(timestamp=pd.to_datetime(report.get('timestamp'), errors='coerce')))
+    if not tables:
+        return pd.DataFrame()
+    return pd.concat(tables, ignore_index=True).sort_values(['timestamp', 'type', 'sector'], ignore_index=True)
+
+
+def write_table(frame: pd.DataFrame, out_dir: Path, name: str, fmt: str = 'parquet') -> Path:
+    """Write a table for dashboards; Parquet falls back to CSV without pyarrow/fastparquet"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if fmt == 'parquet':
+        path = out_dir / f"{name}.parquet"
+        try:
+            frame.to_parquet(path, index=False)
+            return path
+        except ImportError as e:
+            print(f"⚠️  {e}; writing CSV instead")
+    path = out_dir / f"{name}.csv"
+    frame.to_csv(path, index=False)
+    return path
+
+
+def run_analytics(tool_data_path, report_path: Optional[str] = None, history: Optional[str] = HISTORY_GLOB,
+                  out_dir: Path = OUTPUT_DIR, fmt: str = 'parquet') -> Dict[str, Path]:
+    """Compute every report and write it to out_dir; returns the written paths"""
+    frame = load_catalog_frame(tool_data_path)
+    print(f"📊 Catalog: {len(frame)} tools")
+
+    tables = {
+        'distribution': distribution(frame),
+        'category_gaps': category_gaps(frame)
+    }
+
+    report_paths = sorted(glob.glob(history)) if history else []
+    if report_path and Path(report_path).exists() and str(report_path) not in report_paths:
+        report_paths.append(str(report_path))
+    reports = load_reports(report_paths)
+
+    if reports:
+        tables['health_by_sector'] = health_by_sector(report_checks(reports[-1]))
+        tables['summary_trends'] = summary_trends(reports)
+        tables['sector_health_trends'] = sector_health_trends(reports)
+    print(f"📚 {len(reports)} audit reports loaded")
+
+    written = {}
+    for name, table in tables.items():
+        written[name] = write_table(table, Path(out_dir), name, fmt)
+        print(f"  💾 {name}: {len(table)} rows -> {written[name]}")
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    from tool_data_writer import default_tool_data_path
+
+    parser = argparse.ArgumentParser(description='Catalog distribution, gap, health and trend tables')
+    parser.add_argument('--path', type=str, default=str(default_tool_data_path()),
+                        help='Path to toolData.js file')
+    parser.add_argument('--report', type=str, default=str(DEFAULT_REPORT),
+                        help='Latest audit-report.json')
+    parser.add_argument('--history', type=str, default=HISTORY_GLOB,
+                        help='Glob of archived audit reports for trend tables')
+    parser.add_argument('--out', type=str, default=str(OUTPUT_DIR),
+                        help='Directory for the output tables')
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet',
+                        help='Output format')
+
+    args = parser.parse_args()
+    run_analytics(args.path, report_path=args.report, history=args.history,
+                  out_dir=Path(args.out), fmt=args.format)
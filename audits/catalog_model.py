@@ -0,0 +1,145 @@
+# catalog_model.py
+import sys
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+TOOL_TYPES = ('personal', 'enterprise')
+REQUIRED_FIELDS = ('id', 'name', 'source_url', 'type')
+UNKNOWN = 'Unknown'
+
+# Few distinct values, repeated on every row: interned so all tools share one string object
+ENUM_FIELDS = ('type', 'category', 'sector')
+
+
+class Tool:
+    """One catalog entry with a fixed set of fields (no per-instance __dict__)"""
+
+    __slots__ = ('id', 'name', 'source_url', 'short_description', 'screenshot_url',
+                 'category', 'type', 'sector')
+
+    def __init__(self, id: str, name: str, source_url: str, short_description: str = '',
+                 screenshot_url: str = '', category: str = UNKNOWN, type: str = 'personal',
+                 sector: str = UNKNOWN):
+        self.id = id
+        self.name = name
+        self.source_url = source_url
+        self.short_description = short_description
+        self.screenshot_url = screenshot_url
+        self.category = sys.intern(category or UNKNOWN)
+        self.type = sys.intern(type)
+        self.sector = sys.intern(sector or UNKNOWN)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Tool':
+        return cls(**{field: data[field] for field in cls.__slots__ if data.get(field) is not None})
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"Tool(id={self.id!r}, name={self.name!r}, type={self.type!r})"
+
+
+class ValidationIssue(NamedTuple):
+    index: int
+    name: str
+    field: str
+    message: str
+
+    def __str__(self):
+        return f"row {self.index} ({self.name or '?'}): {self.field} {self.message}"
+
+
+def _row_issues(index: int, row, seen_ids: Dict[str, int]) -> List[ValidationIssue]:
+    if not isinstance(row, dict):
+        return [ValidationIssue(index, '', 'row', f"should be an object, got {type(row).__name__}")]
+
+    name = row.get('name') if isinstance(row.get('name'), str) else ''
+    issues = []
+
+    for field in Tool.__slots__:
+        value = row.get(field)
+        if value is None or value == '':
+            if field in REQUIRED_FIELDS:
+                issues.append(ValidationIssue(index, name, field, 'is missing'))
+        elif not isinstance(value, str):
+            issues.append(ValidationIssue(index, name, field, f"should be a string, got {type(value).__name__}"))
+
+    tool_type = row.get('type')
+    if isinstance(tool_type, str) and tool_type and tool_type not in TOOL_TYPES:
+        issues.append(ValidationIssue(index, name, 'type', f"is '{tool_type}', expected one of {TOOL_TYPES}"))
+
+    url = row.get('source_url')
+    if isinstance(url, str) and url and urlsplit(url).scheme not in ('http', 'https'):
+        issues.append(ValidationIssue(index, name, 'source_url', f"'{url}' is not an http(s) URL"))
+
+    tool_id = row.get('id')
+    if isinstance(tool_id, str) and tool_id:
+        if tool_id in seen_ids:
+            issues.append(ValidationIssue(index, name, 'id', f"'{tool_id}' duplicates row {seen_ids[tool_id]}"))
+        else:
+            seen_ids[tool_id] = index
+
+    return issues
+
+
+def validate_tools(rows: Iterable) -> Tuple[List[Tool], List[int], List[ValidationIssue]]:
+    """Check every row in one pass and build Tools from the valid ones.
+
+    Returns (tools, valid_indexes, issues); every problem in every row is
+    reported, instead of stopping at the first bad one.
+    """
+    tools, valid, issues = [], [], []
+    seen_ids = {}
+
+    for index, row in enumerate(rows):
+        row_issues = _row_issues(index, row, seen_ids)
+        if row_issues:
+            issues.extend(row_issues)
+            continue
+        tools.append(Tool.from_dict(row))
+        valid.append(index)
+
+    return tools, valid, issues
+
+
+class ToolColumns:
+    """Enum-like fields of a tool list as compact integer codes.
+
+    Each field gets a table of its distinct values (values[field]) and one
+    code per tool into it (codes[field]). catalog_analytics builds its pandas
+    categoricals straight from these, without re-reading the Tool objects.
+    """
+
+    def __init__(self, tools: List[Tool]):
+        self.size = len(tools)
+        self.values = {}
+        self.codes = {}
+        for field in ENUM_FIELDS:
+            lookup = {}
+            codes = array('H', (lookup.setdefault(getattr(tool, field), len(lookup)) for tool in tools))
+            self.values[field] = list(lookup)
+            self.codes[field] = codes
+
+
+class Catalog:
+    """Validated tools plus their columnar view"""
+
+    def __init__(self, rows: Iterable):
+        self.tools, self.valid_indexes, self.issues = validate_tools(rows)
+        self.columns = ToolColumns(self.tools)
+
+    def __len__(self):
+        return len(self.tools)
+
+    def report_issues(self, limit: Optional[int] = 20):
+        """Print every validation problem (up to limit lines)"""
+        if not self.issues:
+            return
+        bad_rows = len({issue.index for issue in self.issues})
+        print(f"⚠️  {len(self.issues)} problems in {bad_rows} catalog rows (skipped):")
+        for issue in self.issues[:limit]:
+            print(f"  - {issue}")
+        if limit is not None and len(self.issues) > limit:
+            print(f"  ... and {len(self.issues) - limit} more")
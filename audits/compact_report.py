@@ -0,0 +1,181 @@
+# compact_report.py
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from catalog_model import ENUM_FIELDS, REQUIRED_FIELDS, Tool
+
+DEFAULT_COMPACT_PATH = Path(__file__).parent / 'audit-report.npz'
+
+CHECK_STATUSES = ('healthy', 'redirected', 'notFound', 'error')
+
+# Result fields with their own column; everything else goes into the per-row 'extra' JSON
+RESULT_COLUMNS = ('status', 'code', 'location', 'final_url')
+
+
+def _pack_strings(arrays: Dict, key: str, values: List[str]):
+    """Store strings as one UTF-8 blob plus offsets (no fixed-width padding)"""
+    encoded = [value.encode('utf-8') for value in values]
+    arrays[f"{key}.blob"] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    arrays[f"{key}.offsets"] = np.concatenate(([0], np.cumsum([len(e) for e in encoded]))).astype(np.uint32)
+
+
+def _pack_enum(arrays: Dict, key: str, values: List[str]):
+    """Store a low-cardinality column as uint16 codes into a table of distinct values"""
+    lookup = {}
+    arrays[f"{key}.codes"] = np.array([lookup.setdefault(v, len(lookup)) for v in values], dtype=np.uint16)
+    _pack_strings(arrays, f"{key}.values", list(lookup))
+
+
+def write_compact_report(path, report: Dict, tools: List[Dict], details: Dict[str, Iterable[Dict]]) -> Path:
+    """Write an audit report as columnar NumPy arrays in one compressed .npz.
+
+    The catalog snapshot is stored once; check results, duplicate pairs and
+    outdated entries refer to tools by their position in it instead of
+    embedding the tool dict. report holds everything except the details
+    (summary, category analysis, recommendations) and is kept as JSON.
+    """
+    path = Path(path)
+    arrays = {'meta': np.frombuffer(json.dumps(report, ensure_ascii=False).encode('utf-8'), dtype=np.uint8)}
+
+    tools = list(tools)
+    positions = {str(tool.get('id')): i for i, tool in enumerate(tools)}
+
+    def position(tool: Dict) -> int:
+        # A resumed stream may mention a tool that has since left the catalog
+        key = str(tool.get('id'))
+        if key not in positions:
+            positions[key] = len(tools)
+            tools.append(tool)
+        return positions[key]
+
+    rows = {'tool': [], 'status': [], 'code': [], 'location': [], 'final_url': [], 'extra': []}
+    for status in CHECK_STATUSES:
+        for item in details.get(status, []):
+            rows['tool'].append(position(item['tool']))
+            rows['status'].append(CHECK_STATUSES.index(status))
+            code = item.get('code')
+            rows['code'].append(code if isinstance(code, int) else -1)
+            rows['location'].append(item.get('location') or '')
+            rows['final_url'].append(item.get('final_url') or '')
+            extra = {k: v for k, v in item.items() if k != 'tool' and k not in RESULT_COLUMNS}
+            rows['extra'].append(json.dumps(extra, ensure_ascii=False, separators=(',', ':')) if extra else '')
+
+    arrays['results.tool'] = np.array(rows['tool'], dtype=np.int32)
+    arrays['results.status'] = np.array(rows['status'], dtype=np.uint8)
+    arrays['results.code'] = np.array(rows['code'], dtype=np.int16)
+    for key in ('location', 'final_url', 'extra'):
+        _pack_strings(arrays, f"results.{key}", rows[key])
+
+    duplicates = list(details.get('duplicate', []))
+    arrays['duplicates.tool1'] = np.array([position(d['tool1']) for d in duplicates], dtype=np.int32)
+    arrays['duplicates.tool2'] = np.array([position(d['tool2']) for d in duplicates], dtype=np.int32)
+    arrays['duplicates.similarity'] = np.array([d.get('similarity', 0.0) for d in duplicates], dtype=np.float32)
+    _pack_enum(arrays, 'duplicates.reason', [d.get('reason', '') for d in duplicates])
+
+    outdated = list(details.get('outdated', []))
+    arrays['outdated.tool'] = np.array([position(o['tool']) for o in outdated], dtype=np.int32)
+    _pack_enum(arrays, 'outdated.status', [o.get('status', '') for o in outdated])
+    _pack_strings(arrays, 'outdated.note', [o.get('note', '') for o in outdated])
+
+    for field in Tool.__slots__:
+        values = [str(tool.get(field) or '') for tool in tools]
+        if field in ENUM_FIELDS:
+            _pack_enum(arrays, f"tools.{field}", values)
+        else:
+            _pack_strings(arrays, f"tools.{field}", values)
+
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    return path
+
+
+class CompactReport:
+    """Read side of write_compact_report; string columns are decoded on first use"""
+
+    def __init__(self, path=DEFAULT_COMPACT_PATH):
+        self.path = Path(path)
+        with np.load(self.path) as data:
+            self._arrays = {key: data[key] for key in data.files}
+        self.meta = json.loads(self._arrays['meta'].tobytes().decode('utf-8'))
+        self._decoded = {}
+
+    def _strings(self, key: str) -> List[str]:
+        if key not in self._decoded:
+            blob = self._arrays[f"{key}.blob"].tobytes()
+            offsets = self._arrays[f"{key}.offsets"].tolist()
+            self._decoded[key] = [blob[a:b].decode('utf-8') for a, b in zip(offsets, offsets[1:])]
+        return self._decoded[key]
+
+    def _column(self, key: str) -> List[str]:
+        """A string column, whether stored plain or as enum codes"""
+        if f"{key}.codes" not in self._arrays:
+            return self._strings(key)
+        if key not in self._decoded:
+            values = self._strings(f"{key}.values")
+            self._decoded[key] = [values[code] for code in self._arrays[f"{key}.codes"].tolist()]
+        return self._decoded[key]
+
+    def __len__(self):
+        return len(self._arrays['results.tool'])
+
+    def tool(self, index: int) -> Dict:
+        """Tool dict at a snapshot position (empty optional fields left out)"""
+        tool = {}
+        for field in Tool.__slots__:
+            value = self._column(f"tools.{field}")[index]
+            if value or field in REQUIRED_FIELDS:
+                tool[field] = value
+        return tool
+
+    def results(self, status: str = None) -> Iterator[Dict]:
+        """Check results as {'tool': ..., **result}, optionally for one status"""
+        statuses = self._arrays['results.status']
+        indexes = range(len(statuses)) if status is None else np.flatnonzero(statuses == CHECK_STATUSES.index(status))
+        tools = self._arrays['results.tool']
+        codes = self._arrays['results.code']
+        for i in indexes:
+            item = {'tool': self.tool(int(tools[i])), 'status': CHECK_STATUSES[statuses[i]]}
+            if codes[i] >= 0:
+                item['code'] = int(codes[i])
+            for key in ('location', 'final_url'):
+                value = self._strings(f"results.{key}")[i]
+                if value:
+                    item[key] = value
+            extra = self._strings('results.extra')[i]
+            if extra:
+                item.update(json.loads(extra))
+            yield item
+
+    def duplicates(self) -> List[Dict]:
+        reasons = self._column('duplicates.reason')
+        return [
+            {'tool1': self.tool(int(a)), 'tool2': self.tool(int(b)), 'reason': reason, 'similarity': float(similarity)}
+            for a, b, reason, similarity in zip(self._arrays['duplicates.tool1'], self._arrays['duplicates.tool2'],
+                                                reasons, self._arrays['duplicates.similarity'])
+        ]
+
+    def outdated(self) -> List[Dict]:
+        return [
+            {'tool': self.tool(int(index)), 'status': status, 'note': note}
+            for index, status, note in zip(self._arrays['outdated.tool'], self._column('outdated.status'),
+                                           self._strings('outdated.note'))
+        ]
+
+    def to_report(self) -> Dict:
+        """The same structure as audit-report.json"""
+        details = {status: list(self.results(status)) for status in CHECK_STATUSES}
+        details['outdated'] = self.outdated()
+        details['duplicate'] = self.duplicates()
+        return {**self.meta, 'details': details}
+
+
+def load_report(path) -> Dict:
+    """Load audit-report.json or its compact .npz form into the JSON structure"""
+    path = Path(path)
+    if path.suffix == '.npz':
+        return CompactReport(path).to_report()
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
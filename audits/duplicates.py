@@ -0,0 +1,162 @@
+# duplicates.py
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Query parameters that only carry attribution, never identity
+TRACKING_PARAMS = {'ref', 'ref_src', 'source', 'fbclid', 'gclid', 'dclid', 'msclkid',
+                   'mc_cid', 'mc_eid', 'igshid', 'via', 'affiliate', 'aff'}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def canonical_url(url: str) -> str:
+    """Identity key for a tool URL.
+
+    Scheme, 'www.', default ports, fragments, trailing slashes and tracking
+    params are dropped and IDN hosts are punycoded, so
+    'https://www.x.ai' and 'http://x.ai/?ref=foo' share one key.
+    """
+    parts = urlsplit(url.strip() if '://' in url else f"http://{url.strip()}")
+    host = (parts.hostname or '').lower().rstrip('.')
+
+    try:
+        host = host.encode('idna').decode('ascii')
+    except UnicodeError:
+        pass
+
+    if host.startswith('www.'):
+        host = host[4:]
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    )
+
+    key = host + (parts.path.rstrip('/') or '')
+    if query:
+        key += '?' + urlencode(query)
+    return key
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and collapse everything but letters/digits"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+def name_key(name: str) -> str:
+    """'Leonardo AI', 'Leonardo.ai' and 'leonardo-ai' all map to 'leonardoai'"""
+    return normalize_text(name).replace(' ', '')
+
+
+def shingles(text: str, size: int) -> Set[str]:
+    """Character n-grams of the normalized text"""
+    text = normalize_text(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashIndex:
+    """MinHash signatures banded into LSH buckets.
+
+    Only items that share at least one band become candidate pairs, so the
+    work grows with the number of similar items rather than with n².
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Deterministic (a, b) pairs for h(x) = (a*x + b) mod p
+        state = seed
+        self.permutations = []
+        for _ in range(num_perm):
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            a = (state >> 3) % (_MERSENNE_PRIME - 1) + 1
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            b = (state >> 3) % _MERSENNE_PRIME
+            self.permutations.append((a, b))
+
+        self.buckets = defaultdict(list)
+
+    def signature(self, items: Iterable[str]) -> List[int]:
+        hashes = [zlib.crc32(item.encode('utf-8')) for item in items]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        ]
+
+    def add(self, key, items: Set[str]):
+        if not items:
+            return
+        signature = self.signature(items)
+        for band in range(self.bands):
+            start = band * self.rows
+            self.buckets[(band, tuple(signature[start:start + self.rows]))].append(key)
+
+    def candidate_pairs(self) -> Set[Tuple]:
+        pairs = set()
+        for keys in self.buckets.values():
+            for i in range(len(keys)):
+                for j in range(i + 1, len(keys)):
+                    pairs.add((keys[i], keys[j]))
+        return pairs
+
+
+def find_duplicate_pairs(tools: List[Dict], name_threshold: float = 0.8,
+                         description_threshold: float = 0.7) -> List[Tuple[int, int, str, float]]:
+    """Find duplicate and near-duplicate tools.
+
+    Returns (index1, index2, reason, similarity) tuples, where reason is one of
+    duplicate_name, duplicate_url, similar_name or similar_description.
+    """
+    pairs = {}
+
+    def report(i, j, reason, similarity):
+        key = (min(i, j), max(i, j))
+        if key not in pairs:
+            pairs[key] = (key[0], key[1], reason, round(similarity, 3))
+
+    # Exact matches on canonical keys: one dict lookup per tool
+    for reason, key_of in (('duplicate_url', lambda t: canonical_url(t.get('source_url', ''))),
+                           ('duplicate_name', lambda t: name_key(t.get('name', '')))):
+        first_seen = {}
+        for i, tool in enumerate(tools):
+            key = key_of(tool)
+            if not key:
+                continue
+            if key in first_seen:
+                report(first_seen[key], i, reason, 1.0)
+            else:
+                first_seen[key] = i
+
+    # Fuzzy matches through MinHash LSH, confirmed with exact Jaccard
+    for reason, field, size, threshold in (('similar_name', 'name', 3, name_threshold),
+                                           ('similar_description', 'short_description', 5,
+                                            description_threshold)):
+        index = MinHashIndex()
+        grams = [shingles(tool.get(field, ''), size) for tool in tools]
+        for i, items in enumerate(grams):
+            index.add(i, items)
+
+        for i, j in index.candidate_pairs():
+            similarity = jaccard(grams[i], grams[j])
+            if similarity >= threshold:
+                report(i, j, reason, similarity)
+
+    return sorted(pairs.values())
@@ -0,0 +1,151 @@
+# http_pool.py
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible; ToolCurator/1.0)'}
+
+# Status codes from servers that refuse HEAD but usually answer GET
+HEAD_REFUSED_CODES = (403, 405, 501)
+
+_session = None
+_session_lock = threading.Lock()
+
+# Phase timings of the request the current thread is making (see probe_url)
+_phase_timings = threading.local()
+
+
+def _record_phase(phase: str, started: float):
+    timings = getattr(_phase_timings, 'current', None)
+    if timings is not None:
+        timings[phase] = (time.perf_counter() - started) * 1000
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        # Resolve first so the lookup is reported as 'dns' instead of inside 'connect'
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host.strip('[]'), self.port, allowed_gai_family(),
+                                           socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        _record_phase('dns', started)
+
+        # TCP handshake, trying each address in turn like urllib3 does. With a
+        # numeric host urllib3's own getaddrinfo call returns at once
+        started = time.perf_counter()
+        dns_host = self._dns_host
+        error = NewConnectionError(self, "Failed to establish a new connection: no addresses")
+        try:
+            for *_, sockaddr in addresses:
+                self._dns_host = sockaddr[0]
+                try:
+                    sock = super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError) as e:
+                    error = e
+                    continue
+                _record_phase('connect', started)
+                return sock
+        finally:
+            self._dns_host = dns_host
+        raise error
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        timings = getattr(_phase_timings, 'current', None)
+        if timings is not None and 'connect' in timings:
+            # connect() is _new_conn() (DNS + TCP) followed by the TLS handshake
+            timings['tls'] = (time.perf_counter() - started) * 1000 - timings['dns'] - timings['connect']
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections report their DNS, connect and TLS times"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+
+def get_session(pool_size: int = 20) -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use.
+
+    Connections are kept alive per host, so repeated checks against the same
+    CDN reuse one TCP+TLS connection instead of handshaking every time.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+
+        return _session
+
+
+def probe_url(url: str, timeout: float = 5, allow_redirects: bool = False,
+              session: requests.Session = None, headers: dict = None, timings: dict = None) -> requests.Response:
+    """HEAD a URL, falling back to a ranged GET when the server refuses HEAD.
+
+    The GET asks for the first byte only and is streamed. At most one chunk is
+    read, so a server that ignores Range never sends us its whole page.
+
+    If a timings dict is given it is filled with the phases of the request, in
+    ms: 'dns', 'connect' and 'tls' (new connections only), 'ttfb' and 'total'. When
+    the request raises, 'total' and 'failed' hold the time until it failed.
+    """
+    session = session or get_session()
+    started = time.perf_counter()
+    _phase_timings.current = timings
+
+    try:
+        response = session.head(url, timeout=timeout, allow_redirects=allow_redirects, headers=headers)
+        if response.status_code in HEAD_REFUSED_CODES:
+            range_headers = {'Range': 'bytes=0-0', **(headers or {})}
+            response = session.get(url, timeout=timeout, allow_redirects=allow_redirects,
+                                   headers=range_headers, stream=True)
+            # Reading the (one byte) body lets urllib3 put the connection back in the pool
+            next(response.iter_content(chunk_size=1024), None)
+            response.close()
+    except Exception:
+        if timings is not None:
+            timings['total'] = timings['failed'] = (time.perf_counter() - started) * 1000
+        raise
+    finally:
+        _phase_timings.current = None
+
+    if timings is not None:
+        # elapsed runs from sending the request until the response headers were parsed
+        timings['ttfb'] = response.elapsed.total_seconds() * 1000
+        timings['total'] = (time.perf_counter() - started) * 1000
+
+    return response
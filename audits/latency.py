@@ -0,0 +1,149 @@
+# latency.py
+import threading
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+# Request phases, in the order they happen. Connection phases are only recorded
+# for new connections (keep-alive reuse skips them). Both engines time DNS on
+# its own; the threaded engine splits TCP ('connect') from TLS, aiohttp reports
+# TCP+TLS as 'connect'.
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'total')
+
+# Elapsed time of requests that timed out or raised. They are counted in
+# 'total' as well, so the percentiles include the slowest requests.
+FAILED = 'failed'
+
+PERCENTILES = (50, 95, 99)
+
+# Values below 2**SUB_BITS are exact; above that every power of two is split
+# into 2**(SUB_BITS - 1) linear buckets, i.e. about 3% relative error
+SUB_BITS = 6
+SUB_COUNT = 1 << SUB_BITS
+HALF_COUNT = SUB_COUNT >> 1
+
+
+def _bucket(value: int) -> int:
+    if value < SUB_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BITS
+    return SUB_COUNT + (shift - 1) * HALF_COUNT + ((value >> shift) - HALF_COUNT)
+
+
+def _bucket_value(index: int) -> int:
+    """Midpoint of a bucket's value range"""
+    if index < SUB_COUNT:
+        return index
+    shift, offset = divmod(index - SUB_COUNT, HALF_COUNT)
+    shift += 1
+    return ((offset + HALF_COUNT) << shift) + (1 << (shift - 1))
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of durations, kept in microseconds.
+
+    Memory is a few hundred counters whatever the number of samples, and
+    histograms merge by adding counts, so per-host histograms roll up into
+    the run-wide one exactly.
+    """
+
+    __slots__ = ('counts', 'count', 'max')
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.max = 0
+
+    def record(self, ms: float):
+        value = max(0, int(ms * 1000))
+        index = _bucket(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram'):
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Value (ms) at or below which p percent of the samples fall"""
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_value(index), self.max) / 1000
+        return self.max / 1000
+
+    def summary(self) -> Dict:
+        summary = {'count': self.count}
+        for p in PERCENTILES:
+            value = self.percentile(p)
+            summary[f'p{p}'] = round(value, 1) if value is not None else None
+        summary['max'] = round(self.max / 1000, 1)
+        return summary
+
+
+class LatencyStats:
+    """Per-phase histograms (plus failed requests) for the whole run and for every host"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.run = {phase: LatencyHistogram() for phase in PHASES + (FAILED,)}
+        self.hosts = {}
+
+    def record(self, url: str, timings: Dict[str, float]):
+        """Add one request's phase timings (ms); missing phases are skipped"""
+        host = (urlsplit(url).hostname or '').lower()
+        with self._lock:
+            per_host = self.hosts.setdefault(host, {})
+            for phase, ms in timings.items():
+                if phase not in self.run or ms is None:
+                    continue
+                self.run[phase].record(ms)
+                per_host.setdefault(phase, LatencyHistogram()).record(ms)
+
+    def host_percentile(self, host: str, p: float, phase: str = 'total', min_samples: int = 1) -> Optional[float]:
+        """A host's percentile for a phase (ms), or None with fewer than min_samples"""
+        with self._lock:
+            histogram = self.hosts.get(host, {}).get(phase)
+            if histogram is None or histogram.count < min_samples:
+                return None
+            return histogram.percentile(p)
+
+    def summary(self) -> Dict:
+        """{phase: {count, p50, p95, p99, max}} over every request of the run"""
+        return {phase: histogram.summary() for phase, histogram in self.run.items() if histogram.count}
+
+    def slowest_hosts(self, limit: int = 20, phase: str = 'total') -> List[Dict]:
+        """Hosts with the highest p95 for a phase, with all their phase summaries"""
+        ranked = sorted(
+            ((host, phases) for host, phases in self.hosts.items() if phase in phases),
+            key=lambda item: item[1][phase].percentile(95),
+            reverse=True
+        )
+        return [
+            {'host': host, **{name: histogram.summary() for name, histogram in phases.items()}}
+            for host, phases in ranked[:limit]
+        ]
+
+    def report(self, host_limit: int = 50) -> Dict:
+        return {'run': self.summary(), 'slowest_hosts': self.slowest_hosts(host_limit)}
+
+
+def print_latency_summary(summary: Dict, phases: Iterable[str] = PHASES + (FAILED,)):
+    print("\n⏱️  Request latency (ms):")
+    print(f"  {'phase':<8} {'count':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for phase in phases:
+        if phase not in summary:
+            continue
+        row = summary[phase]
+        cells = ' '.join(f"{row[key] if row[key] is not None else '-':>8}" for key in ('p50', 'p95', 'p99', 'max'))
+        print(f"  {phase:<8} {row['count']:>7} {cells}")
@@ -1,14 +1,25 @@
 # get_new_tool_screenshots.py
-import requests
-import os
-import time
-from PIL import Image
-from io import BytesIO
+import sys
 from pathlib import Path
 
+# Shared capture helpers live next to the other screenshot scripts in frontend/
+sys.path.insert(0, str(Path(__file__).parent.parent / 'frontend'))
+from capture_backends import BACKENDS, get_backend
+from capture_scheduler import CaptureError, CaptureScheduler, RateLimitError
+from screenshot_quality import check_capture
+from screenshot_store import ScreenshotStore
+
+from build_catalog import compile_catalog
+from tool_data import parse_tool_data
+from tool_data_writer import default_tool_data_path, write_tool_data
+
 
 class ScreenshotGenerator:
-    def __init__(self):
+    def __init__(self, workers=3, backend_name=None):
+        self.workers = workers
+        self.backend_name = backend_name
+        self.backend = None
+
         # Define the new tools that need screenshots
         self.new_tools = [
             {
@@ -68,6 +79,9 @@ class ScreenshotGenerator:
             }
         ]
 
+        # Manifest entries are keyed by tool name
+        self.tool_names = {tool['filename']: tool['name'] for tool in self.new_tools}
+
         # Set paths
         self.project_root = Path(__file__).parent.parent
         self.screenshots_dir = self.project_root / 'frontend' / 'public' / 'screenshots'
@@ -75,6 +89,9 @@ class ScreenshotGenerator:
         # Ensure directory exists
         self.screenshots_dir.mkdir(parents=True, exist_ok=True)
 
+        # Captures are stored by content hash under public/screenshots/store
+        self.store = ScreenshotStore()
+
         print(f"📁 Screenshots directory: {self.screenshots_dir}")
 
     def load_env(self):
@@ -100,51 +117,68 @@ class ScreenshotGenerator:
             print("⚠️  python-dotenv not installed. Using system environment variables.")
 
     def take_screenshot(self, url, filename):
-        """Take a screenshot of a URL"""
-        api_key = os.getenv("SCREENSHOTONE_API_KEY")
-
-        if not api_key:
-            print("❌ SCREENSHOTONE_API_KEY not found in environment")
-            return False
+        """
+        Take a screenshot of a URL (raises RateLimitError/CaptureError for retryable failures).
 
+        Returns:
+            str or None: Public URL the catalog's screenshot_url should use, or None if failed
+        """
         try:
-            # Build screenshot API URL
-            screenshot_url = (
-                f"https://api.screenshotone.com/take"
-                f"?access_key={api_key}"
-                f"&url={url}"
-                f"&viewport_width=1280"
-                f"&viewport_height=800"
-                f"&format=png"
-                f"&block_cookie_banners=true"
-                f"&block_ads=true"
-            )
-
             print(f"  📸 Requesting screenshot...")
-            response = requests.get(screenshot_url, timeout=30)
-
-            if response.status_code == 200:
-                # Save the image
-                img = Image.open(BytesIO(response.content))
-                save_path = self.screenshots_dir / filename
-                img.save(save_path, 'PNG', optimize=True)
-
-                # Verify file was saved
-                if save_path.exists() and save_path.stat().st_size > 0:
-                    print(f"  ✅ Saved: {filename} ({save_path.stat().st_size // 1024}KB)")
-                    return True
-                else:
-                    print(f"  ❌ Failed to save {filename}")
-                    return False
+            img = self.backend.capture(url)
+            if img is None:
+                print(f"  ❌ No screenshot returned for {url}")
+                return None
+
+            # A blank or error page is not worth another paid capture; fail it permanently
+            problems = check_capture(img)
+            if problems:
+                print(f"  ❌ Rejected capture: {', '.join(problems)}")
+                return None
+
+            # Save the PNG fallback plus responsive WebP/AVIF variants
+            entry, _ = self.store.save(self.tool_names.get(filename, Path(filename).stem), img)
+            save_path = Path(self.store.store_dir) / f"{entry['hash']}.png"
+
+            # Verify file was saved
+            if save_path.exists() and save_path.stat().st_size > 0:
+                print(f"  ✅ Saved: {filename} as {save_path.name} ({save_path.stat().st_size // 1024}KB)")
+                return entry['src']
             else:
-                print(f"  ❌ API error: {response.status_code}")
-                if response.status_code == 429:
-                    print("  ⚠️  Rate limit reached. Wait a bit before continuing.")
-                return False
+                print(f"  ❌ Failed to save {filename}")
+                return None
 
+        except (RateLimitError, CaptureError):
+            raise
         except Exception as e:
             print(f"  ❌ Error: {str(e)}")
-            return False
+            return None
+
+    def update_catalog(self, screenshot_urls):
+        """
+        Point each captured tool's screenshot_url at its stored file.
+
+        Args:
+            screenshot_urls (dict): Tool name -> public URL from take_screenshot
+        """
+        tool_data_path = default_tool_data_path()
+        tools, prefix, suffix = parse_tool_data(tool_data_path)
+
+        updated = []
+        for tool in tools:
+            src = screenshot_urls.get(tool.get('name'))
+            if src and tool.get('screenshot_url') != src:
+                tool['screenshot_url'] = src
+                updated.append(tool['name'])
+
+        if not updated:
+            print("\nℹ️  Catalog screenshot URLs are already up to date")
+            return
+
+        if write_tool_data(tool_data_path, tools, prefix, suffix, label='new_tool_screenshots'):
+            print(f"\n📝 Updated screenshot_url for: {', '.join(updated)}")
+            # Keep tools.json copies, indexes and /api/tools shards in step with toolData.js
+            compile_catalog(tool_data_path=tool_data_path)
 
     def check_existing_screenshots(self):
         """Check which screenshots already exist"""
@@ -153,7 +187,7 @@ class ScreenshotGenerator:
 
         for tool in self.new_tools:
             path = self.screenshots_dir / tool['filename']
-            if path.exists() and path.stat().st_size > 0:
+            if self.store.has(tool['name']) or (path.exists() and path.stat().st_size > 0):
                 existing.append(tool['name'])
             else:
                 missing.append(tool)
@@ -184,22 +218,32 @@ class ScreenshotGenerator:
 
         # Generate missing screenshots
         print("\n🚀 Starting screenshot generation...")
-        successful = 0
         failed = []
 
-        for i, tool in enumerate(missing, 1):
-            print(f"\n[{i}/{len(missing)}] {tool['name']}")
+        def capture(tool):
+            print(f"\n📸 {tool['name']}")
             print(f"  🔗 URL: {tool['url']}")
+            # The scheduler treats None as a permanent failure
+            return self.take_screenshot(tool['url'], tool['filename'])
 
-            if self.take_screenshot(tool['url'], tool['filename']):
-                successful += 1
-            else:
-                failed.append(tool['name'])
+        # Built after load_env() so the API key is available
+        self.backend = get_backend(self.backend_name, workers=self.workers)
 
-            # Rate limiting
-            if i < len(missing):
-                print("  ⏳ Waiting 3 seconds...")
-                time.sleep(3)
+        scheduler = CaptureScheduler(
+            capture,
+            workers=self.workers,
+            min_interval=self.backend.min_interval,
+            checkpoint_path=str(self.project_root / 'audits' / '.new-tool-screenshots-checkpoint.json')
+        )
+        with self.backend:
+            outcome = scheduler.run(
+                [{'key': tool['name'], **tool} for tool in missing],
+                on_failure=lambda tool, error: failed.append(tool['name'])
+            )
+        successful = len([tool for tool in missing if tool['name'] in outcome['done']])
+
+        # Captures live in the content-addressed store; the catalog has to point at them
+        self.update_catalog(outcome['done'])
 
         # Summary
         print("\n" + "=" * 60)
@@ -222,5 +266,16 @@ class ScreenshotGenerator:
 
 
 if __name__ == "__main__":
-    generator = ScreenshotGenerator()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate screenshots for newly added tools')
+    parser.add_argument('--workers', type=int, default=3,
+                        help='Number of concurrent captures')
+    parser.add_argument('--backend', choices=BACKENDS,
+                        help='Capture with the ScreenshotOne API or local headless Chrome '
+                             '(default: $CAPTURE_BACKEND or screenshotone)')
+
+    args = parser.parse_args()
+
+    generator = ScreenshotGenerator(workers=args.workers, backend_name=args.backend)
     generator.generate_all_screenshots()
\ No newline at end of file
@@ -1,10 +1,13 @@
 # redirect_fix.py
 import json
-import shutil
 from datetime import datetime
 from pathlib import Path
 import os
 
+from build_catalog import compile_catalog
+from tool_data import parse_tool_data
+from tool_data_writer import rollback, write_tool_data
+
 
 class RedirectFixer:
     def __init__(self):
@@ -69,25 +72,7 @@ class RedirectFixer:
 
     def parse_tool_data(self):
         """Parse the toolData.js file"""
-        with open(self.tool_data_path, 'r') as f:
-            content = f.read()
-
-        # Extract the array content
-        start = content.find('[')
-        end = content.rfind(']') + 1
-        tools_json = content[start:end]
-
-        # Parse as JSON
-        tools = json.loads(tools_json)
-        return tools, content[:start], content[end:]
-
-    def create_backup(self):
-        """Create timestamped backup"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = self.tool_data_path.parent / f"{self.tool_data_path.name}.backup.{timestamp}"
-        shutil.copy2(self.tool_data_path, backup_path)
-        print(f"✅ Created backup: {backup_path}")
-        return backup_path
+        return parse_tool_data(self.tool_data_path)
 
     def update_tool_urls(self, tools, update_recommendations):
         """Update tool URLs based on recommendations"""
@@ -138,17 +123,10 @@ class RedirectFixer:
 
     def save_updated_tools(self, tools, prefix, suffix):
         """Save the updated tools back to toolData.js"""
-        # Convert back to formatted JSON
-        tools_json = json.dumps(tools, indent=2)
-
-        # Reconstruct the file
-        new_content = prefix + tools_json + suffix
-
-        # Write to file
-        with open(self.tool_data_path, 'w') as f:
-            f.write(new_content)
-
-        print(f"✅ Saved updated toolData.js at: {self.tool_data_path}")
+        if write_tool_data(self.tool_data_path, tools, prefix, suffix, label='redirect_fix'):
+            print(f"✅ Saved updated toolData.js at: {self.tool_data_path}")
+            # Keep tools.json copies and indexes in step with toolData.js
+            compile_catalog(tool_data_path=self.tool_data_path)
 
     def generate_update_report(self, updates_made, rebrand_updates):
         """Generate a report of all changes"""
@@ -179,9 +157,6 @@ class RedirectFixer:
 
         print(f"Found {len(update_recommendations)} tools needing updates")
 
-        # Create backup
-        backup_path = self.create_backup()
-
         # Parse current tool data
         tools, prefix, suffix = self.parse_tool_data()
         print(f"Loaded {len(tools)} tools from toolData.js")
@@ -199,13 +174,24 @@ class RedirectFixer:
         self.generate_update_report(updates_made, rebrand_updates)
 
         print("\n✨ Done! All redirects have been fixed.")
-        print(f"🔄 To revert changes, restore from: {backup_path}")
+        print("🔄 To revert changes: python redirect_fix.py --rollback 1")
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Apply redirect fixes to toolData.js')
+    parser.add_argument('--rollback', type=int, metavar='N',
+                        help='Restore toolData.js as it was N journaled writes ago')
+
+    args = parser.parse_args()
+
     try:
         fixer = RedirectFixer()
-        fixer.fix_all_redirects()
+        if args.rollback:
+            rollback(fixer.tool_data_path, args.rollback)
+        else:
+            fixer.fix_all_redirects()
     except FileNotFoundError as e:
         print(f"\n❌ Error: {e}")
         print("\n💡 Please ensure you run this script from the correct location")
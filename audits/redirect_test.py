@@ -1,88 +1,58 @@
 # check_all_redirects.py
 import json
-import requests
-from urllib.parse import urlparse
 import time
 
+from compact_report import CompactReport
+from http_pool import get_session, probe_url
+from redirects import analyze_redirect, build_redirect_report, follow_redirect_chain, redirect_category, summarize_chain
+from resilience import Resilience
+
 
 class RedirectChecker:
-    def __init__(self):
-        self.audit_report_path = '../audit-report.json'
+    def __init__(self, audit_report_path='../audit-report.json'):
+        # audit-report.json, or the columnar audit-report.npz
+        self.audit_report_path = audit_report_path
+        self.resilience = Resilience(default_timeout=10)
 
     def load_redirected_tools(self):
         """Load tools that were marked as redirected"""
-        with open(self.audit_report_path, 'r') as f:
-            report = json.load(f)
+        if self.audit_report_path.endswith('.npz'):
+            redirected = CompactReport(self.audit_report_path).results('redirected')
+        else:
+            with open(self.audit_report_path, 'r') as f:
+                redirected = json.load(f)['details']['redirected']
 
         redirected_tools = []
-        for item in report['details']['redirected']:
+        for item in redirected:
             redirected_tools.append({
                 'name': item['tool']['name'],
                 'id': item['tool']['id'],
                 'original_url': item['tool']['source_url'],
-                'status_code': item.get('code', 'Unknown')
+                'status_code': item.get('code', 'Unknown'),
+                # Chains resolved during the audit don't need to be walked again
+                'chain': item.get('chain')
             })
 
         return redirected_tools
 
     def follow_redirect_chain(self, url, max_redirects=5):
         """Follow redirects to find final destination"""
-        redirect_chain = []
-        current_url = url
-
-        for i in range(max_redirects):
-            try:
-                response = requests.get(current_url, allow_redirects=False, timeout=10)
-                redirect_chain.append({
-                    'url': current_url,
-                    'status': response.status_code
-                })
+        def probe(current_url):
+            response = self.resilience.call(
+                current_url,
+                lambda timeout: probe_url(current_url, timeout=timeout, session=get_session())
+            )
+            return response.status_code, response.headers
 
-                if response.status_code in [301, 302, 303, 307, 308]:
-                    # Get the redirect location
-                    location = response.headers.get('Location', '')
-
-                    # Handle relative redirects
-                    if location.startswith('/'):
-                        parsed = urlparse(current_url)
-                        location = f"{parsed.scheme}://{parsed.netloc}{location}"
-
-                    current_url = location
-                else:
-                    # No more redirects, this is the final URL
-                    break
-
-            except Exception as e:
-                redirect_chain.append({
-                    'url': current_url,
-                    'status': 'Error',
-                    'error': str(e)
-                })
-                break
+        return follow_redirect_chain(url, probe, max_redirects=max_redirects)
 
-        return redirect_chain
+    def close(self):
+        """Shut down the resilience layer's hedging thread pool"""
+        self.resilience.close()
 
     def analyze_redirect(self, original_url, final_url):
         """Analyze the type of redirect"""
-        orig_parsed = urlparse(original_url.lower())
-        final_parsed = urlparse(final_url.lower())
-
-        # Check for minor differences
-        if orig_parsed.netloc == final_parsed.netloc:
-            if orig_parsed.path.rstrip('/') == final_parsed.path.rstrip('/'):
-                return "MINOR: Trailing slash or protocol change"
-            else:
-                return "PATH CHANGE: Same domain, different path"
-
-        # Check for subdomain changes
-        orig_domain = orig_parsed.netloc.replace('www.', '')
-        final_domain = final_parsed.netloc.replace('www.', '')
-
-        if orig_domain in final_domain or final_domain in orig_domain:
-            return "SUBDOMAIN: Related domain change"
-
-        # Check for complete rebrand
-        return "MAJOR: Complete domain change (possible rebrand/acquisition)"
+        return analyze_redirect(original_url, final_url)
 
     def check_all_redirects(self):
         """Check all redirected URLs and analyze them"""
@@ -96,16 +66,17 @@ class RedirectChecker:
             print(f"\n[{i}/{len(redirected_tools)}] Checking {tool['name']}...")
             print(f"Original URL: {tool['original_url']}")
 
-            # Follow the redirect chain
-            chain = self.follow_redirect_chain(tool['original_url'])
+            # Follow the redirect chain, unless the audit already resolved it
+            chain = tool.pop('chain', None)
+            fetched = not chain
+            if fetched:
+                chain = self.follow_redirect_chain(tool['original_url'])
 
             if chain:
-                final_url = chain[-1]['url']
-                print(f"Final URL: {final_url}")
-
                 # Analyze the redirect
-                analysis = self.analyze_redirect(tool['original_url'], final_url)
-                print(f"Analysis: {analysis}")
+                summary = summarize_chain(tool['original_url'], chain)
+                print(f"Final URL: {summary['final_url']}")
+                print(f"Analysis: {summary['analysis']}")
 
                 # Show redirect chain if multiple hops
                 if len(chain) > 2:
@@ -115,14 +86,15 @@ class RedirectChecker:
 
                 results.append({
                     'tool': tool,
-                    'final_url': final_url,
-                    'analysis': analysis,
-                    'chain_length': len(chain),
-                    'needs_update': 'MAJOR' in analysis or 'PATH CHANGE' in analysis
+                    'final_url': summary['final_url'],
+                    'analysis': summary['analysis'],
+                    'chain_length': summary['chain_length'],
+                    'needs_update': summary['needs_update']
                 })
 
             # Rate limiting
-            time.sleep(0.5)
+            if fetched:
+                time.sleep(0.5)
 
         # Generate summary report
         self.generate_redirect_report(results)
@@ -136,17 +108,11 @@ class RedirectChecker:
         print("=" * 80)
 
         # Categorize results
-        minor_changes = []
-        path_changes = []
-        major_changes = []
-
-        for result in results:
-            if 'MINOR' in result['analysis']:
-                minor_changes.append(result)
-            elif 'PATH CHANGE' in result['analysis']:
-                path_changes.append(result)
-            else:
-                major_changes.append(result)
+        report = build_redirect_report(results)
+        minor_changes = [r for r in results if redirect_category(r['analysis']) == 'minor']
+        path_changes = [r for r in results if redirect_category(r['analysis']) == 'path']
+        major_changes = [r for r in results if redirect_category(r['analysis']) == 'major']
+        unresolved = [r for r in results if redirect_category(r['analysis']) in ('loop', 'error')]
 
         # Print categorized results
         print(f"\n✅ MINOR CHANGES (No action needed): {len(minor_changes)} tools")
@@ -162,21 +128,11 @@ class RedirectChecker:
             print(f"  • {r['tool']['name']}: {r['tool']['original_url']} → {r['final_url']}")
             print(f"    Analysis: {r['analysis']}")
 
-        # Save detailed report
-        report = {
-            'summary': {
-                'total_redirects': len(results),
-                'minor_changes': len(minor_changes),
-                'path_changes': len(path_changes),
-                'major_changes': len(major_changes)
-            },
-            'details': results,
-            'update_recommendations': {
-                tool['tool']['name']: tool['final_url']
-                for tool in results if tool['needs_update']
-            }
-        }
+        print(f"\n🔁 LOOPS AND FAILED CHAINS (Check manually): {len(unresolved)} tools")
+        for r in unresolved:
+            print(f"  • {r['tool']['name']}: {r['tool']['original_url']} - {r['analysis']}")
 
+        # Save detailed report
         with open('../redirect-analysis.json', 'w') as f:
             json.dump(report, f, indent=2)
 
@@ -185,5 +141,15 @@ class RedirectChecker:
 
 
 if __name__ == "__main__":
-    checker = RedirectChecker()
-    checker.check_all_redirects()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Re-check the redirects found by the last audit')
+    parser.add_argument('--report', type=str, default='../audit-report.json',
+                        help='audit-report.json or audit-report.npz')
+
+    args = parser.parse_args()
+    checker = RedirectChecker(args.report)
+    try:
+        checker.check_all_redirects()
+    finally:
+        checker.close()
\ No newline at end of file
@@ -0,0 +1,158 @@
+# redirects.py
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from url_cache import normalize_url
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+# A probe fetches one URL without following redirects: url -> (status_code, headers)
+Probe = Callable[[str], Tuple[int, Mapping]]
+
+
+def resolve_location(current_url: str, location: str) -> str:
+    """Resolve a Location header against the URL that returned it.
+
+    Handles absolute, root-relative ('/path'), relative ('path') and
+    protocol-relative ('//host/path') redirects.
+    """
+    return urljoin(current_url, location.strip())
+
+
+def record_hop(chain: List[Dict], seen: set, url: str, status: int, headers: Mapping) -> Optional[str]:
+    """Append one hop to the chain and return the next URL, or None when the chain ends"""
+    chain.append({'url': url, 'status': status})
+
+    if status not in REDIRECT_CODES:
+        return None
+
+    location = headers.get('Location', '')
+    if not location:
+        # Nowhere to go; summarize_chain reports it instead of "still redirecting"
+        chain[-1]['error'] = 'missing Location header'
+        return None
+
+    next_url = resolve_location(url, location)
+    key = normalize_url(next_url)
+    if key in seen:
+        chain.append({'url': next_url, 'status': 'Loop'})
+        return None
+
+    seen.add(key)
+    return next_url
+
+
+def follow_redirect_chain(url: str, probe: Probe, max_redirects: int = 5,
+                          first: Tuple[int, Mapping] = None) -> List[Dict]:
+    """Follow redirects to find final destination.
+
+    `first` is the (status_code, headers) already fetched for `url`, so the
+    audit does not request the first hop twice.
+    """
+    chain = []
+    seen = {normalize_url(url)}
+    current_url = url
+
+    for i in range(max_redirects):
+        try:
+            if i == 0 and first is not None:
+                status, headers = first
+            else:
+                status, headers = probe(current_url)
+        except Exception as e:
+            chain.append({'url': current_url, 'status': 'Error', 'error': str(e)})
+            break
+
+        current_url = record_hop(chain, seen, current_url, status, headers)
+        if current_url is None:
+            break
+
+    return chain
+
+
+def analyze_redirect(original_url: str, final_url: str) -> str:
+    """Analyze the type of redirect"""
+    orig_parsed = urlparse(original_url.lower())
+    final_parsed = urlparse(final_url.lower())
+
+    # Check for minor differences
+    if orig_parsed.netloc == final_parsed.netloc:
+        if orig_parsed.path.rstrip('/') == final_parsed.path.rstrip('/'):
+            return "MINOR: Trailing slash or protocol change"
+        else:
+            return "PATH CHANGE: Same domain, different path"
+
+    # Check for subdomain changes
+    orig_domain = orig_parsed.netloc.replace('www.', '')
+    final_domain = final_parsed.netloc.replace('www.', '')
+
+    if orig_domain in final_domain or final_domain in orig_domain:
+        return "SUBDOMAIN: Related domain change"
+
+    # Check for complete rebrand
+    return "MAJOR: Complete domain change (possible rebrand/acquisition)"
+
+
+def summarize_chain(original_url: str, chain: List[Dict]) -> Dict:
+    """Final URL, analysis and update decision for a redirect chain.
+
+    A chain that ends in a loop, a failed hop, a redirect without a Location
+    header or still redirecting after max_redirects did not resolve: its
+    final_url is empty and 'resolved' is False.
+    """
+    last = chain[-1] if chain else None
+
+    if last and last['status'] == 'Loop':
+        final_url, analysis = '', "LOOP: Redirect loop detected"
+    elif last and last['status'] == 'Error':
+        final_url, analysis = '', f"ERROR: Redirect hop failed ({last.get('error', 'unknown error')})"
+    elif last and last['status'] in REDIRECT_CODES and last.get('error'):
+        final_url, analysis = '', f"ERROR: {last['status']} redirect without a Location header"
+    elif last and last['status'] in REDIRECT_CODES:
+        final_url, analysis = '', f"ERROR: Still redirecting after {len(chain)} hops"
+    else:
+        final_url = last['url'] if last else original_url
+        analysis = analyze_redirect(original_url, final_url)
+
+    return {
+        'final_url': final_url,
+        'resolved': bool(final_url),
+        'chain': chain,
+        'chain_length': len(chain),
+        'analysis': analysis,
+        'needs_update': 'MAJOR' in analysis or 'PATH CHANGE' in analysis
+    }
+
+
+def redirect_category(analysis: str) -> str:
+    """Report bucket for an analysis string: minor, path, major, loop or error"""
+    for prefix, category in (('MINOR', 'minor'), ('PATH CHANGE', 'path'), ('LOOP', 'loop'), ('ERROR', 'error')):
+        if analysis.startswith(prefix):
+            return category
+    return 'major'
+
+
+def build_redirect_report(results: List[Dict]) -> Dict:
+    """Build the redirect-analysis.json structure consumed by RedirectFixer.
+
+    Each result is {'tool': {'name', 'id', 'original_url', 'status_code'},
+    'final_url', 'analysis', 'chain_length', 'needs_update'}. Loops and
+    failed chains are counted on their own, not as major changes.
+    """
+    categories = [redirect_category(r['analysis']) for r in results]
+
+    return {
+        'summary': {
+            'total_redirects': len(results),
+            'minor_changes': categories.count('minor'),
+            'path_changes': categories.count('path'),
+            'major_changes': categories.count('major'),
+            'loops': categories.count('loop'),
+            'errors': categories.count('error')
+        },
+        'details': results,
+        'update_recommendations': {
+            r['tool']['name']: r['final_url']
+            for r in results if r['needs_update']
+        }
+    }
@@ -1,9 +1,12 @@
 # apply_all_tool_replacements.py
 import json
-import shutil
 from datetime import datetime
 from pathlib import Path
 
+from build_catalog import compile_catalog
+from tool_data import parse_tool_data
+from tool_data_writer import rollback, write_tool_data
+
 
 class ToolReplacementProcessor:
     def __init__(self):
@@ -136,25 +139,9 @@ class ToolReplacementProcessor:
             }
         }
 
-    def create_backup(self):
-        """Create timestamped backup"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = f"{self.tool_data_path}.full_replacements_backup.{timestamp}"
-        shutil.copy2(self.tool_data_path, backup_path)
-        print(f"✅ Created backup: {backup_path}")
-        return backup_path
-
     def parse_tool_data(self):
         """Parse the toolData.js file"""
-        with open(self.tool_data_path, 'r') as f:
-            content = f.read()
-
-        start = content.find('[')
-        end = content.rfind(']') + 1
-        tools_json = content[start:end]
-
-        tools = json.loads(tools_json)
-        return tools, content[:start], content[end:]
+        return parse_tool_data(self.tool_data_path)
 
     def process_replacements(self, tools):
         """Process all replacements"""
@@ -226,13 +213,10 @@ class ToolReplacementProcessor:
 
     def save_updated_tools(self, tools, prefix, suffix):
         """Save the updated tools back to toolData.js"""
-        tools_json = json.dumps(tools, indent=2)
-        new_content = prefix + tools_json + suffix
-
-        with open(self.tool_data_path, 'w') as f:
-            f.write(new_content)
-
-        print(f"✅ Saved updated toolData.js")
+        if write_tool_data(self.tool_data_path, tools, prefix, suffix, label='replace_tools'):
+            print(f"✅ Saved updated toolData.js")
+            # Keep tools.json copies and indexes in step with toolData.js
+            compile_catalog(tool_data_path=self.tool_data_path)
 
     def generate_report(self, changes_made, initial_count, final_count):
         """Generate a detailed change report"""
@@ -295,9 +279,6 @@ class ToolReplacementProcessor:
             print(f"Project root: {self.project_root}")
             return False
 
-        # Create backup
-        backup_path = self.create_backup()
-
         # Parse current tool data
         tools, prefix, suffix = self.parse_tool_data()
         initial_count = len(tools)
@@ -314,10 +295,21 @@ class ToolReplacementProcessor:
         self.generate_report(changes_made, initial_count, final_count)
 
         print(f"\n✨ Done! Applied {len(changes_made['replaced'])} replacements")
-        print(f"🔄 To revert: restore from {backup_path}")
+        print("🔄 To revert: python replace_tools.py --rollback 1")
         return True
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Apply tool replacements to toolData.js')
+    parser.add_argument('--rollback', type=int, metavar='N',
+                        help='Restore toolData.js as it was N journaled writes ago')
+
+    args = parser.parse_args()
+
     processor = ToolReplacementProcessor()
-    processor.apply_replacements()
\ No newline at end of file
+    if args.rollback:
+        rollback(processor.tool_data_path, args.rollback)
+    else:
+        processor.apply_replacements()
\ No newline at end of file
@@ -0,0 +1,297 @@
+# resilience.py
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, Iterable, Mapping, Optional, Tuple, Type, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+
+from latency import LatencyStats
+
+T = TypeVar('T')
+
+# Responses worth asking again for: rate limited or a struggling upstream
+TRANSIENT_CODES = (429, 502, 503, 504)
+
+# Timeouts and dropped connections; SSLError is a ConnectionError but retrying will not fix it
+TRANSIENT_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of contacting a host whose circuit breaker is open"""
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or '').lower()
+
+
+class CircuitBreaker:
+    """Stop calling a host after `threshold` failed calls in a row.
+
+    After `cooldown` seconds one trial call is let through (half-open): a
+    success closes the circuit, a failure opens it for another cooldown.
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 120.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened = {}
+        self.opened = 0
+
+    def allow(self, host: str) -> bool:
+        with self._lock:
+            opened_at = self._opened.get(host)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.cooldown:
+                return False
+            # Half-open: hold everyone else back while the trial call runs
+            self._opened[host] = time.monotonic()
+            return True
+
+    def record(self, host: str, ok: bool):
+        with self._lock:
+            if ok:
+                self._failures.pop(host, None)
+                self._opened.pop(host, None)
+                return
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if self._failures[host] >= self.threshold:
+                if host not in self._opened:
+                    self.opened += 1
+                self._opened[host] = time.monotonic()
+
+    def open_hosts(self):
+        with self._lock:
+            return sorted(self._opened)
+
+
+class TimeoutBudget:
+    """Per-host timeouts derived from the latency observed for that host.
+
+    A host with at least min_samples timings gets multiplier x its p99,
+    clamped to [floor, ceiling]; others get the default.
+    """
+
+    def __init__(self, observed: LatencyStats, default: float = 5.0, floor: float = 2.0,
+                 ceiling: float = 30.0, multiplier: float = 3.0, min_samples: int = 5):
+        self.observed = observed
+        self.default = default
+        self.floor = floor
+        self.ceiling = ceiling
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+
+    def timeout(self, host: str) -> float:
+        p99 = self.observed.host_percentile(host, 99, min_samples=self.min_samples)
+        if p99 is None:
+            return self.default
+        return min(self.ceiling, max(self.floor, self.multiplier * p99 / 1000))
+
+    def hedge_delay(self, host: str) -> Optional[float]:
+        """Seconds to wait before sending a duplicate request: the host's p95"""
+        p95 = self.observed.host_percentile(host, 95, min_samples=self.min_samples)
+        return p95 / 1000 if p95 is not None else None
+
+
+class Resilience:
+    """Adaptive timeouts, retries, circuit breaking and hedging around a request.
+
+    call(url, attempt) runs attempt(timeout) until it returns a non-transient
+    response or retries run out. Transient errors and 429/5xx answers are
+    retried with exponential backoff and full jitter (Retry-After is honoured);
+    a timeout doubles the budget for the next try, so slow-but-alive hosts get
+    an answer instead of an error. On hosts with enough history, a duplicate
+    request is sent when the first one is slower than the host's p95, and the
+    first answer wins. call_async() applies the same policy to coroutines.
+    """
+
+    def __init__(self, default_timeout: float = 5.0, max_retries: int = 2, backoff: float = 0.5,
+                 max_backoff: float = 8.0, hedge: bool = True, hedge_workers: int = 32,
+                 hedge_budget: float = 0.1, breaker: CircuitBreaker = None,
+                 history_samples: Iterable[Tuple[str, float]] = ()):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Share of calls that may be hedged, so a slow network does not double the load
+        self.hedge_budget = hedge_budget
+        self.breaker = breaker or CircuitBreaker()
+
+        # Timings of past runs seed the budgets; this run's attempts keep them current
+        self.observed = LatencyStats()
+        for url, ms in history_samples:
+            self.observed.record(url, {'total': ms})
+        self.budget = TimeoutBudget(self.observed, default=default_timeout)
+
+        self.hedge = hedge
+        self._executor = ThreadPoolExecutor(hedge_workers, thread_name_prefix='hedge') if hedge else None
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _backoff(self, retry: int, retry_after: Optional[str] = None) -> float:
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retry))
+        if retry_after and retry_after.strip().isdigit():
+            delay = max(delay, min(self.max_backoff, float(retry_after)))
+        return delay
+
+    def _hedge_allowed(self) -> bool:
+        with self._lock:
+            return self.stats['hedges'] < max(1, self.hedge_budget * self.stats['calls'])
+
+    def _hedge_delay(self, host: str, timeout: float) -> Optional[float]:
+        """Seconds to wait before hedging this call, or None to send a single request"""
+        delay = self.budget.hedge_delay(host) if self.hedge else None
+        if delay is None or delay >= timeout or not self._hedge_allowed():
+            return None
+        return delay
+
+    def _attempt(self, url: str, host: str, attempt: Callable[[float], T], timeout: float) -> T:
+        started = time.perf_counter()
+        try:
+            delay = self._hedge_delay(host, timeout) if self._executor is not None else None
+            if delay is None:
+                return attempt(timeout)
+
+            primary = self._executor.submit(attempt, timeout)
+            if wait([primary], timeout=delay).done:
+                return primary.result()
+
+            self._count('hedges')
+            hedge = self._executor.submit(attempt, timeout)
+            pending = {primary, hedge}
+            while True:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is hedge:
+                            self._count('hedge_wins')
+                        return future.result()
+                if not pending:
+                    return primary.result()  # both failed: raise the primary's error
+        finally:
+            self.observed.record(url, {'total': (time.perf_counter() - started) * 1000})
+
+    def call(self, url: str, attempt: Callable[[float], T],
+             response: Callable[[T], requests.Response] = lambda result: result) -> T:
+        """Run attempt(timeout) with retries; response() picks the Response out of its result"""
+        host = host_of(url)
+        if not self.breaker.allow(host):
+            self._count('short_circuited')
+            raise CircuitOpenError(f"Circuit open for {host} after repeated failures")
+
+        self._count('calls')
+        timeout = self.budget.timeout(host)
+
+        for retry in range(self.max_retries + 1):
+            try:
+                result = self._attempt(url, host, attempt, timeout)
+            except requests.exceptions.SSLError:
+                self.breaker.record(host, False)
+                raise
+            except TRANSIENT_ERRORS as e:
+                if retry == self.max_retries:
+                    self.breaker.record(host, False)
+                    raise
+                if isinstance(e, requests.exceptions.Timeout):
+                    timeout = min(self.budget.ceiling, timeout * 2)
+                delay = self._backoff(retry)
+            else:
+                status_code = response(result).status_code
+                if status_code not in TRANSIENT_CODES or retry == self.max_retries:
+                    self.breaker.record(host, status_code not in TRANSIENT_CODES)
+                    return result
+                delay = self._backoff(retry, response(result).headers.get('Retry-After'))
+
+            self._count('retries')
+            time.sleep(delay)
+
+    async def _attempt_async(self, url: str, host: str, attempt: Callable[[float], Awaitable[T]],
+                             timeout: float) -> T:
+        started = time.perf_counter()
+        try:
+            delay = self._hedge_delay(host, timeout)
+            if delay is None:
+                return await attempt(timeout)
+
+            primary = asyncio.ensure_future(attempt(timeout))
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+
+            self._count('hedges')
+            hedge = asyncio.ensure_future(attempt(timeout))
+            pending = {primary, hedge}
+            try:
+                while True:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        if future.exception() is None:
+                            if future is hedge:
+                                self._count('hedge_wins')
+                            return future.result()
+                    if not pending:
+                        return primary.result()  # both failed: raise the primary's error
+            finally:
+                # The loser would otherwise keep its connection and host slot
+                for future in pending:
+                    future.cancel()
+        finally:
+            self.observed.record(url, {'total': (time.perf_counter() - started) * 1000})
+
+    async def call_async(self, url: str, attempt: Callable[[float], Awaitable[T]],
+                         response: Callable[[T], Tuple[int, Mapping]],
+                         transient: Tuple[Type[BaseException], ...] = (asyncio.TimeoutError,),
+                         fatal: Tuple[Type[BaseException], ...] = ()) -> T:
+        """Async counterpart of call(): attempt(timeout) is a coroutine function.
+
+        response() picks (status, headers) out of its result. Exceptions in
+        transient are retried (asyncio.TimeoutError also doubles the budget);
+        those in fatal count against the breaker and are raised at once.
+        """
+        host = host_of(url)
+        if not self.breaker.allow(host):
+            self._count('short_circuited')
+            raise CircuitOpenError(f"Circuit open for {host} after repeated failures")
+
+        self._count('calls')
+        timeout = self.budget.timeout(host)
+
+        for retry in range(self.max_retries + 1):
+            try:
+                result = await self._attempt_async(url, host, attempt, timeout)
+            except fatal:
+                self.breaker.record(host, False)
+                raise
+            except transient as e:
+                if retry == self.max_retries:
+                    self.breaker.record(host, False)
+                    raise
+                if isinstance(e, asyncio.TimeoutError):
+                    timeout = min(self.budget.ceiling, timeout * 2)
+                delay = self._backoff(retry)
+            else:
+                status_code, headers = response(result)
+                if status_code not in TRANSIENT_CODES or retry == self.max_retries:
+                    self.breaker.record(host, status_code not in TRANSIENT_CODES)
+                    return result
+                delay = self._backoff(retry, headers.get('Retry-After'))
+
+            self._count('retries')
+            await asyncio.sleep(delay)
+
+    def report(self) -> Dict:
+        return {**self.stats, 'circuits_opened': self.breaker.opened, 'open_circuits': self.breaker.open_hosts()}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
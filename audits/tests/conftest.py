@@ -0,0 +1,5 @@
+# The audit scripts import each other as top-level modules (run from audits/)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,56 @@
+import json
+
+from audit_log import AuditLog, read_log, write_streamed_report
+
+
+def _tool(n):
+    return {'id': n, 'name': f'Tool {n}', 'source_url': f'https://t{n}.example'}
+
+
+def test_resume_skips_logged_tools_and_drops_a_torn_line(tmp_path):
+    path = tmp_path / 'audit.jsonl'
+    log = AuditLog(path, fsync='never')
+    log.append(_tool(1), {'status': 'healthy'})
+    log.append(_tool(2), {'status': 'error', 'message': 'Timeout'})
+    log.close()
+
+    # A crash in the middle of a write
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"tool": {"id": 3')
+
+    log = AuditLog(path, resume=True)
+    assert log.checked_ids() == {'1', '2'}
+    log.append(_tool(3), {'status': 'redirected'})
+    log.close()
+
+    assert [record['tool']['id'] for record in read_log(path)] == [1, 2, 3]
+    assert log.counts() == {'healthy': 1, 'redirected': 1, 'notFound': 0, 'error': 1}
+
+
+def test_without_resume_the_log_starts_empty(tmp_path):
+    path = tmp_path / 'audit.jsonl'
+    log = AuditLog(path)
+    log.append(_tool(1), {'status': 'healthy'})
+    log.close()
+
+    log = AuditLog(path)
+    assert log.checked_ids() == set()
+    log.close()
+
+
+def test_streamed_report_is_valid_json(tmp_path):
+    log = AuditLog(tmp_path / 'audit.jsonl', fsync='always')
+    log.append(_tool(1), {'status': 'healthy', 'latency_ms': 12})
+    log.append(_tool(2), {'status': 'notFound', 'code': 404})
+    log.close()
+
+    report_path = tmp_path / 'audit-report.json'
+    write_streamed_report(report_path, {'summary': {'total': 2}}, log,
+                          {'duplicate': [], 'outdated': [{'tool': _tool(1), 'status': 'check'}]})
+
+    report = json.loads(report_path.read_text(encoding='utf-8'))
+    assert report['summary'] == {'total': 2}
+    assert [item['tool']['id'] for item in report['details']['healthy']] == [1]
+    assert report['details']['notFound'][0]['code'] == 404
+    assert report['details']['redirected'] == report['details']['duplicate'] == []
+    assert report['details']['outdated'][0]['status'] == 'check'
@@ -0,0 +1,55 @@
+import json
+
+from compact_report import CompactReport, load_report, write_compact_report
+
+TOOLS = [
+    {'id': '1', 'name': 'Leonardo AI', 'source_url': 'https://leonardo.ai', 'type': 'personal',
+     'category': 'Image', 'sector': 'Creative & Personalization', 'short_description': 'Images — fast ✨'},
+    {'id': '2', 'name': 'Leonardo.ai', 'source_url': 'https://www.leonardo.ai', 'type': 'personal',
+     'category': 'Image'},
+    {'id': '3', 'name': 'Jasper', 'source_url': 'https://jasper.ai', 'type': 'enterprise'},
+]
+
+META = {'timestamp': '2026-01-01T00:00:00', 'summary': {'total': 3}, 'recommendations': ['Fix redirects']}
+
+DETAILS = {
+    'healthy': [{'tool': TOOLS[0], 'status': 'healthy', 'code': 200, 'latency_ms': 87}],
+    'redirected': [{'tool': TOOLS[2], 'status': 'redirected', 'code': 301, 'location': '/home',
+                    'final_url': 'https://www.jasper.ai/home', 'chain': [{'url': 'https://jasper.ai', 'status': 301}],
+                    'needs_update': True}],
+    'notFound': [],
+    # A tool that has left the catalog since a resumed run logged it
+    'error': [{'tool': {'id': '9', 'name': 'Gone', 'source_url': 'https://gone.example', 'type': 'personal'},
+               'status': 'error', 'message': 'Timeout'}],
+    'duplicate': [{'tool1': TOOLS[0], 'tool2': TOOLS[1], 'reason': 'duplicate_url', 'similarity': 1.0}],
+    'outdated': [{'tool': TOOLS[2], 'status': 'rebranded', 'note': 'Check if still Jasper.ai or changed'}],
+}
+
+
+def test_round_trip(tmp_path):
+    path = write_compact_report(tmp_path / 'audit-report.npz', META, TOOLS, DETAILS)
+    report = load_report(path)
+
+    assert {key: report[key] for key in META} == META
+    for bucket, items in DETAILS.items():
+        assert report['details'][bucket] == items, bucket
+
+
+def test_results_by_status(tmp_path):
+    path = write_compact_report(tmp_path / 'audit-report.npz', META, TOOLS, DETAILS)
+    compact = CompactReport(path)
+
+    assert len(compact) == 3
+    assert [item['tool']['name'] for item in compact.results('redirected')] == ['Jasper']
+    assert list(compact.results('notFound')) == []
+    assert [item['status'] for item in compact.results()] == ['healthy', 'redirected', 'error']
+
+
+def test_smaller_than_json(tmp_path):
+    tools = [{'id': str(n), 'name': f'Tool {n}', 'source_url': f'https://tool{n}.example', 'type': 'personal',
+              'category': 'Image', 'sector': 'Fan Intelligence', 'short_description': 'An AI tool ' * 5}
+             for n in range(500)]
+    details = {'healthy': [{'tool': tool, 'status': 'healthy', 'code': 200} for tool in tools]}
+
+    path = write_compact_report(tmp_path / 'audit-report.npz', META, tools, details)
+    assert path.stat().st_size < len(json.dumps({**META, 'details': details})) / 5
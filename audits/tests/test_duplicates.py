@@ -0,0 +1,90 @@
+import itertools
+import random
+import string
+
+import pytest
+
+from duplicates import MinHashIndex, canonical_url, find_duplicate_pairs, jaccard, name_key, shingles
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.x.ai',
+    'http://x.ai/',
+    'x.ai',
+    'HTTPS://X.AI/?ref=foo',
+    'https://x.ai/?utm_source=newsletter&utm_medium=email',
+    'https://x.ai/#pricing',
+    'https://x.ai.',
+])
+def test_canonical_url_equivalents(url):
+    assert canonical_url(url) == 'x.ai'
+
+
+def test_canonical_url_keeps_identity():
+    assert canonical_url('https://x.ai/tools/') == 'x.ai/tools'
+    assert canonical_url('https://x.ai/tools') != canonical_url('https://x.ai/docs')
+    # Non-tracking params are kept, in a stable order
+    assert canonical_url('https://x.ai/?b=2&a=1&ref=z') == canonical_url('https://x.ai/?a=1&b=2') == 'x.ai?a=1&b=2'
+    assert canonical_url('https://bücher.de') == 'xn--bcher-kva.de'
+
+
+def test_name_key():
+    assert name_key('Leonardo AI') == name_key('Leonardo.ai') == name_key('leonardo-ai') == 'leonardoai'
+    assert name_key('Café') == 'cafe'
+
+
+def _mutate(text, rng, edits):
+    chars = list(text)
+    for _ in range(edits):
+        chars[rng.randrange(len(chars))] = rng.choice(string.ascii_lowercase)
+    return ''.join(chars)
+
+
+def test_lsh_recall_on_similar_pairs():
+    rng = random.Random(7)
+    index = MinHashIndex()
+    similar = []
+    for n in range(200):
+        base = ''.join(rng.choice(string.ascii_lowercase + ' ') for _ in range(120))
+        a, b = shingles(base, 5), shingles(_mutate(base, rng, 1), 5)
+        if jaccard(a, b) >= 0.8:
+            similar.append((2 * n, 2 * n + 1))
+        index.add(2 * n, a)
+        index.add(2 * n + 1, b)
+
+    candidates = index.candidate_pairs()
+    found = sum(pair in candidates for pair in similar)
+    # 16 bands of 4 rows: a pair at Jaccard 0.8 is missed with probability ~0.02%
+    assert len(similar) > 150
+    assert found / len(similar) >= 0.99
+
+
+def test_lsh_skips_unrelated_items():
+    rng = random.Random(3)
+    index = MinHashIndex()
+    for n in range(200):
+        index.add(n, shingles(''.join(rng.choice(string.ascii_lowercase) for _ in range(80)), 5))
+    assert len(index.candidate_pairs()) < 20
+
+
+def test_find_duplicate_pairs_matches_brute_force():
+    tools = [
+        {'name': 'Leonardo AI', 'source_url': 'https://leonardo.ai', 'short_description': 'AI image generation'},
+        {'name': 'Leonardo.ai', 'source_url': 'https://www.leonardo.ai/?ref=x', 'short_description': 'Art studio'},
+        {'name': 'Midjourney', 'source_url': 'https://midjourney.com',
+         'short_description': 'Generate stunning images from text prompts in seconds'},
+        {'name': 'Midjourney v6', 'source_url': 'https://docs.midjourney.com',
+         'short_description': 'Generate stunning images from text prompts in seconds!'},
+        {'name': 'Notion', 'source_url': 'https://notion.so', 'short_description': 'Notes and docs'},
+    ]
+    pairs = {(i, j): reason for i, j, reason, _ in find_duplicate_pairs(tools)}
+
+    assert pairs[(0, 1)] == 'duplicate_url'
+    assert pairs[(2, 3)] in ('similar_name', 'similar_description')
+    assert not any(4 in pair for pair in pairs)
+
+    # Every pair above the description threshold is reported
+    for i, j in itertools.combinations(range(len(tools)), 2):
+        grams_i, grams_j = (shingles(tools[k]['short_description'], 5) for k in (i, j))
+        if jaccard(grams_i, grams_j) >= 0.7:
+            assert (i, j) in pairs
@@ -0,0 +1,67 @@
+import http.server
+import threading
+
+import pytest
+import requests
+
+from http_pool import HEAD_REFUSED_CODES, TimedHTTPAdapter, probe_url
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.send_response(405 if self.path == '/no-head' else 200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        self.send_response(206)
+        self.send_header('Content-Length', '1')
+        self.end_headers()
+        self.wfile.write(b'x')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://localhost:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def session():
+    session = requests.Session()
+    session.mount('http://', TimedHTTPAdapter())
+    yield session
+    session.close()
+
+
+def test_new_connection_reports_every_phase(server, session):
+    timings = {}
+    assert probe_url(server, session=session, timings=timings).status_code == 200
+    assert set(timings) == {'dns', 'connect', 'ttfb', 'total'}
+    assert timings['dns'] + timings['connect'] <= timings['total']
+
+    # A kept-alive connection skips DNS and the handshake
+    timings = {}
+    probe_url(server, session=session, timings=timings)
+    assert set(timings) == {'ttfb', 'total'}
+
+
+def test_head_refused_falls_back_to_ranged_get(server, session):
+    assert 405 in HEAD_REFUSED_CODES
+    assert probe_url(f"{server}/no-head", session=session).status_code == 206
+
+
+def test_failed_request_is_timed(session):
+    timings = {}
+    with pytest.raises(requests.exceptions.ConnectionError):
+        probe_url('http://localhost:1/', session=session, timings=timings, timeout=2)
+    assert 'dns' in timings
+    assert timings['failed'] == timings['total']
@@ -0,0 +1,76 @@
+import random
+
+import numpy as np
+import pytest
+
+from latency import SUB_COUNT, LatencyHistogram, LatencyStats, _bucket, _bucket_value
+
+# Half a bucket's width relative to its lower bound: 1 / 2**(SUB_BITS - 1) / 2 ~ 1.6%
+MAX_RELATIVE_ERROR = 1 / SUB_COUNT
+
+
+def test_small_values_are_exact():
+    for value in range(SUB_COUNT):
+        assert _bucket_value(_bucket(value)) == value
+
+
+def test_bucket_error_is_bounded():
+    for value in list(range(SUB_COUNT, 5000)) + [2 ** 20 + 12345, 10 ** 7, 3 * 10 ** 8]:
+        assert abs(_bucket_value(_bucket(value)) - value) <= value * MAX_RELATIVE_ERROR
+
+
+def test_buckets_are_monotonic():
+    indexes = [_bucket(value) for value in range(200000)]
+    assert indexes == sorted(indexes)
+
+
+@pytest.mark.parametrize('p', [50, 90, 95, 99, 99.9])
+def test_percentiles_match_numpy(p):
+    rng = random.Random(5)
+    samples = [rng.lognormvariate(5, 1.2) for _ in range(20000)]
+    histogram = LatencyHistogram()
+    for ms in samples:
+        histogram.record(ms)
+
+    expected = np.percentile(samples, p, method='inverted_cdf')
+    assert histogram.percentile(p) == pytest.approx(expected, rel=0.02)
+
+
+def test_max_and_empty():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    for ms in (1.0, 2.0, 1234.5):
+        histogram.record(ms)
+    # Percentiles report bucket midpoints, never above the largest sample
+    assert histogram.percentile(100) == pytest.approx(1234.5, rel=MAX_RELATIVE_ERROR)
+    assert histogram.percentile(100) <= 1234.5
+    assert histogram.percentile(1) == 1.0
+    assert histogram.summary()['max'] == 1234.5
+
+
+def test_merge_equals_recording_everything():
+    rng = random.Random(1)
+    first, second, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for n in range(3000):
+        ms = rng.expovariate(1 / 200)
+        (first if n % 3 else second).record(ms)
+        combined.record(ms)
+
+    first.merge(second)
+    assert (first.count, first.max) == (combined.count, combined.max)
+    assert first.counts == combined.counts
+
+
+def test_stats_per_host_and_failed():
+    stats = LatencyStats()
+    for ms in (100, 120, 140, 160, 180):
+        stats.record('https://fast.example/a', {'dns': 5, 'connect': 10, 'ttfb': ms - 20, 'total': ms})
+    stats.record('https://slow.example/', {'total': 5000, 'failed': 5000})
+
+    summary = stats.summary()
+    assert summary['total']['count'] == 6
+    assert summary['failed']['count'] == 1
+    assert summary['dns']['count'] == 5
+    assert stats.host_percentile('fast.example', 50) == pytest.approx(140, rel=0.02)
+    assert stats.host_percentile('slow.example', 99, min_samples=5) is None
+    assert stats.slowest_hosts(limit=1)[0]['host'] == 'slow.example'
@@ -0,0 +1,67 @@
+import pytest
+
+from redirects import (build_redirect_report, follow_redirect_chain, redirect_category, resolve_location,
+                       summarize_chain)
+
+
+def _probe(responses):
+    def probe(url):
+        response = responses[url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+    return probe
+
+
+@pytest.mark.parametrize('location, expected', [
+    ('https://b.example/x', 'https://b.example/x'),
+    ('/login', 'https://a.example/login'),
+    ('next', 'https://a.example/dir/next'),
+    ('//cdn.example/y', 'https://cdn.example/y'),
+])
+def test_resolve_location(location, expected):
+    assert resolve_location('https://a.example/dir/page', location) == expected
+
+
+def test_resolved_chain():
+    chain = follow_redirect_chain('http://a.example', _probe({
+        'https://a.example/': (200, {}),
+    }), first=(301, {'Location': 'https://a.example/'}))
+
+    summary = summarize_chain('http://a.example', chain)
+    assert summary['resolved'] and summary['final_url'] == 'https://a.example/'
+    assert redirect_category(summary['analysis']) == 'minor'
+    assert not summary['needs_update']
+
+
+@pytest.mark.parametrize('responses, first, category, analysis', [
+    ({'https://b.example/': (302, {'Location': 'https://a.example'})},
+     (301, {'Location': 'https://b.example/'}), 'loop', 'LOOP: Redirect loop detected'),
+    ({'https://b.example/': OSError('connection reset')},
+     (301, {'Location': 'https://b.example/'}), 'error', 'ERROR: Redirect hop failed (connection reset)'),
+    ({}, (302, {}), 'error', 'ERROR: 302 redirect without a Location header'),
+    ({f'https://a.example/{n}': (302, {'Location': f'/{n + 1}'}) for n in range(10)},
+     (301, {'Location': '/0'}), 'error', 'ERROR: Still redirecting after 5 hops'),
+])
+def test_unresolved_chains(responses, first, category, analysis):
+    chain = follow_redirect_chain('https://a.example', _probe(responses), first=first)
+    summary = summarize_chain('https://a.example', chain)
+
+    assert summary['analysis'] == analysis
+    assert redirect_category(summary['analysis']) == category
+    assert summary['final_url'] == '' and not summary['resolved']
+
+
+def test_report_counts_unresolved_separately():
+    results = [
+        {'tool': {'name': 'A'}, 'final_url': 'https://a.example/new', 'needs_update': True,
+         'analysis': 'PATH CHANGE: Same domain, different path'},
+        {'tool': {'name': 'B'}, 'final_url': 'https://b2.example', 'needs_update': True,
+         'analysis': 'MAJOR: Complete domain change (possible rebrand/acquisition)'},
+        {'tool': {'name': 'C'}, 'final_url': '', 'needs_update': False, 'analysis': 'LOOP: Redirect loop detected'},
+    ]
+    report = build_redirect_report(results)
+
+    assert report['summary'] == {'total_redirects': 3, 'minor_changes': 0, 'path_changes': 1,
+                                 'major_changes': 1, 'loops': 1, 'errors': 0}
+    assert report['update_recommendations'] == {'A': 'https://a.example/new', 'B': 'https://b2.example'}
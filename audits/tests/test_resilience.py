@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+import requests
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError, Resilience
+
+
+class _Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    async def async_sleep(delay):
+        pass
+    monkeypatch.setattr(resilience.time, 'sleep', lambda delay: None)
+    monkeypatch.setattr(resilience.asyncio, 'sleep', async_sleep)
+
+
+@pytest.fixture
+def layer():
+    layer = Resilience(max_retries=2, hedge=False)
+    yield layer
+    layer.close()
+
+
+def _attempts(*outcomes):
+    """attempt(timeout) returning or raising each outcome in turn, recording the timeouts"""
+    outcomes = list(outcomes)
+    timeouts = []
+
+    def attempt(timeout):
+        timeouts.append(timeout)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    attempt.timeouts = timeouts
+    return attempt
+
+
+def test_retries_transient_status_then_succeeds(layer):
+    attempt = _attempts(_Response(503), _Response(429, {'Retry-After': '1'}), _Response(200))
+    assert layer.call('https://a.example', attempt).status_code == 200
+    assert layer.report()['retries'] == 2
+
+
+def test_timeout_doubles_the_budget(layer):
+    attempt = _attempts(requests.exceptions.Timeout(), _Response(200))
+    layer.call('https://a.example', attempt)
+    assert attempt.timeouts == [5.0, 10.0]
+
+
+def test_gives_up_and_opens_the_circuit():
+    layer = Resilience(max_retries=1, hedge=False, breaker=CircuitBreaker(threshold=2, cooldown=60))
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            layer.call('https://down.example/x', _attempts(*[requests.exceptions.ConnectionError()] * 2))
+
+    with pytest.raises(CircuitOpenError):
+        layer.call('https://down.example/y', _attempts(_Response(200)))
+    assert layer.report()['open_circuits'] == ['down.example']
+    # Other hosts are unaffected
+    assert layer.call('https://up.example', _attempts(_Response(200))).status_code == 200
+
+
+def test_ssl_errors_are_not_retried(layer):
+    attempt = _attempts(requests.exceptions.SSLError(), _Response(200))
+    with pytest.raises(requests.exceptions.SSLError):
+        layer.call('https://a.example', attempt)
+    assert len(attempt.timeouts) == 1
+
+
+def test_call_async_retries_like_call(layer):
+    outcomes = [asyncio.TimeoutError(), (503, {}), (200, {})]
+    timeouts = []
+
+    async def attempt(timeout):
+        timeouts.append(timeout)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    result = asyncio.run(layer.call_async('https://a.example', attempt, response=lambda r: r))
+    assert result == (200, {})
+    assert timeouts == [5.0, 10.0, 10.0]
+
+
+def test_call_async_raises_fatal_errors_at_once(layer):
+    calls = []
+
+    async def attempt(timeout):
+        calls.append(timeout)
+        raise ValueError('bad certificate')
+
+    with pytest.raises(ValueError):
+        asyncio.run(layer.call_async('https://a.example', attempt, response=lambda r: r,
+                                     transient=(asyncio.TimeoutError,), fatal=(ValueError,)))
+    assert len(calls) == 1
+
+
+def test_call_async_hedges_slow_hosts():
+    layer = Resilience(hedge=True, hedge_budget=1.0, history_samples=[('https://slow.example', 20.0)] * 10)
+    started = []
+
+    async def attempt(timeout):
+        started.append(timeout)
+        if len(started) == 1:
+            # The first request hangs; the hedge answers
+            await asyncio.Event().wait()
+        return 200, {}
+
+    async def run():
+        return await asyncio.wait_for(
+            layer.call_async('https://slow.example', attempt, response=lambda r: r), timeout=5)
+
+    try:
+        assert asyncio.run(run()) == (200, {})
+        assert layer.report()['hedge_wins'] == 1
+    finally:
+        layer.close()
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+import build_catalog
+import tool_data_writer
+from tool_data_writer import apply_patch, compute_patch, rollback, write_tool_data
+
+PREFIX = 'export const TOOL_DATA = '
+SUFFIX = ';\n'
+
+
+@pytest.fixture
+def compiled(monkeypatch):
+    """Calls to compile_catalog, which would otherwise rebuild the real frontend artifacts"""
+    calls = []
+    monkeypatch.setattr(build_catalog, 'compile_catalog', lambda **kwargs: calls.append(kwargs))
+    return calls
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch, compiled):
+    monkeypatch.setattr(tool_data_writer, 'JOURNAL_DIR', tmp_path / 'journal')
+    path = tmp_path / 'toolData.js'
+    path.write_text(PREFIX + json.dumps([{'id': '1', 'name': 'A'}], indent=2) + SUFFIX, encoding='utf-8')
+    return path
+
+
+def test_patch_round_trip():
+    old = 'a\nb\nc\nd\n'
+    new = 'a\nB\nc\nd\ne\n'
+    assert apply_patch(new, compute_patch(old, new)) == old
+
+
+def test_unchanged_write_is_skipped(data_file):
+    tools = [{'id': '1', 'name': 'A'}]
+    assert not write_tool_data(data_file, tools, PREFIX, SUFFIX)
+    assert tool_data_writer._journal_entries(data_file) == []
+
+
+def test_rollback_restores_each_step(data_file, compiled):
+    original = data_file.read_text(encoding='utf-8')
+    write_tool_data(data_file, [{'id': '1', 'name': 'B'}], PREFIX, SUFFIX, label='rename')
+    second = data_file.read_text(encoding='utf-8')
+    write_tool_data(data_file, [{'id': '1', 'name': 'C'}, {'id': '2', 'name': 'D'}], PREFIX, SUFFIX)
+
+    assert rollback(data_file, 1)
+    assert data_file.read_text(encoding='utf-8') == second
+    assert rollback(data_file, 1)
+    assert data_file.read_text(encoding='utf-8') == original
+    assert tool_data_writer._journal_entries(data_file) == []
+    # The catalog artifacts are rebuilt after every rollback
+    assert [call['tool_data_path'] for call in compiled] == [data_file, data_file]
+
+
+def test_rollback_refuses_outside_edits(data_file, compiled):
+    write_tool_data(data_file, [{'id': '1', 'name': 'B'}], PREFIX, SUFFIX)
+    edited = data_file.read_text(encoding='utf-8').replace('"B"', '"X"')
+    data_file.write_text(edited, encoding='utf-8')
+
+    assert not rollback(data_file, 1)
+    assert data_file.read_text(encoding='utf-8') == edited
+    assert compiled == []
+
+
+def test_rollback_rejects_too_many_steps(data_file):
+    write_tool_data(data_file, [{'id': '1', 'name': 'B'}], PREFIX, SUFFIX)
+    assert not rollback(data_file, 2)
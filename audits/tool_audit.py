@@ -3,16 +3,32 @@ import json
 import requests
 import time
 import os
+import shutil
 from datetime import datetime
 from pathlib import Path
-from collections import defaultdict
 from typing import Dict, List, Any
 import concurrent.futures
 from urllib.parse import urlparse
 
+from audit_history import DEFAULT_HISTORY_PATH, AuditHistory
+from audit_log import CHECK_BUCKETS, DEFAULT_LOG_PATH, FSYNC_POLICIES, AuditLog, write_streamed_report
+from catalog_analytics import HISTORY_DIR, catalog_frame, category_gaps, gaps_to_dict
+from catalog_model import Catalog
+from compact_report import DEFAULT_COMPACT_PATH, write_compact_report
+from duplicates import find_duplicate_pairs
+from http_pool import get_session, probe_url
+from latency import LatencyStats, print_latency_summary
+from redirects import analyze_redirect, build_redirect_report, follow_redirect_chain, summarize_chain
+from resilience import Resilience
+from tool_data import load_tool_data
+from url_cache import URLCheckCache
+
 
 class ToolAuditor:
-    def __init__(self, tool_data_path: str = None):
+    def __init__(self, tool_data_path: str = None, pool_size: int = 20,
+                 cache_path: str = None, max_age: float = None, audit_log: AuditLog = None,
+                 report_format: str = 'json', history: AuditHistory = None,
+                 resilience: Resilience = None):
         # Auto-detect the correct path
         if tool_data_path is None:
             # Get the directory where this script is located
@@ -39,6 +55,9 @@ class ToolAuditor:
                 )
 
         self.tool_data_path = tool_data_path
+        self.pool_size = pool_size
+        self.url_cache = URLCheckCache(cache_path) if cache_path else None
+        self.max_age = max_age
         self.tools = self._load_tool_data()
         self.results = {
             'healthy': [],
@@ -49,62 +68,131 @@ class ToolAuditor:
             'duplicate': []
         }
         self.category_gaps = {}
+        self._checked = 0
+        # Streaming mode: URL check results go to the log instead of self.results
+        self.audit_log = audit_log
+        self._logged_ids = audit_log.checked_ids() if audit_log is not None else set()
+        # 'json' (audit-report.json), 'compact' (audit-report.npz) or 'both'
+        self.report_format = report_format
+        self.history = history
+        self._run_id = None
+        # Per-phase request timings of this run, overall and per host
+        self.latency = LatencyStats()
+        # Retries, per-host timeouts (seeded from past runs), circuit breaker and hedging
+        self.resilience = resilience or Resilience(
+            history_samples=history.latency_samples() if history is not None else ())
 
     def _load_tool_data(self) -> List[Dict]:
         """Load tool data from JavaScript file"""
         print(f"Loading tool data from: {self.tool_data_path}")
 
-        with open(self.tool_data_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        try:
+            rows = load_tool_data(self.tool_data_path)
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Error parsing JSON: {e}")
+            raise
 
-        # Extract JSON data from JS file
-        # Handle both toolData.js and the export format
-        if 'TOOL_DATA = [' in content:
-            start = content.find('TOOL_DATA = [') + len('TOOL_DATA = ')
-        elif 'export const TOOL_DATA = [' in content:
-            start = content.find('export const TOOL_DATA = [') + len('export const TOOL_DATA = ')
+        # Malformed rows are reported together and left out of the audit
+        self.catalog = Catalog(rows)
+        self.catalog.report_issues()
+
+        tools = [rows[i] for i in self.catalog.valid_indexes]
+        print(f"Successfully loaded {len(tools)} tools")
+        return tools
+
+    @staticmethod
+    def _classify_response(status_code: int, headers) -> Dict:
+        """Map an HTTP status code to one of the result buckets"""
+        if status_code in (200, 206):  # 206 answers the ranged GET fallback
+            return {'status': 'healthy', 'code': status_code}
+        elif 300 <= status_code < 400:
+            return {
+                'status': 'redirected',
+                'code': status_code,
+                'location': headers.get('Location', '')
+            }
+        elif status_code == 404:
+            return {'status': 'notFound', 'code': 404}
         else:
-            start = content.find('[')
-
-        end = content.rfind(']') + 1
-        json_str = content[start:end]
-
-        # Clean up any JavaScript syntax
-        json_str = json_str.strip()
-        if json_str.endswith(';'):
-            json_str = json_str[:-1]
+            return {'status': 'error', 'code': status_code}
+
+    def _request_headers(self, tool: Dict) -> Dict:
+        """Conditional request headers for incremental audits"""
+        if self.url_cache is None or self.max_age is None:
+            return {}
+        return self.url_cache.conditional_headers(self.url_cache.get(tool['source_url']))
+
+    def _resolve_response(self, tool: Dict, status_code: int, headers) -> Dict:
+        """Classify a response, reusing the cached result on 304 Not Modified"""
+        if status_code == 304 and self.url_cache is not None:
+            entry = self.url_cache.get(tool['source_url'])
+            if entry is not None:
+                return URLCheckCache.to_result(entry)
+
+        return self._classify_response(status_code, headers)
+
+    def _store_result(self, tool: Dict, result: Dict, headers):
+        """Save a finished check (redirect chain included) to the URL cache"""
+        if self.url_cache is None:
+            return
+
+        # A loop or failed hop has no destination worth caching; check it again next run
+        if result.get('resolved') is False:
+            return
+
+        url = tool['source_url']
+        if result.get('cached'):
+            # 304s may omit validators, so keep the ones we already have
+            entry = self.url_cache.get(url) or {'etag': None, 'last_modified': None}
+            headers = {
+                'ETag': headers.get('ETag') or entry['etag'],
+                'Last-Modified': headers.get('Last-Modified') or entry['last_modified']
+            }
+        self.url_cache.put(url, result, headers)
 
+    def _probe_once(self, url: str, timeout: float, **kwargs):
+        """probe_url through the shared pool, adding its phase timings to self.latency"""
+        timings = {}
         try:
-            tools = json.loads(json_str)
-            print(f"Successfully loaded {len(tools)} tools")
-            return tools
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON: {e}")
-            print(f"JSON string start: {json_str[:100]}...")
-            raise
+            response = probe_url(url, timeout=timeout, session=get_session(self.pool_size),
+                                 timings=timings, **kwargs)
+            return response, timings
+        finally:
+            if timings:
+                self.latency.record(url, timings)
+
+    def _timed_probe(self, url: str, **kwargs):
+        """One probe through the resilience layer -> (response, timings)"""
+        return self.resilience.call(url, lambda timeout: self._probe_once(url, timeout, **kwargs),
+                                    response=lambda result: result[0])
+
+    def _probe(self, url: str):
+        """Fetch one redirect hop through the shared pool"""
+        response, _ = self._timed_probe(url)
+        return response.status_code, response.headers
 
     def check_url_health(self, tool: Dict) -> Dict:
-        """Check if URL is still valid"""
+        """Check if URL is still valid, resolving the full redirect chain"""
         try:
-            response = requests.head(
+            response, timings = self._timed_probe(
                 tool['source_url'],
-                timeout=5,
-                headers={'User-Agent': 'Mozilla/5.0 (compatible; ToolCurator/1.0)'},
+                headers=self._request_headers(tool),
                 allow_redirects=False
             )
 
-            if response.status_code == 200:
-                return {'status': 'healthy', 'code': 200}
-            elif 300 <= response.status_code < 400:
-                return {
-                    'status': 'redirected',
-                    'code': response.status_code,
-                    'location': response.headers.get('Location', '')
-                }
-            elif response.status_code == 404:
-                return {'status': 'notFound', 'code': 404}
-            else:
-                return {'status': 'error', 'code': response.status_code}
+            result = {**self._resolve_response(tool, response.status_code, response.headers),
+                      'latency_ms': round(timings['total'])}
+
+            if result['status'] == 'redirected' and not result.get('cached'):
+                chain = follow_redirect_chain(
+                    tool['source_url'],
+                    self._probe,
+                    first=(response.status_code, response.headers)
+                )
+                result.update(summarize_chain(tool['source_url'], chain))
+
+            self._store_result(tool, result, response.headers)
+            return result
 
         except requests.exceptions.Timeout:
             return {'status': 'error', 'message': 'Timeout'}
@@ -112,60 +200,18 @@ class ToolAuditor:
             return {'status': 'error', 'message': str(e)}
 
     def find_duplicates(self):
-        """Check for duplicate tools"""
-        name_map = {}
-        url_map = {}
-
-        for tool in self.tools:
-            # Check duplicate names
-            normalized_name = tool['name'].lower().replace(' ', '')
-            if normalized_name in name_map:
-                self.results['duplicate'].append({
-                    'tool1': name_map[normalized_name],
-                    'tool2': tool,
-                    'reason': 'duplicate_name'
-                })
-            else:
-                name_map[normalized_name] = tool
-
-            # Check duplicate URLs
-            normalized_url = tool['source_url'].lower().rstrip('/')
-            if normalized_url in url_map:
-                self.results['duplicate'].append({
-                    'tool1': url_map[normalized_url],
-                    'tool2': tool,
-                    'reason': 'duplicate_url'
-                })
-            else:
-                url_map[normalized_url] = tool
+        """Check for duplicate and near-duplicate tools"""
+        for i, j, reason, similarity in find_duplicate_pairs(self.tools):
+            self.results['duplicate'].append({
+                'tool1': self.tools[i],
+                'tool2': self.tools[j],
+                'reason': reason,
+                'similarity': similarity
+            })
 
     def analyze_category_gaps(self):
         """Analyze category distribution"""
-        personal_categories = defaultdict(int)
-        enterprise_categories = defaultdict(int)
-
-        for tool in self.tools:
-            if tool['type'] == 'personal':
-                personal_categories[tool['category']] += 1
-            else:
-                enterprise_categories[tool.get('sector', 'Unknown')] += 1
-
-        # Identify categories with few tools
-        for category, count in personal_categories.items():
-            if count < 5:
-                self.category_gaps[category] = {
-                    'type': 'personal',
-                    'count': count,
-                    'needs_more': 5 - count
-                }
-
-        for sector, count in enterprise_categories.items():
-            if count < 3:
-                self.category_gaps[sector] = {
-                    'type': 'enterprise',
-                    'count': count,
-                    'needs_more': 3 - count
-                }
+        self.category_gaps = gaps_to_dict(category_gaps(catalog_frame(self.catalog)))
 
     def check_outdated_tools(self):
         """Check for known outdated tools"""
@@ -185,89 +231,224 @@ class ToolAuditor:
                     **known_changes[tool['name']]
                 })
 
+    def _file_result(self, tool: Dict, result: Dict):
+        if self.audit_log is not None:
+            self.audit_log.append(tool, result)
+        else:
+            self.results[result['status']].append({'tool': tool, **result})
+
+    def _record_result(self, tool: Dict, result: Dict):
+        """File a URL check result and print a progress line"""
+        self._file_result(tool, result)
+        if self._run_id is not None:
+            self.history.record(self._run_id, tool, result)
+        self._checked += 1
+
+        # Show progress with status indicator
+        status_emoji = {
+            'healthy': '✅',
+            'redirected': '🔄',
+            'notFound': '❌',
+            'error': '⚠️'
+        }
+        cached = ' (cached)' if result.get('cached') else ''
+        print(
+            f"{status_emoji.get(result['status'], '❓')} [{self._checked}/{len(self.tools)}] {tool['name']} - {result['status']}{cached}")
+
+    def _tools_needing_check(self) -> List[Dict]:
+        """Record recently checked URLs from the cache and return the rest"""
+        tools = self.tools
+        if self._logged_ids:
+            tools = [tool for tool in tools if str(tool.get('id')) not in self._logged_ids]
+            self._checked = len(self.tools) - len(tools)
+            print(f"⏩ Resuming: {self._checked} tools already in {self.audit_log.path}, {len(tools)} left\n")
+
+        if self.url_cache is None or self.max_age is None:
+            return tools
+
+        to_check = []
+        for tool in tools:
+            entry = self.url_cache.get(tool['source_url'])
+            if URLCheckCache.is_fresh(entry, self.max_age):
+                self._record_result(tool, URLCheckCache.to_result(entry))
+            else:
+                to_check.append(tool)
+
+        print(f"♻️  {len(tools) - len(to_check)} URLs checked recently, {len(to_check)} to re-check\n")
+        return to_check
+
     def check_urls_parallel(self, max_workers: int = 10):
         """Check URLs in parallel with rate limiting"""
         print("\nChecking URL health...")
         print("This may take a few minutes...\n")
 
+        tools = self._tools_needing_check()
+
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_tool = {
                 executor.submit(self.check_url_health, tool): tool
-                for tool in self.tools
+                for tool in tools
             }
 
-            for i, future in enumerate(concurrent.futures.as_completed(future_to_tool)):
+            for future in concurrent.futures.as_completed(future_to_tool):
                 tool = future_to_tool[future]
                 try:
-                    result = future.result()
-                    self.results[result['status']].append({'tool': tool, **result})
-
-                    # Show progress with status indicator
-                    status_emoji = {
-                        'healthy': '✅',
-                        'redirected': '🔄',
-                        'notFound': '❌',
-                        'error': '⚠️'
-                    }
-                    print(
-                        f"{status_emoji.get(result['status'], '❓')} [{i + 1}/{len(self.tools)}] {tool['name']} - {result['status']}")
-
+                    self._record_result(tool, future.result())
                 except Exception as e:
                     print(f"❌ Error checking {tool['name']}: {e}")
-                    self.results['error'].append({'tool': tool, 'error': str(e)})
+                    self._file_result(tool, {'status': 'error', 'error': str(e)})
 
                 # Rate limiting
                 time.sleep(0.1)
 
+    def check_urls_async(self, max_in_flight: int = 200, per_host: int = 4, rate: float = 50.0):
+        """Check URLs with the asyncio engine (per-host semaphores + global token bucket)"""
+        from async_checker import AsyncURLChecker
+
+        print("\nChecking URL health (async engine)...")
+        print(f"Up to {max_in_flight} requests in flight, {per_host} per host, {rate:g} req/s\n")
+
+        checker = AsyncURLChecker(
+            classify=self._resolve_response,
+            request_headers=self._request_headers,
+            store=self._store_result,
+            max_in_flight=max_in_flight,
+            per_host=per_host,
+            rate=rate,
+            pool_size=self.pool_size,
+            latency=self.latency,
+            resilience=self.resilience
+        )
+        checker.check_all(self._tools_needing_check(), self._record_result)
+
+    def _result_counts(self) -> Dict[str, int]:
+        """Results per bucket; URL checks are counted from the log in streaming mode"""
+        counts = {bucket: len(items) for bucket, items in self.results.items()}
+        if self.audit_log is not None:
+            counts.update(self.audit_log.counts())
+        return counts
+
     def generate_report(self) -> Dict:
         """Generate comprehensive audit report"""
+        counts = self._result_counts()
         report = {
             'timestamp': datetime.now().isoformat(),
             'summary': {
                 'total': len(self.tools),
-                'healthy': len(self.results['healthy']),
-                'redirected': len(self.results['redirected']),
-                'not_found': len(self.results['notFound']),
-                'errors': len(self.results['error']),
-                'duplicates': len(self.results['duplicate']),
-                'outdated': len(self.results['outdated'])
+                'healthy': counts['healthy'],
+                'redirected': counts['redirected'],
+                'not_found': counts['notFound'],
+                'errors': counts['error'],
+                'duplicates': counts['duplicate'],
+                'outdated': counts['outdated'],
+                'invalid_rows': len({issue.index for issue in self.catalog.issues})
             },
+            'latency': self.latency.report(),
+            'resilience': self.resilience.report(),
             'category_analysis': self.category_gaps,
-            'details': self.results,
-            'recommendations': self._generate_recommendations()
+            'validation_issues': [issue._asdict() for issue in self.catalog.issues],
+            'recommendations': self._generate_recommendations(counts)
         }
 
         # Save report in the same directory as the script
         report_path = Path(__file__).parent / 'audit-report.json'
-        with open(report_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        if self.audit_log is not None:
+            self.audit_log.close()
+
+        saved = []
+        if self.report_format in ('json', 'both'):
+            if self.audit_log is not None:
+                # Details are copied from the log record by record, never all in memory
+                write_streamed_report(report_path, report, self.audit_log,
+                                      {bucket: self.results[bucket] for bucket in ('outdated', 'duplicate')})
+            else:
+                with open(report_path, 'w', encoding='utf-8') as f:
+                    json.dump({**report, 'details': self.results}, f, indent=2, ensure_ascii=False)
+            saved.append(report_path)
+
+        if self.report_format in ('compact', 'both'):
+            details = dict(self.results)
+            if self.audit_log is not None:
+                details.update({status: self.audit_log.records(status) for status in CHECK_BUCKETS})
+            saved.append(write_compact_report(DEFAULT_COMPACT_PATH, report, self.tools, details))
+
+        # Keep every run for catalog_analytics.py trend tables (the compact copy when there is one)
+        HISTORY_DIR.mkdir(exist_ok=True)
+        stamp = report['timestamp'].replace(':', '')
+        shutil.copyfile(saved[-1], HISTORY_DIR / f"audit-report-{stamp}{saved[-1].suffix}")
+
+        print()
+        for path in saved:
+            print(f"Report saved to: {path}")
 
-        print(f"\nReport saved to: {report_path}")
+        if counts['redirected']:
+            self.save_redirect_analysis()
 
         return report
 
-    def _generate_recommendations(self) -> List[str]:
+    def save_redirect_analysis(self) -> Dict:
+        """Write redirect-analysis.json for RedirectFixer from the chains resolved during the audit"""
+        results = []
+        redirected = self.audit_log.records('redirected') if self.audit_log is not None else self.results['redirected']
+        for item in redirected:
+            original_url = item['tool']['source_url']
+            # Cached results only carry the final target, not the whole chain
+            if 'final_url' in item:
+                final_url = item['final_url']
+            else:
+                final_url = item.get('location') or original_url
+            analysis = item.get('analysis') or analyze_redirect(original_url, final_url)
+
+            results.append({
+                'tool': {
+                    'name': item['tool']['name'],
+                    'id': item['tool']['id'],
+                    'original_url': original_url,
+                    'status_code': item.get('code', 'Unknown')
+                },
+                'final_url': final_url,
+                'analysis': analysis,
+                'chain_length': item.get('chain_length', 0),
+                'needs_update': item.get('needs_update', 'MAJOR' in analysis or 'PATH CHANGE' in analysis)
+            })
+
+        analysis_report = build_redirect_report(results)
+
+        report_path = Path(__file__).parent / 'redirect-analysis.json'
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(analysis_report, f, indent=2, ensure_ascii=False)
+
+        print(f"Redirect analysis saved to: {report_path} "
+              f"({len(analysis_report['update_recommendations'])} URLs need updating)")
+
+        return analysis_report
+
+    def _generate_recommendations(self, counts: Dict[str, int]) -> List[str]:
         """Generate actionable recommendations based on audit results"""
         recommendations = []
 
-        if self.results['duplicate']:
-            recommendations.append(f"Remove {len(self.results['duplicate'])} duplicate tools")
+        if counts['duplicate']:
+            recommendations.append(f"Remove {counts['duplicate']} duplicate tools")
 
-        if self.results['notFound']:
-            recommendations.append(f"Fix or remove {len(self.results['notFound'])} tools with 404 errors")
+        if counts['notFound']:
+            recommendations.append(f"Fix or remove {counts['notFound']} tools with 404 errors")
 
-        if self.results['redirected']:
-            recommendations.append(f"Update URLs for {len(self.results['redirected'])} redirected tools")
+        if counts['redirected']:
+            recommendations.append(f"Update URLs for {counts['redirected']} redirected tools")
 
-        if self.results['outdated']:
-            recommendations.append(f"Review and update {len(self.results['outdated'])} potentially outdated tools")
+        if counts['outdated']:
+            recommendations.append(f"Review and update {counts['outdated']} potentially outdated tools")
 
         if self.category_gaps:
             recommendations.append(f"Add more tools to {len(self.category_gaps)} underrepresented categories")
 
+        if self.catalog.issues:
+            invalid_rows = len({issue.index for issue in self.catalog.issues})
+            recommendations.append(f"Fix {invalid_rows} malformed catalog rows (see validation_issues)")
+
         return recommendations
 
-    def run_audit(self, skip_url_check: bool = False):
+    def run_audit(self, skip_url_check: bool = False, engine: str = 'threads', **engine_options):
         """Run full audit"""
         print("🔍 Starting AI Tools Audit...\n")
         print(f"Total tools to audit: {len(self.tools)}")
@@ -283,11 +464,22 @@ class ToolAuditor:
             for dup in self.results['duplicate'][:3]:  # Show first 3
                 print(
                     f"  - {dup['tool1']['name']} (ID: {dup['tool1']['id']}) vs {dup['tool2']['name']} (ID: {dup['tool2']['id']})")
-                print(f"    Reason: {dup['reason']}")
+                print(f"    Reason: {dup['reason']} (similarity {dup['similarity']:.2f})")
 
         # Check URLs (optional)
         if not skip_url_check:
-            self.check_urls_parallel()
+            if self.history is not None:
+                self._run_id = self.history.start_run(len(self.tools))
+                # Results kept from an interrupted streaming run belong to this run too
+                if self._logged_ids:
+                    for record in self.audit_log.records():
+                        self.history.record(self._run_id, record['tool'], record)
+            if engine == 'async':
+                self.check_urls_async(**engine_options)
+            else:
+                self.check_urls_parallel()
+            if self._run_id is not None:
+                self.history.finish_run(self._run_id)
         else:
             print("\n⏭️  Skipping URL health check (use --check-urls to enable)")
 
@@ -322,6 +514,16 @@ class ToolAuditor:
         for key, value in report['summary'].items():
             print(f"  {key.replace('_', ' ').title()}: {value}")
 
+        if report['latency']['run']:
+            print_latency_summary(report['latency']['run'])
+            for host in report['latency']['slowest_hosts'][:5]:
+                print(f"  🐢 {host['host']}: p95 {host['total']['p95']}ms over {host['total']['count']} requests")
+
+        resilience = report['resilience']
+        if resilience.get('calls'):
+            print(f"\n🛡️  {resilience.get('retries', 0)} retries, {resilience.get('hedges', 0)} hedged requests "
+                  f"({resilience.get('hedge_wins', 0)} won), {resilience['circuits_opened']} circuits opened")
+
         if report['recommendations']:
             print("\n💡 Recommendations:")
             for rec in report['recommendations']:
@@ -338,13 +540,79 @@ if __name__ == "__main__":
                         help='Check URL health (takes longer)')
     parser.add_argument('--path', type=str,
                         help='Path to toolData.js file')
+    parser.add_argument('--pool-size', type=int, default=20,
+                        help='Keep-alive connections kept per host by the shared HTTP pool')
+    parser.add_argument('--max-age', type=float,
+                        help='Incremental mode: skip URLs checked within this many hours, '
+                             'use conditional requests for the rest')
+    parser.add_argument('--cache', type=str, default=str(Path(__file__).parent / 'url-check-cache.sqlite'),
+                        help='Path to the URL check cache database')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or update the URL check cache')
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads',
+                        help='URL checking engine (async keeps hundreds of requests in flight)')
+    parser.add_argument('--max-in-flight', type=int, default=200,
+                        help='Async engine: maximum concurrent requests')
+    parser.add_argument('--per-host', type=int, default=4,
+                        help='Async engine: maximum concurrent requests per host')
+    parser.add_argument('--rate', type=float, default=50.0,
+                        help='Async engine: global request rate limit (requests/second)')
+    parser.add_argument('--report-format', choices=['json', 'compact', 'both'], default='json',
+                        help='audit-report.json, the columnar audit-report.npz, or both')
+    parser.add_argument('--retries', type=int, default=2,
+                        help='Retries for timeouts, dropped connections and 429/5xx')
+    parser.add_argument('--no-hedge', action='store_true',
+                        help='Never send duplicate requests to slow hosts')
+    parser.add_argument('--history', type=str, default=str(DEFAULT_HISTORY_PATH),
+                        help='Database recording every URL check per run (query it with audit_history.py)')
+    parser.add_argument('--no-history', action='store_true',
+                        help='Do not record this run in the audit history')
+    parser.add_argument('--stream', type=str, nargs='?', const=str(DEFAULT_LOG_PATH),
+                        help='Append each URL check to a JSON Lines log as it finishes '
+                             '(default path: audits/audit-results.jsonl)')
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, default='batch',
+                        help='Streaming: when to fsync the log (every line, in batches, or never)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Streaming: keep the existing log and skip tools already in it')
 
     args = parser.parse_args()
 
+    engine_options = {}
+    if args.engine == 'async':
+        engine_options = {
+            'max_in_flight': args.max_in_flight,
+            'per_host': args.per_host,
+            'rate': args.rate
+        }
+
+    audit_log = None
+    if args.stream or args.resume:
+        audit_log = AuditLog(args.stream or DEFAULT_LOG_PATH, fsync=args.fsync, resume=args.resume)
+
+    history = None if args.no_history else AuditHistory(args.history)
+
+    resilience = Resilience(
+        max_retries=args.retries,
+        hedge=not args.no_hedge,
+        history_samples=history.latency_samples() if history is not None else ()
+    )
+
     try:
-        auditor = ToolAuditor(tool_data_path=args.path)
-        auditor.run_audit(skip_url_check=not args.check_urls)
+        auditor = ToolAuditor(
+            tool_data_path=args.path,
+            pool_size=args.pool_size,
+            cache_path=None if args.no_cache else args.cache,
+            max_age=args.max_age * 3600 if args.max_age is not None else None,
+            audit_log=audit_log,
+            report_format=args.report_format,
+            history=history,
+            resilience=resilience
+        )
+        auditor.run_audit(skip_url_check=not args.check_urls, engine=args.engine, **engine_options)
     except FileNotFoundError as e:
         print(f"❌ Error: {e}")
         print("\nPlease specify the correct path to toolData.js using --path")
-        print("Example: python tool_audit.py --path frontend/src/app/utils/toolData.js")
\ No newline at end of file
+        print("Example: python tool_audit.py --path frontend/src/app/utils/toolData.js")
+    finally:
+        # Shut down the hedging thread pool (the async engine hedges with tasks)
+        resilience.close()
\ No newline at end of file
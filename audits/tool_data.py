@@ -0,0 +1,159 @@
+# tool_data.py
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+CACHE_DIR = Path(__file__).parent / '.cache'
+CACHE_VERSION = 1
+
+# Anchor used by toolData.js; plain JSON files just start with '['
+EXPORT_ANCHOR = 'TOOL_DATA ='
+
+_decoder = json.JSONDecoder()
+
+
+def _array_bounds(content: str) -> Tuple[int, int]:
+    """Return (start, end) of the tool array inside a toolData.js / tools.json file"""
+    anchor = content.find(EXPORT_ANCHOR)
+    start = content.find('[', anchor + len(EXPORT_ANCHOR) if anchor != -1 else 0)
+    end = content.rfind(']') + 1
+
+    if start == -1 or end <= start:
+        raise ValueError("No tool array found")
+
+    return start, end
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_path(path: Path) -> Path:
+    key = hashlib.sha1(str(path.resolve()).encode('utf-8')).hexdigest()[:12]
+    return CACHE_DIR / f"{path.name}.{key}.pickle"
+
+
+def _read_cache(path: Path, stat: os.stat_result):
+    """Return the cached (tools, prefix, suffix) if the sidecar still matches the file"""
+    cache_path = _cache_path(path)
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+    if cached.get('version') != CACHE_VERSION:
+        return None
+
+    if (cached['mtime_ns'], cached['size']) == (stat.st_mtime_ns, stat.st_size):
+        return cached['data']
+
+    # Touched but maybe not changed (checkout, copy): fall back to the content hash
+    if cached['size'] == stat.st_size and cached['sha1'] == _file_hash(path):
+        _write_cache(path, stat, cached['sha1'], cached['data'])
+        return cached['data']
+
+    return None
+
+
+def _write_cache(path: Path, stat: os.stat_result, sha1: str, data):
+    cache_path = _cache_path(path)
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        tmp_path = cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'version': CACHE_VERSION,
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'sha1': sha1,
+                'data': data
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # The cache is only an optimization
+        print(f"⚠️  Could not write tool data cache: {e}")
+
+
+def parse_tool_data(path, use_cache: bool = True) -> Tuple[List[Dict], str, str]:
+    """Parse toolData.js (or tools.json) into (tools, prefix, suffix).
+
+    prefix/suffix are the text around the array, so writers can put the file
+    back together. Parsed results are cached in a pickle sidecar keyed by the
+    file's mtime and SHA-1.
+    """
+    path = Path(path)
+    stat = path.stat()
+
+    if use_cache:
+        cached = _read_cache(path, stat)
+        if cached is not None:
+            return cached
+
+    raw = path.read_bytes()
+    content = raw.decode('utf-8')
+
+    start, end = _array_bounds(content)
+    tools = json.loads(content[start:end])
+    data = (tools, content[:start], content[end:])
+
+    if use_cache:
+        _write_cache(path, stat, hashlib.sha1(raw).hexdigest(), data)
+
+    return data
+
+
+def load_tool_data(path, use_cache: bool = True) -> List[Dict]:
+    """Load the list of tools from toolData.js (or tools.json)"""
+    return parse_tool_data(path, use_cache=use_cache)[0]
+
+
+def iter_tools(path, chunk_size: int = 1 << 16) -> Iterator[Dict]:
+    """Stream tool records one at a time without building the full list.
+
+    Reads the file in chunks and decodes one record at a time, so it skips the
+    pickle sidecar; use load_tool_data when the whole list is needed.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = -1
+
+        # Find the opening bracket of the array
+        while pos == -1:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError("No tool array found")
+            buffer += chunk
+            anchor = buffer.find(EXPORT_ANCHOR)
+            pos = buffer.find('[', anchor + len(EXPORT_ANCHOR) if anchor != -1 else 0)
+
+        buffer = buffer[pos + 1:]
+        pos = 0
+
+        while True:
+            # Skip separators between records
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+
+            try:
+                tool, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+
+            yield tool
+            pos = end
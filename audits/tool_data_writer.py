@@ -0,0 +1,206 @@
+# tool_data_writer.py
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+JOURNAL_DIR = Path(__file__).parent / '.journal'
+MAX_JOURNAL_ENTRIES = 50
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _journal_dir(path: Path) -> Path:
+    key = hashlib.sha1(str(path.resolve()).encode('utf-8')).hexdigest()[:12]
+    return JOURNAL_DIR / f"{path.name}.{key}"
+
+
+def _journal_entries(path: Path) -> List[Path]:
+    """Journal entry files for a data file, oldest first"""
+    journal = _journal_dir(path)
+    if not journal.exists():
+        return []
+    return sorted(journal.glob('*.json.gz'))
+
+
+def _read_entry(entry_path: Path) -> Dict:
+    with gzip.open(entry_path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compute_patch(old_text: str, new_text: str) -> List[List]:
+    """Line-level patch that turns new_text back into old_text.
+
+    Each op is [start, end, old_lines]: replace new_lines[start:end] with old_lines.
+    Only changed hunks are stored, so a one-URL fix costs a few hundred bytes.
+    """
+    old_lines = old_text.splitlines(keepends=True)
+    new_lines = new_text.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+
+    return [
+        [j1, j2, old_lines[i1:i2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def apply_patch(new_text: str, patch: List[List]) -> str:
+    """Undo a patch produced by compute_patch"""
+    lines = new_text.splitlines(keepends=True)
+    # Apply from the end so earlier offsets stay valid
+    for start, end, old_lines in reversed(patch):
+        lines[start:end] = old_lines
+    return ''.join(lines)
+
+
+def atomic_write(path: Path, content):
+    """Write text or bytes through a temp file in the same directory and rename it into place"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        if isinstance(content, bytes):
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+        with f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _append_journal(path: Path, old_text: str, new_text: str, label: str) -> Path:
+    """Store a compressed reverse delta and drop the oldest entries past the limit"""
+    journal = _journal_dir(path)
+    journal.mkdir(parents=True, exist_ok=True)
+
+    entries = _journal_entries(path)
+    sequence = int(entries[-1].name.split('.')[0]) + 1 if entries else 1
+    entry_path = journal / f"{sequence:06d}.json.gz"
+
+    with gzip.open(entry_path, 'wt', encoding='utf-8') as f:
+        json.dump({
+            'timestamp': datetime.now().isoformat(),
+            'label': label,
+            'before_sha1': _sha1(old_text),
+            'after_sha1': _sha1(new_text),
+            'patch': compute_patch(old_text, new_text)
+        }, f)
+
+    for stale in (entries + [entry_path])[:-MAX_JOURNAL_ENTRIES]:
+        stale.unlink()
+
+    return entry_path
+
+
+def write_tool_data(path, tools: List[Dict], prefix: str, suffix: str, label: str = '') -> bool:
+    """Save tools back to toolData.js atomically, journaling a reverse delta.
+
+    Returns False (and writes nothing) when the serialized catalog is unchanged.
+    """
+    path = Path(path)
+    new_text = prefix + json.dumps(tools, indent=2) + suffix
+    old_text = path.read_bytes().decode('utf-8') if path.exists() else ''
+
+    if new_text == old_text:
+        print(f"ℹ️  No changes to write to {path.name}")
+        return False
+
+    entry_path = _append_journal(path, old_text, new_text, label)
+    atomic_write(path, new_text)
+
+    print(f"📝 Journaled {path.name} change as {entry_path.name} "
+          f"(undo with: python tool_data_writer.py --path {path} --rollback 1)")
+    return True
+
+
+def list_journal(path):
+    """Print the journal for a data file, newest first"""
+    path = Path(path)
+    entries = _journal_entries(path)
+
+    if not entries:
+        print(f"No journal entries for {path}")
+        return
+
+    for steps, entry_path in enumerate(reversed(entries), 1):
+        entry = _read_entry(entry_path)
+        hunks = len(entry['patch'])
+        print(f"  [{steps}] {entry['timestamp']}  {entry['label'] or '-'}  "
+              f"({hunks} hunks, {entry_path.stat().st_size} bytes)")
+
+
+def rollback(path, steps: int = 1, force: bool = False) -> bool:
+    """Restore the version of a data file from `steps` journaled writes ago.
+
+    The catalog artifacts (tools.json copies, indexes, /api/tools shards) are
+    recompiled from the restored file so they do not drift from it.
+    """
+    path = Path(path)
+    entries = _journal_entries(path)
+
+    if steps < 1 or steps > len(entries):
+        print(f"❌ Can only roll back 1-{len(entries)} steps for {path.name}")
+        return False
+
+    text = path.read_bytes().decode('utf-8')
+    undone = list(reversed(entries))[:steps]
+
+    for entry_path in undone:
+        entry = _read_entry(entry_path)
+        if _sha1(text) != entry['after_sha1'] and not force:
+            print(f"❌ {path.name} does not match journal entry {entry_path.name}; "
+                  f"it was edited outside the journal (use --force to apply anyway)")
+            return False
+
+        text = apply_patch(text, entry['patch'])
+        if _sha1(text) != entry['before_sha1']:
+            print(f"⚠️  Restored text for {entry_path.name} does not match its recorded hash")
+
+    atomic_write(path, text)
+    for entry_path in undone:
+        entry_path.unlink()
+
+    print(f"✅ Rolled {path.name} back {steps} step(s)")
+
+    # build_catalog imports this module, so import it only when needed
+    from build_catalog import compile_catalog
+    compile_catalog(tool_data_path=path)
+    return True
+
+
+def default_tool_data_path() -> Path:
+    return Path(__file__).parent.parent / 'frontend' / 'src' / 'app' / 'utils' / 'toolData.js'
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or roll back journaled toolData.js writes')
+    parser.add_argument('--path', type=str, default=str(default_tool_data_path()),
+                        help='Path to toolData.js file')
+    parser.add_argument('--rollback', type=int, metavar='N',
+                        help='Restore the version from N journaled writes ago')
+    parser.add_argument('--force', action='store_true',
+                        help='Roll back even if the file was edited outside the journal')
+
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback(args.path, args.rollback, force=args.force)
+    else:
+        list_journal(args.path)
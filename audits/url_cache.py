@@ -0,0 +1,122 @@
+# url_cache.py
+import sqlite3
+import threading
+import time
+from typing import Dict, Mapping, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings share one cache entry"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((scheme, host, path, parts.query, ''))
+
+
+class URLCheckCache:
+    """On-disk record of the last health check per normalized URL"""
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS url_checks (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                code INTEGER,
+                location TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                checked_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the last check for a URL, or None if it was never checked"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, code, location, etag, last_modified, checked_at "
+                "FROM url_checks WHERE url = ?",
+                (normalize_url(url),)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        status, code, location, etag, last_modified, checked_at = row
+        return {
+            'status': status,
+            'code': code,
+            'location': location,
+            'etag': etag,
+            'last_modified': last_modified,
+            'checked_at': checked_at
+        }
+
+    def put(self, url: str, result: Dict, headers: Mapping = None):
+        """Record a check result along with the validators the server sent"""
+        headers = headers or {}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO url_checks "
+                "(url, status, code, location, etag, last_modified, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_url(url),
+                    result['status'],
+                    result.get('code'),
+                    # For redirects, remember where the whole chain ends up
+                    result.get('final_url') or result.get('location'),
+                    headers.get('ETag'),
+                    headers.get('Last-Modified'),
+                    time.time()
+                )
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def is_fresh(entry: Optional[Dict], max_age: float) -> bool:
+        """True if the entry was checked less than max_age seconds ago.
+
+        Errors are never fresh: they are usually transient and should be retried.
+        """
+        if entry is None or entry['status'] == 'error':
+            return False
+        return time.time() - entry['checked_at'] < max_age
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict:
+        """Build If-None-Match / If-Modified-Since headers from a cached entry"""
+        headers = {}
+        if entry is None or entry['status'] == 'error':
+            return headers
+
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @staticmethod
+    def to_result(entry: Dict) -> Dict:
+        """Turn a cached entry back into a check result"""
+        result = {'status': entry['status'], 'cached': True}
+        if entry['code'] is not None:
+            result['code'] = entry['code']
+        if entry['location']:
+            result['location'] = entry['location']
+        return result
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -3,11 +3,28 @@ import json
 import requests
 from pathlib import Path
 
+from compact_report import CompactReport
 
-def quick_verify():
+
+def load_updates(report_path):
+    """URL updates to verify: from a fix report, or the redirect targets in a compact audit report"""
+    if report_path.endswith('.npz'):
+        return {
+            'url_updates': [
+                {'name': item['tool']['name'], 'new_url': item['final_url']}
+                for item in CompactReport(report_path).results('redirected')
+                if item.get('needs_update') and item.get('final_url')
+            ],
+            'rebrands': []
+        }
+
+    with open(report_path, 'r') as f:
+        return json.load(f)
+
+
+def quick_verify(report_path='redirect-fix-report.json'):
     # Load the fix report
-    with open('redirect-fix-report.json', 'r') as f:
-        report = json.load(f)
+    report = load_updates(report_path)
 
     print("🔍 Verifying updated URLs...")
     print("=" * 60)
@@ -26,4 +43,11 @@ def quick_verify():
 
 
 if __name__ == "__main__":
-    quick_verify()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check that updated URLs resolve')
+    parser.add_argument('--report', type=str, default='redirect-fix-report.json',
+                        help='redirect-fix-report.json, or an audit-report.npz to check its redirect targets')
+
+    args = parser.parse_args()
+    quick_verify(args.report)
\ No newline at end of file
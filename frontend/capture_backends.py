@@ -0,0 +1,281 @@
+import abc
+import json
+import os
+import queue
+import threading
+import time
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+from capture_scheduler import CaptureError, RateLimitError, parse_retry_after
+
+VIEWPORT = (1280, 800)
+
+# Request patterns the headless browser never loads (ads, trackers, consent platforms)
+BLOCKED_URL_PATTERNS = [
+    "*doubleclick.net*", "*googlesyndication.com*", "*googleadservices.com*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*adservice.google.*",
+    "*amazon-adsystem.com*", "*adnxs.com*", "*taboola.com*", "*outbrain.com*",
+    "*criteo.com*", "*facebook.net*", "*hotjar.com*", "*intercom.io*", "*intercomcdn.com*",
+    "*drift.com*", "*cookielaw.org*", "*onetrust.com*", "*cookiebot.com*",
+    "*consensu.org*", "*trustarc.com*", "*usercentrics.eu*", "*termly.io*",
+]
+
+# Injected into every page as it loads, so consent banners are hidden in the capture
+COOKIE_BANNER_CSS = """
+#onetrust-consent-sdk, #onetrust-banner-sdk, #CybotCookiebotDialog, #usercentrics-root,
+#qc-cmp2-container, .fc-consent-root, #truste-consent-track, .cky-consent-container,
+#cookie-law-info-bar, #cookiescript_injected, .cc-window, .cookie-banner, .cookie-consent,
+#cookie-banner, #cookie-consent, [aria-label="cookieconsent"], [id^="sp_message_container"]
+{ display: none !important; visibility: hidden !important; }
+html, body { overflow: auto !important; }
+"""
+
+
+class CaptureBackend(abc.ABC):
+    """
+    Turns a URL into a PIL image.
+
+    capture(url) returns the image, returns None for a permanent failure, or
+    raises RateLimitError / CaptureError for failures worth retrying.
+    """
+
+    name = None
+    # Minimum spacing between capture starts that CaptureScheduler should use
+    min_interval = 0.5
+
+    @abc.abstractmethod
+    def capture(self, url):
+        """Render url and return a PIL image (see the class docstring for failures)"""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ScreenshotOneBackend(CaptureBackend):
+    """Captures through the ScreenshotOne HTTP API"""
+
+    name = 'screenshotone'
+    API_URL = "https://api.screenshotone.com/take"
+
+    def __init__(self, api_key=None, viewport=VIEWPORT, timeout=60,
+                 block_ads=True, block_cookie_banners=True):
+        self.api_key = api_key or os.getenv("SCREENSHOTONE_API_KEY")
+        self.viewport = viewport
+        self.timeout = timeout
+        self.block_ads = block_ads
+        self.block_cookie_banners = block_cookie_banners
+
+    def capture(self, url):
+        if not self.api_key:
+            print("ERROR: SCREENSHOTONE_API_KEY not found in .env.local")
+            return None
+
+        params = {
+            'access_key': self.api_key,
+            'url': url,
+            'viewport_width': self.viewport[0],
+            'viewport_height': self.viewport[1],
+            'format': 'png',
+            'block_ads': str(self.block_ads).lower(),
+            'block_cookie_banners': str(self.block_cookie_banners).lower()
+        }
+
+        print(f"Requesting screenshot from: {url}")
+        try:
+            response = requests.get(self.API_URL, params=params, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise CaptureError(str(e))
+
+        print(f"Response status: {response.status_code}")
+
+        if response.status_code == 200:
+            print(f"Successfully got image, size: {len(response.content)} bytes")
+            return Image.open(BytesIO(response.content))
+
+        print(f"Error taking screenshot: HTTP {response.status_code}")
+        if response.status_code == 429:
+            raise RateLimitError(parse_retry_after(response.headers.get('Retry-After')))
+        print(f"Response content: {response.text[:200]}...")  # Show first 200 chars of error
+        if response.status_code >= 500:
+            raise CaptureError(f"HTTP {response.status_code}")
+        return None
+
+
+class HeadlessBrowserBackend(CaptureBackend):
+    """
+    Captures with a warm pool of local headless Chrome instances.
+
+    Each capture borrows one browser from the pool, so up to `browsers`
+    pages render at once (run CaptureScheduler with as many workers).
+    Browsers are started on first use and reused until close().
+
+    Concurrency comes from several single-tab browsers rather than many tabs
+    in one browser: a Selenium session runs one command at a time against
+    its current window, so tabs of one driver cannot be driven from parallel
+    workers. A browser costs more memory than a tab, so keep `browsers` at
+    the number of pages that should render at once.
+    """
+
+    name = 'headless'
+    min_interval = 0.0
+
+    def __init__(self, browsers=4, viewport=VIEWPORT, page_budget=20.0, settle=1.5,
+                 block_ads=True, block_cookie_banners=True, undetected=False):
+        self.browsers = browsers
+        self.viewport = viewport
+        self.page_budget = page_budget
+        self.settle = settle
+        self.block_ads = block_ads
+        self.block_cookie_banners = block_cookie_banners
+        self.undetected = undetected
+
+        self._idle = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self._all = []
+
+    def _start_browser(self):
+        width, height = self.viewport
+        if self.undetected:
+            import undetected_chromedriver as uc
+            options = uc.ChromeOptions()
+        else:
+            from selenium import webdriver
+            options = webdriver.ChromeOptions()
+
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={width},{height}")
+        options.add_argument("--hide-scrollbars")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-notifications")
+        options.page_load_strategy = 'eager'
+
+        if self.undetected:
+            driver = uc.Chrome(options=options)
+        else:
+            driver = webdriver.Chrome(options=options)
+
+        driver.set_page_load_timeout(self.page_budget)
+        # Exact viewport regardless of browser chrome
+        driver.execute_cdp_cmd('Emulation.setDeviceMetricsOverride', {
+            'width': width, 'height': height, 'deviceScaleFactor': 1, 'mobile': False
+        })
+        if self.block_ads:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+        if self.block_cookie_banners:
+            script = (
+                "document.addEventListener('DOMContentLoaded', () => {"
+                " const style = document.createElement('style');"
+                f" style.textContent = {json.dumps(COOKIE_BANNER_CSS)};"
+                " document.documentElement.appendChild(style); });"
+            )
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': script})
+
+        with self._lock:
+            self._all.append(driver)
+        return driver
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_start = self._started < self.browsers
+            if can_start:
+                self._started += 1
+        if can_start:
+            try:
+                return self._start_browser()
+            except Exception:
+                with self._lock:
+                    self._started -= 1
+                raise
+
+        return self._idle.get()
+
+    def _discard(self, driver):
+        """Drop a browser that misbehaved; the pool starts a fresh one on demand"""
+        with self._lock:
+            self._started -= 1
+            if driver in self._all:
+                self._all.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def capture(self, url):
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        driver = self._acquire()
+        started = time.monotonic()
+        try:
+            print(f"Rendering {url} in headless browser")
+            try:
+                driver.get(url)
+            except TimeoutException:
+                # Over budget: stop loading and capture whatever has rendered
+                print(f"⏱️  {url} exceeded the {self.page_budget:.0f}s page budget, capturing as-is")
+                driver.execute_script("window.stop();")
+
+            # Let late layout and web fonts settle, without exceeding the budget
+            remaining = self.page_budget - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(min(self.settle, remaining))
+
+            png = driver.get_screenshot_as_png()
+            # Unload the page so it stops running scripts while the browser idles
+            driver.get("about:blank")
+        except WebDriverException as e:
+            self._discard(driver)
+            raise CaptureError(f"Browser error: {e.msg or e}")
+
+        self._idle.put(driver)
+        return Image.open(BytesIO(png))
+
+    def close(self):
+        with self._lock:
+            drivers, self._all = self._all, []
+            self._started = 0
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+BACKENDS = (ScreenshotOneBackend.name, HeadlessBrowserBackend.name)
+
+
+def get_backend(name=None, workers=4, page_budget=20.0):
+    """
+    Build a capture backend by name.
+
+    Args:
+        name (str): 'screenshotone' or 'headless', defaults to $CAPTURE_BACKEND or 'screenshotone'
+        workers (int): Concurrent captures; the headless pool starts one browser per worker
+        page_budget (float): Seconds a headless browser may spend on one page
+
+    Returns:
+        CaptureBackend: The backend (close it, or use it as a context manager)
+    """
+    name = name or os.getenv("CAPTURE_BACKEND", ScreenshotOneBackend.name)
+    if name == HeadlessBrowserBackend.name:
+        return HeadlessBrowserBackend(browsers=workers, page_budget=page_budget)
+    if name == ScreenshotOneBackend.name:
+        return ScreenshotOneBackend()
+    raise ValueError(f"Unknown capture backend '{name}' (choose from {', '.join(BACKENDS)})")
@@ -0,0 +1,240 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+QUEUE_PATH = os.path.join(current_dir, ".capture-queue.sqlite")
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+# Seconds of waiting that promote a job by one priority level, so low-priority tools are not starved
+AGE_STEP = 3600.0
+
+
+def default_owner():
+    """Lease owner id for this process"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class CaptureQueue:
+    """
+    Persistent capture job queue in SQLite.
+
+    Jobs move pending -> in_flight -> done, or back to pending with a delay
+    when a retryable error occurs, and to failed after max_attempts. A worker
+    leases jobs for lease_seconds; a lease that is not renewed (the worker
+    died) expires and the job becomes available again, so several processes
+    can drain one queue and an interrupted run resumes where it stopped.
+    Done jobs stay unsynced until mark_synced() confirms their result
+    reached the sheet, so a run killed before its sheet write can replay it.
+    """
+
+    def __init__(self, db_path=QUEUE_PATH, lease_seconds=300.0, max_attempts=4):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # isolation_level=None: transactions are managed explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS capture_jobs (
+                key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                url TEXT NOT NULL,
+                row_index INTEGER,
+                priority INTEGER NOT NULL DEFAULT 3,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL,
+                not_before REAL NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                synced INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Queues created before results were tracked into the sheet
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(capture_jobs)")}
+        if 'synced' not in columns:
+            self._conn.execute("ALTER TABLE capture_jobs ADD COLUMN synced INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE capture_jobs SET synced = 1")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS capture_jobs_state ON capture_jobs (state, not_before)")
+
+    def enqueue(self, jobs):
+        """
+        Add jobs (dicts with key, name, url, row_index, priority).
+
+        Jobs already in the queue keep their state and attempts; their URL,
+        row and priority are refreshed unless they are done.
+
+        Returns:
+            int: Number of jobs that were new to the queue
+        """
+        now = time.time()
+        with self._lock:
+            before = self._conn.execute("SELECT COUNT(*) FROM capture_jobs").fetchone()[0]
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT INTO capture_jobs (key, name, url, row_index, priority, enqueued_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET url = excluded.url, row_index = excluded.row_index, "
+                "priority = excluded.priority, updated_at = excluded.updated_at "
+                "WHERE capture_jobs.state != 'done'",
+                [(job['key'], job['name'], job['url'], job.get('row_index'), job.get('priority', 3), now, now)
+                 for job in jobs]
+            )
+            self._conn.execute("COMMIT")
+            after = self._conn.execute("SELECT COUNT(*) FROM capture_jobs").fetchone()[0]
+        return after - before
+
+    def lease(self, owner, limit=1):
+        """
+        Claim up to `limit` runnable jobs, best (priority, age) first.
+
+        Pending jobs whose retry delay has passed and in-flight jobs whose
+        lease expired are both runnable.
+
+        Returns:
+            list: Job dicts with key, name, url, row_index, priority and attempts
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT key, name, url, row_index, priority, attempts FROM capture_jobs "
+                    "WHERE (state = 'pending' AND not_before <= ?) "
+                    "OR (state = 'in_flight' AND lease_expires < ?) "
+                    "ORDER BY priority - (? - enqueued_at) / ?, enqueued_at "
+                    "LIMIT ?",
+                    (now, now, now, AGE_STEP, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE capture_jobs SET state = 'in_flight', attempts = attempts + 1, "
+                    "lease_owner = ?, lease_expires = ?, updated_at = ? WHERE key = ?",
+                    [(owner, now + self.lease_seconds, now, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return [
+            {'key': key, 'name': name, 'url': url, 'row_index': row_index,
+             'priority': priority, 'attempts': attempts + 1}
+            for key, name, url, row_index, priority, attempts in rows
+        ]
+
+    def renew(self, owner, keys):
+        """Extend the leases this owner holds on still-running jobs"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE capture_jobs SET lease_expires = ? "
+                "WHERE key = ? AND state = 'in_flight' AND lease_owner = ?",
+                [(now + self.lease_seconds, key, owner) for key in keys]
+            )
+
+    def _finish(self, key, state, result=None, error=None, not_before=0.0):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE capture_jobs SET state = ?, result = ?, error = ?, not_before = ?, "
+                "lease_owner = NULL, lease_expires = NULL, updated_at = ? WHERE key = ?",
+                (state, result, error, not_before, time.time(), key)
+            )
+
+    def complete(self, key, result):
+        self._finish(key, DONE, result=result)
+
+    def fail(self, key, error):
+        self._finish(key, FAILED, error=error)
+
+    def retry(self, key, error, delay):
+        """
+        Put a job back after a retryable error, or fail it once attempts are used up.
+
+        Returns:
+            bool: True if the job will be retried
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM capture_jobs WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] >= self.max_attempts:
+            self.fail(key, error)
+            return False
+        self._finish(key, PENDING, error=error, not_before=time.time() + delay)
+        return True
+
+    def next_ready_in(self):
+        """
+        Seconds until the next pending job becomes runnable.
+
+        Returns:
+            float or None: 0 if one is runnable now, None if nothing is pending
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(not_before) FROM capture_jobs WHERE state = 'pending' "
+                "OR (state = 'in_flight' AND lease_expires < ?)",
+                (time.time(),)
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def unsynced(self):
+        """
+        Done jobs whose result has not been confirmed in the sheet yet.
+
+        Returns:
+            list: Job dicts with key, name, row_index and result
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, name, row_index, result FROM capture_jobs WHERE state = 'done' AND synced = 0"
+            ).fetchall()
+        return [{'key': key, 'name': name, 'row_index': row_index, 'result': result}
+                for key, name, row_index, result in rows]
+
+    def mark_synced(self, keys):
+        """Record that these jobs' results were written to the sheet"""
+        with self._lock:
+            self._conn.executemany("UPDATE capture_jobs SET synced = 1 WHERE key = ?", [(key,) for key in keys])
+
+    def requeue_failed(self):
+        """Give failed jobs a fresh set of attempts"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE capture_jobs SET state = 'pending', attempts = 0, not_before = 0, updated_at = ? "
+                "WHERE state = 'failed'",
+                (time.time(),)
+            )
+        return cursor.rowcount
+
+    def counts(self):
+        """Number of jobs per state"""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM capture_jobs GROUP BY state").fetchall()
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def clear(self):
+        """
+        Forget every job (the next run starts from a fresh sheet read).
+
+        Done jobs whose result has not reached the sheet are kept for unsynced().
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM capture_jobs WHERE NOT (state = 'done' AND synced = 0)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,286 @@
+import concurrent.futures
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class RateLimitError(Exception):
+    """The screenshot API answered 429; retry_after is in seconds (or None)"""
+
+    def __init__(self, retry_after=None):
+        super().__init__(f"Rate limited (Retry-After: {retry_after})")
+        self.retry_after = retry_after
+
+
+class CaptureError(Exception):
+    """A transient capture failure (network error, 5xx) worth retrying"""
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header, which is either delta-seconds or an HTTP date.
+
+    Returns:
+        float or None: Seconds to wait
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Spaces out request starts across all workers.
+
+    The interval doubles on every 429 (and the limiter pauses for Retry-After),
+    then shrinks by 10% per success back towards min_interval.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=60.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def on_success(self):
+        with self._lock:
+            self.interval = max(self.min_interval, self.interval * 0.9)
+
+    def on_rate_limited(self, retry_after=None):
+        with self._lock:
+            self.interval = min(self.max_interval, self.interval * 2)
+            pause = retry_after if retry_after is not None else self.interval
+            self.next_start = max(self.next_start, time.monotonic() + pause)
+            print(f"⏳ Rate limited - pausing {pause:.1f}s, interval now {self.interval:.1f}s")
+
+
+class CaptureScheduler:
+    """
+    Runs capture jobs on a bounded worker pool with retries and a checkpoint.
+
+    Each job is a dict with a unique 'key'. capture(job) returns a result
+    (None means a permanent failure) or raises RateLimitError / CaptureError
+    to have the job retried with exponential backoff. Completed keys are
+    written to the checkpoint file so an interrupted run resumes where it
+    stopped. run_queue() drains a persistent CaptureQueue instead of a list.
+    """
+
+    def __init__(self, capture, workers=4, max_attempts=4, base_backoff=2.0,
+                 min_interval=0.5, checkpoint_path=None):
+        self.capture = capture
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.limiter = AdaptiveRateLimiter(min_interval=min_interval)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint = self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            print(f"♻️  Resuming from checkpoint: {len(checkpoint['done'])} jobs already done")
+            return checkpoint
+        return {'done': {}, 'failed': {}}
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _run_job(self, job):
+        self.limiter.wait()
+        return self.capture(job)
+
+    def _backoff(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, self.base_backoff * (2 ** (attempt - 1)))
+
+    def run(self, jobs, on_success=None, on_failure=None):
+        """
+        Capture every job not already done in the checkpoint.
+
+        on_success(job, result) and on_failure(job, error) run on the calling
+        thread, so they may use non-thread-safe clients (e.g. Google Sheets).
+
+        Returns:
+            dict: {'done': {key: result}, 'failed': {key: error}}
+        """
+        done = self.checkpoint['done']
+        pending = [job for job in jobs if job['key'] not in done]
+        skipped = len(jobs) - len(pending)
+        if skipped:
+            print(f"⏭️  Skipping {skipped} jobs completed in a previous run")
+
+        counter = itertools.count()
+        # (ready_at, tiebreak, attempt, job)
+        queue = [(0.0, next(counter), 1, job) for job in pending]
+        heapq.heapify(queue)
+        running = {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while queue or running:
+                now = time.monotonic()
+                while queue and queue[0][0] <= now and len(running) < self.workers:
+                    _, _, attempt, job = heapq.heappop(queue)
+                    running[executor.submit(self._run_job, job)] = (job, attempt)
+
+                wait_for = max(0.0, queue[0][0] - now) if queue and len(running) < self.workers else None
+                if not running:
+                    time.sleep(wait_for or 0)
+                    continue
+
+                finished, _ = concurrent.futures.wait(
+                    running, timeout=wait_for, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+
+                for future in finished:
+                    job, attempt = running.pop(future)
+                    retry_delay = None
+                    error = None
+
+                    try:
+                        result = future.result()
+                    except RateLimitError as e:
+                        self.limiter.on_rate_limited(e.retry_after)
+                        retry_delay = e.retry_after if e.retry_after is not None else self._backoff(attempt)
+                        error = str(e)
+                    except CaptureError as e:
+                        retry_delay = self._backoff(attempt)
+                        error = str(e)
+                    except Exception as e:
+                        error = str(e)
+                    else:
+                        if result is not None:
+                            self.limiter.on_success()
+                            done[job['key']] = result
+                            self.checkpoint['failed'].pop(job['key'], None)
+                            self._save_checkpoint()
+                            if on_success:
+                                on_success(job, result)
+                            continue
+                        error = 'Capture failed'
+
+                    if retry_delay is not None and attempt < self.max_attempts:
+                        print(f"🔁 Retrying {job['key']} in {retry_delay:.1f}s "
+                              f"(attempt {attempt + 1}/{self.max_attempts}): {error}")
+                        heapq.heappush(queue, (time.monotonic() + retry_delay, next(counter), attempt + 1, job))
+                        continue
+
+                    self.checkpoint['failed'][job['key']] = error
+                    self._save_checkpoint()
+                    if on_failure:
+                        on_failure(job, error)
+
+        # A clean run leaves nothing to resume
+        if self.checkpoint_path and not self.checkpoint['failed'] and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        return self.checkpoint
+
+    def run_queue(self, queue, owner, on_success=None, on_failure=None, on_idle=None):
+        """
+        Drain a CaptureQueue, leasing jobs as workers free up.
+
+        Retries are scheduled in the queue itself (not_before), so several
+        processes can drain the same queue and a killed run loses at most its
+        in-flight leases. Callbacks run on the calling thread, as in run();
+        on_idle() is called about once a second (e.g. to flush buffered writes
+        while a slow capture is still running).
+
+        Returns:
+            dict: Job counts per state when the queue has nothing left to run
+        """
+        running = {}
+        last_renew = time.monotonic()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                free = self.workers - len(running)
+                if free:
+                    for job in queue.lease(owner, limit=free):
+                        running[executor.submit(self._run_job, job)] = job
+
+                if not running:
+                    ready_in = queue.next_ready_in()
+                    if ready_in is None:
+                        break
+                    time.sleep(min(ready_in, 1.0))
+                    if on_idle:
+                        on_idle()
+                    continue
+
+                # Wake up at least once a second to lease jobs whose retry delay passed
+                finished, _ = concurrent.futures.wait(
+                    running, timeout=1.0, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+
+                for future in finished:
+                    job = running.pop(future)
+                    retry_delay = None
+
+                    try:
+                        result = future.result()
+                    except RateLimitError as e:
+                        self.limiter.on_rate_limited(e.retry_after)
+                        retry_delay = e.retry_after if e.retry_after is not None else self._backoff(job['attempts'])
+                        error = str(e)
+                    except CaptureError as e:
+                        retry_delay = self._backoff(job['attempts'])
+                        error = str(e)
+                    except Exception as e:
+                        error = str(e)
+                    else:
+                        if result is not None:
+                            self.limiter.on_success()
+                            queue.complete(job['key'], result)
+                            if on_success:
+                                on_success(job, result)
+                            continue
+                        error = 'Capture failed'
+
+                    if retry_delay is not None and queue.retry(job['key'], error, retry_delay):
+                        print(f"🔁 Retrying {job['key']} in {retry_delay:.1f}s "
+                              f"(attempt {job['attempts'] + 1}/{queue.max_attempts}): {error}")
+                        continue
+
+                    if retry_delay is None:
+                        queue.fail(job['key'], error)
+                    if on_failure:
+                        on_failure(job, error)
+
+                # Keep our leases alive so other workers do not pick these jobs up
+                if running and time.monotonic() - last_renew >= queue.lease_seconds / 3:
+                    queue.renew(owner, [job['key'] for job in running.values()])
+                    last_renew = time.monotonic()
+
+                if on_idle:
+                    on_idle()
+
+        return queue.counts()
@@ -1,12 +1,13 @@
-import requests
 import os
-import urllib.parse
-import time
-from PIL import Image
-from io import BytesIO
 from dotenv import load_dotenv
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+
+from capture_backends import BACKENDS, get_backend
+from screenshot_quality import check_capture, dequeue_recapture, is_queued_for_recapture, load_recapture_queue
+from screenshot_store import ScreenshotStore
+from sheets_client import SheetSnapshot, SheetsWriteBuffer
+
+from capture_queue import CaptureQueue, default_owner
+from capture_scheduler import CaptureError, CaptureScheduler, RateLimitError
 
 # Load environment variables
 load_dotenv('.env.local')
@@ -19,6 +20,12 @@ SCREENSHOTS_DIR = os.path.join(current_dir, "public", "screenshots")
 
 print(f"Using screenshots directory: {SCREENSHOTS_DIR}")
 
+# Content-addressed screenshot files plus the name -> hash index
+screenshot_store = ScreenshotStore()
+
+# Persistent capture queue, so an interrupted run resumes without re-reading the sheet
+QUEUE_PATH = os.path.join(current_dir, ".capture-queue.sqlite")
+
 # Verify the directory exists
 if not os.path.exists(SCREENSHOTS_DIR):
     print(f"WARNING: Screenshots directory does not exist yet at: {SCREENSHOTS_DIR}")
@@ -32,7 +39,7 @@ CATEGORIES = [
     "Content Creation",
     "Research & Analysis",
     "Task & Workflow",
-    "Voice & Audio"
+    "Voice & Audio",
     "Learning & Skills"
 ]
 
@@ -50,38 +57,6 @@ SECTORS = [
 ]
 
 
-def get_sheets_service():
-    """
-    Create and return a Google Sheets service object using credentials from env variables
-    """
-    # Get credentials from environment variables
-    account_email = os.getenv("GOOGLE_SERVICE_ACCOUNT_EMAIL")
-    private_key = os.getenv("GOOGLE_PRIVATE_KEY").replace("\\n", "\n")  # Replace literal '\n' with newline
-
-    # Create credentials
-    credentials_dict = {
-        "type": "service_account",
-        "project_id": "sports-innovation-lab-ai",
-        "private_key_id": "key-id",
-        "private_key": private_key,
-        "client_email": account_email,
-        "client_id": "client-id",
-        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-        "token_uri": "https://oauth2.googleapis.com/token",
-        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-        "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{urllib.parse.quote(account_email)}"
-    }
-
-    credentials = service_account.Credentials.from_service_account_info(
-        credentials_dict,
-        scopes=['https://www.googleapis.com/auth/spreadsheets']
-    )
-
-    # Build and return the service
-    service = build('sheets', 'v4', credentials=credentials)
-    return service
-
-
 def screenshot_exists(tool_name):
     """
     Check if a screenshot exists for a given tool name.
@@ -92,7 +67,10 @@ def screenshot_exists(tool_name):
     Returns:
         bool: True if screenshot exists and is not empty, False otherwise
     """
-    # Convert tool name to screenshot filename
+    if screenshot_store.has(tool_name):
+        return True
+
+    # Screenshots from before the content-addressed store
     filename = f"{tool_name.replace(' ', '_').lower()}.png"
     file_path = os.path.join(SCREENSHOTS_DIR, filename)
 
@@ -105,22 +83,21 @@ def get_tools_without_screenshots():
     Retrieve tools from Google Sheets that do not have existing screenshots.
 
     Returns:
-        list: Tools without screenshots [(name, url, row_index, priority)]
+        tuple: (tools, stored) - tools without screenshots [(name, url, row_index, priority)],
+        and [(row_index, screenshot_url)] for stored screenshots the sheet does not list yet
     """
-    service = get_sheets_service()
     sheet_id = os.getenv("SHEET_ID")
 
-    # Get all tools from the Sheet1 tab
-    result = service.spreadsheets().values().get(
-        spreadsheetId=sheet_id,
-        range='Sheet1!A2:H'  # Assuming headers are in row 1
-    ).execute()
+    # Get all tools from the Sheet1 tab (headers are in row 1)
+    rows = SheetSnapshot.fetch(sheet_id, cell_range='Sheet1!A2:H').rows
 
-    rows = result.get('values', [])
+    # Screenshots flagged by screenshot_quality.py as blank or error pages
+    recapture = load_recapture_queue()
 
     # Process rows into tools with their URLs
     # Assuming columns are: A:id, B:name, C:source_url, D:description, E:screenshot_url, F:category, G:type, H:sector
     all_tools = []
+    stored = []
     for i, row in enumerate(rows):
         # Skip rows that don't have enough columns
         if len(row) < 3:
@@ -143,7 +120,12 @@ def get_tools_without_screenshots():
         has_screenshot_url = len(row) > 4 and row[4] and row[4].strip() != ""
 
         # Check if file already exists locally
-        has_local_screenshot = screenshot_exists(name)
+        has_local_screenshot = screenshot_exists(name) and not is_queued_for_recapture(name, recapture)
+
+        # Already captured into the store; only the sheet needs the URL, not a new (paid) capture
+        if not has_screenshot_url and has_local_screenshot and screenshot_store.has(name):
+            stored.append((i + 2, screenshot_store.get(name)['src']))
+            continue
 
         # If no screenshot in sheets or locally, add to the list
         if not has_screenshot_url or not has_local_screenshot:
@@ -162,97 +144,94 @@ def get_tools_without_screenshots():
     # Sort by priority (highest first)
     all_tools.sort(key=lambda x: x[3])
 
-    return all_tools
+    return all_tools, stored
 
 
-def save_screenshot(url, name):
+def save_screenshot(url, name, backend):
     """
     Save a screenshot for a given tool.
 
     Args:
         url (str): URL of the tool
         name (str): Name of the tool
+        backend (CaptureBackend): Renders the page (ScreenshotOne API or local headless browsers)
 
     Returns:
-        str or None: Path to saved screenshot, or None if failed
+        tuple: (screenshot_url, changed) - screenshot_url is None if the capture
+        failed, changed is False when the site looks the same as last time
+
+    Raises:
+        RateLimitError: The screenshot API returned 429
+        CaptureError: A transient network, server or browser error
     """
     try:
-        filename = f"{name.replace(' ', '_').lower()}.png"
-        save_path = os.path.join(SCREENSHOTS_DIR, filename)
-
         if not url or url.strip() == "":
             print(f"No URL provided for {name}, skipping...")
-            return None
-
-        api_key = os.getenv("SCREENSHOTONE_API_KEY")
-        if not api_key:
-            print("ERROR: SCREENSHOTONE_API_KEY not found in .env.local")
-            return None
-
-        screenshot_url = f"https://api.screenshotone.com/take?access_key={api_key}&url={url}&viewport_width=1280&viewport_height=800&format=png"
-
-        print(f"Requesting screenshot from: {url}")
-        response = requests.get(screenshot_url)
-
-        print(f"Response status: {response.status_code}")
-
-        if response.status_code == 200:
-            print(f"Successfully got image, size: {len(response.content)} bytes")
-            img = Image.open(BytesIO(response.content))
-            print(f"Image size: {img.size}")
-
-            # Ensure screenshots directory exists
-            if not os.path.exists(SCREENSHOTS_DIR):
-                print(f"Creating screenshots directory: {SCREENSHOTS_DIR}")
-                os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
-
-            img.save(save_path)
-            print(f"Saved image to: {save_path}")
-
-            # Verify the file was saved
-            if os.path.exists(save_path):
-                print(f"✅ Confirmed file exists at: {save_path}")
-                return f"/screenshots/{filename}"
-            else:
-                print(f"❌ Failed to save file to: {save_path}")
-                return None
+            return None, False
+
+        img = backend.capture(url)
+        if img is None:
+            return None, False
+        print(f"Image size: {img.size}")
+
+        # Blank, error and challenge pages also come back as 200; retrying would only pay for the same page again
+        problems = check_capture(img)
+        if problems:
+            print(f"❌ Rejected capture for {name}: {', '.join(problems)}")
+            return None, False
+
+        # Files are named by content hash; an unchanged site writes nothing
+        entry, changed = screenshot_store.save(name, img)
+        save_path = os.path.join(screenshot_store.store_dir, f"{entry['hash']}.png")
+
+        # Verify the file was saved
+        if os.path.exists(save_path):
+            print(f"✅ Confirmed file exists at: {save_path}")
+            return entry['src'], changed
         else:
-            print(f"Error taking screenshot: HTTP {response.status_code}")
-            if response.status_code == 429:
-                print("Rate limit hit - you may need to wait before trying more screenshots")
-            print(f"Response content: {response.text[:200]}...")  # Show first 200 chars of error
-            return None
+            print(f"❌ Failed to save file to: {save_path}")
+            return None, False
+    except (RateLimitError, CaptureError):
+        raise
     except Exception as e:
         print(f"Exception while taking screenshot: {e}")
-        return None
+        return None, False
+
+
+def screenshot_cell(row_index):
+    """The sheet cell holding a row's screenshot URL (column E)"""
+    return f'Sheet1!E{row_index}'
 
 
-def update_screenshot_url_in_sheets(service, sheet_id, row_index, screenshot_url):
+def update_screenshot_url_in_sheets(sheet_writer, row_index, screenshot_url):
     """
-    Update the screenshot URL for a tool in Google Sheets.
+    Queue an update of the screenshot URL for a tool in Google Sheets.
 
     Args:
-        service: Google Sheets service
-        sheet_id: ID of the spreadsheet
+        sheet_writer: SheetsWriteBuffer that batches the writes
         row_index: Row index (1-based) to update
         screenshot_url: Path to the screenshot
     """
-    try:
-        # Update the screenshot URL in column E
-        service.spreadsheets().values().update(
-            spreadsheetId=sheet_id,
-            range=f'Sheet1!E{row_index}',
-            valueInputOption='RAW',
-            body={'values': [[screenshot_url]]}
-        ).execute()
-        print(f"✅ Updated screenshot URL in Google Sheets for row {row_index}")
-    except Exception as e:
-        print(f"❌ Error updating Google Sheet: {e}")
+    sheet_writer.add(screenshot_cell(row_index), screenshot_url)
+    print(f"📝 Queued screenshot URL update for row {row_index}")
 
 
-def process_all_screenshots():
+def process_all_screenshots(workers=4, queue_path=QUEUE_PATH, refresh=False, retry_failed=False,
+                            backend_name=None, page_budget=20.0):
     """
     Process screenshots for all tools that need them.
+
+    Work goes through a persistent CaptureQueue. A new pass reads the sheet
+    and fills the queue; while jobs are still pending, later runs (or other
+    processes started with the same queue) just keep draining it.
+
+    Args:
+        workers (int): Number of concurrent captures
+        queue_path (str): SQLite file holding the capture queue
+        refresh (bool): Re-read the sheet and merge new tools into an unfinished queue
+        retry_failed (bool): Give failed jobs another round of attempts
+        backend_name (str): 'screenshotone' or 'headless' (defaults to $CAPTURE_BACKEND)
+        page_budget (float): Seconds a headless browser may spend on one page
     """
     print("=" * 50)
     print("STARTING FULL SCREENSHOT GENERATOR")
@@ -268,46 +247,119 @@ def process_all_screenshots():
     else:
         print(f"Screenshots directory already exists at: {SCREENSHOTS_DIR}")
 
-    # Get all tools that need screenshots
-    tools_to_process = get_tools_without_screenshots()
-
-    print(f"\nFound {len(tools_to_process)} tools that need screenshots")
-
-    # Setup Google Sheets service for updates
-    service = get_sheets_service()
+    # Spreadsheet that receives the screenshot URL updates
     sheet_id = os.getenv("SHEET_ID")
 
     if not sheet_id:
         print("ERROR: SHEET_ID not found in .env.local")
         return
 
-    # Process screenshots with rate limiting
-    for i, (name, url, row_index, priority) in enumerate(tools_to_process):
-        print("\n" + "-" * 50)
-        print(f"Processing tool {i + 1}/{len(tools_to_process)}: {name} (Priority: {priority})")
-        print(f"URL: {url}")
-        print(f"Row index: {row_index}")
-
-        # Take the screenshot
-        screenshot_path = save_screenshot(url, name)
-
-        if screenshot_path:
-            print(f"🖼️ Saved Screenshot: {screenshot_path}")
-            # Update the screenshot URL in Google Sheets
-            update_screenshot_url_in_sheets(service, sheet_id, row_index, screenshot_path)
-        else:
-            print(f"❌ Failed to generate screenshot for {name}")
-
-        # Rate limiting to avoid overloading the screenshot API
-        if i < len(tools_to_process) - 1:  # Don't sleep after the last item
-            sleep_time = 2  # 2 seconds between requests
-            print(f"Waiting {sleep_time} seconds before next screenshot...")
-            time.sleep(sleep_time)
+    queue = CaptureQueue(queue_path)
+    if retry_failed:
+        print(f"🔁 Re-queued {queue.requeue_failed()} failed jobs")
+
+    # Queue keys waiting on each sheet cell; a job counts as synced once its write lands
+    cell_jobs = {}
+
+    def on_flush(cells):
+        queue.mark_synced([cell_jobs.pop(cell) for cell in cells if cell in cell_jobs])
+
+    def queue_sheet_write(job, screenshot_path):
+        # Registered first: add() may flush straight away
+        cell_jobs[screenshot_cell(job['row_index'])] = job['key']
+        update_screenshot_url_in_sheets(sheet_writer, job['row_index'], screenshot_path)
+
+    # Screenshot URL updates are batched into a few batchUpdate calls
+    sheet_writer = SheetsWriteBuffer(sheet_id, on_flush=on_flush)
+
+    # Captures whose sheet write was lost when an earlier run stopped
+    unsynced = queue.unsynced()
+    if unsynced:
+        print(f"♻️  Replaying {len(unsynced)} screenshot URL updates from an interrupted run")
+        for job in unsynced:
+            queue_sheet_write(job, job['result'])
+        sheet_writer.flush()
+
+    counts = queue.counts()
+    unfinished = counts['pending'] + counts['in_flight']
+    if unfinished and not refresh:
+        print(f"\n♻️  Resuming capture queue: {counts['pending']} pending, {counts['in_flight']} in flight, "
+              f"{counts['done']} done (use --refresh to re-read the sheet)")
+    else:
+        if not unfinished:
+            # The previous pass finished; start a new one from the sheet
+            queue.clear()
+
+        # Get all tools that need screenshots
+        tools_to_process, stored = get_tools_without_screenshots()
+        for row_index, screenshot_url in stored:
+            update_screenshot_url_in_sheets(sheet_writer, row_index, screenshot_url)
+        added = queue.enqueue([
+            {'key': name, 'name': name, 'url': url, 'row_index': row_index, 'priority': priority}
+            for name, url, row_index, priority in tools_to_process
+        ])
+        print(f"\nFound {len(tools_to_process)} tools that need screenshots ({added} new to the queue)")
+
+    # Keys of captures that looked the same as the stored screenshot
+    unchanged = set()
+
+    def capture(job):
+        print(f"\nProcessing tool: {job['name']} (Priority: {job['priority']}, row {job['row_index']})")
+        print(f"URL: {job['url']}")
+        screenshot_path, changed = save_screenshot(job['url'], job['name'], backend)
+        if screenshot_path and not changed:
+            unchanged.add(job['key'])
+        return screenshot_path
+
+    def on_success(job, screenshot_path):
+        dequeue_recapture(job['name'])
+        if job['key'] in unchanged:
+            print(f"⏭️  {job['name']} looks unchanged, keeping {screenshot_path} (no sheet update)")
+            queue.mark_synced([job['key']])
+            return
+
+        print(f"🖼️ Saved Screenshot: {screenshot_path}")
+        # Update the screenshot URL in Google Sheets
+        queue_sheet_write(job, screenshot_path)
+
+    def on_failure(job, error):
+        print(f"❌ Failed to generate screenshot for {job['name']}: {error}")
+
+    # The headless backend keeps one warm browser per worker
+    backend = get_backend(backend_name, workers=workers, page_budget=page_budget)
+
+    # Captures run concurrently; the scheduler spaces requests out and backs off on 429s
+    scheduler = CaptureScheduler(capture, workers=workers, min_interval=backend.min_interval)
+    with backend, sheet_writer:
+        counts = scheduler.run_queue(queue, default_owner(), on_success=on_success, on_failure=on_failure,
+                                     on_idle=sheet_writer.flush_if_due)
+    queue.close()
 
     print("\n" + "=" * 50)
-    print(f"COMPLETED PROCESSING {len(tools_to_process)} TOOLS")
+    print(f"COMPLETED PROCESSING {counts['done'] + counts['failed']} TOOLS "
+          f"({counts['failed']} failed, {counts['in_flight']} still running elsewhere)")
     print("=" * 50)
 
 
 if __name__ == "__main__":
-    process_all_screenshots()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Capture screenshots for tools that need them')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Number of concurrent captures')
+    parser.add_argument('--queue', type=str, default=QUEUE_PATH,
+                        help='SQLite capture queue shared by runs and concurrent capture processes')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Re-read the sheet and add new tools to an unfinished queue')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Give failed jobs another round of attempts')
+    parser.add_argument('--backend', choices=BACKENDS,
+                        help='Capture with the ScreenshotOne API or local headless Chrome '
+                             '(default: $CAPTURE_BACKEND or screenshotone)')
+    parser.add_argument('--page-budget', type=float, default=20.0,
+                        help='Seconds a headless browser may spend loading one page')
+
+    args = parser.parse_args()
+    process_all_screenshots(workers=args.workers, queue_path=args.queue, refresh=args.refresh,
+                            retry_failed=args.retry_failed, backend_name=args.backend,
+                            page_budget=args.page_budget)
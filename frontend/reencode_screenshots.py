@@ -0,0 +1,259 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from PIL import Image
+
+from screenshot_variants import (MANIFEST_PATH, SCREENSHOTS_DIR, THUMBNAIL_SIZE, VARIANTS_SUBDIR, edit_manifest,
+                                 load_manifest, process_screenshot)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Source hash of every file already re-encoded, so re-runs only touch new or changed PNGs
+STATE_PATH = os.path.join(current_dir, ".reencode-state.json")
+
+
+def file_hash(path):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_state(state_path=STATE_PATH):
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state, state_path=STATE_PATH):
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, state_path)
+
+
+def verify_outputs(work_dir, slug, width, height):
+    """
+    Check that every re-encoded file decodes and has the expected size.
+
+    Returns:
+        list: Problems found (empty if everything is fine)
+    """
+    problems = []
+    variants_dir = os.path.join(work_dir, VARIANTS_SUBDIR)
+    paths = [os.path.join(work_dir, f"{slug}.png")]
+    paths += [os.path.join(variants_dir, name) for name in sorted(os.listdir(variants_dir))]
+
+    for path in paths:
+        name = os.path.basename(path)
+        try:
+            with Image.open(path) as img:
+                img.load()
+                size = img.size
+        except Exception as e:
+            problems.append(f"{name} does not decode: {e}")
+            continue
+
+        stem = os.path.splitext(name)[0]
+        suffix = stem[len(slug) + 1:] if stem != slug else ''
+        if not suffix:
+            expected = (width, height)
+        elif suffix == 'thumb':
+            if size[0] > THUMBNAIL_SIZE[0] or size[1] > THUMBNAIL_SIZE[1]:
+                problems.append(f"{name} is {size}, larger than {THUMBNAIL_SIZE}")
+            continue
+        else:
+            variant_width = int(suffix)
+            expected = (variant_width, round(height * variant_width / width))
+
+        if size != expected:
+            problems.append(f"{name} is {size[0]}x{size[1]}, expected {expected[0]}x{expected[1]}")
+
+    return problems
+
+
+def reencode_file(path, screenshots_dir=SCREENSHOTS_DIR):
+    """
+    Re-encode one screenshot (runs in a worker process).
+
+    The WebP/AVIF variants and a losslessly re-compressed PNG are written to
+    a scratch directory, verified, then moved into place. The original PNG
+    is kept if the re-compressed one is not smaller; its pixels never change.
+
+    Returns:
+        dict: Outcome with 'file', 'hash', 'bytes_before', 'bytes_after',
+        'entry' (the manifest entry) and 'error' (None on success)
+    """
+    filename = os.path.basename(path)
+    slug = os.path.splitext(filename)[0]
+    bytes_before = os.path.getsize(path)
+    outcome = {'file': filename, 'hash': None, 'bytes_before': bytes_before,
+               'bytes_after': bytes_before, 'variants': 0, 'entry': None, 'error': None}
+
+    work_dir = tempfile.mkdtemp(prefix='.reencode-', dir=screenshots_dir)
+    try:
+        with Image.open(path) as img:
+            img.load()
+            width, height = img.size
+            variants = process_screenshot(img, slug, work_dir)
+
+            # The library PNG is the source for future variants, so replace
+            # process_screenshot's palette-quantized fallback with a lossless copy
+            img.save(os.path.join(work_dir, filename), "PNG", optimize=True)
+
+        problems = verify_outputs(work_dir, slug, width, height)
+        if problems:
+            outcome['error'] = '; '.join(problems)
+            return outcome
+
+        variants_dir = os.path.join(screenshots_dir, VARIANTS_SUBDIR)
+        os.makedirs(variants_dir, exist_ok=True)
+        work_variants = os.path.join(work_dir, VARIANTS_SUBDIR)
+        for name in os.listdir(work_variants):
+            os.replace(os.path.join(work_variants, name), os.path.join(variants_dir, name))
+        outcome['variants'] = len(variants['webp']) + len(variants['avif']) + 1
+        outcome['entry'] = manifest_entry(variants, work_dir)
+
+        new_png = os.path.join(work_dir, filename)
+        if os.path.getsize(new_png) < bytes_before:
+            os.replace(new_png, path)
+            outcome['bytes_after'] = os.path.getsize(path)
+
+        outcome['hash'] = file_hash(path)
+        return outcome
+    except Exception as e:
+        outcome['error'] = str(e)
+        return outcome
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def manifest_entry(variants, work_dir):
+    """
+    Turn process_screenshot's output into a manifest entry.
+
+    Its URLs point into the scratch directory, which sits right inside the
+    screenshot directory the files are moved back to.
+    """
+    scratch = f"/{os.path.basename(work_dir)}/"
+
+    def relocate(value):
+        if isinstance(value, dict):
+            return {key: relocate(url) for key, url in value.items()}
+        return value.replace(scratch, '/') if isinstance(value, str) else value
+
+    return {key: relocate(value) for key, value in variants.items()}
+
+
+def reencode_library(screenshots_dir=SCREENSHOTS_DIR, workers=None, state_path=STATE_PATH, force=False,
+                     manifest_path=MANIFEST_PATH):
+    """
+    Re-encode every PNG in the screenshot library across a process pool.
+
+    Each file's variants are recorded in the screenshot manifest under its
+    slug; the entry's 'png' is the library file itself.
+
+    Args:
+        screenshots_dir (str): Directory holding the <slug>.png screenshots
+        workers (int): Worker processes (defaults to the number of CPUs)
+        state_path (str): JSON file of source hashes from previous runs
+        force (bool): Re-encode files even if their hash is unchanged
+        manifest_path (str): Screenshot manifest the variants are recorded in
+
+    Returns:
+        dict: Totals for the run
+    """
+    started = time.perf_counter()
+    state = {} if force else load_state(state_path)
+
+    paths = sorted(
+        os.path.join(screenshots_dir, name) for name in os.listdir(screenshots_dir)
+        if name.lower().endswith('.png')
+    )
+
+    # Files re-encoded before their variants were recorded in the manifest are redone
+    manifest = load_manifest(manifest_path)
+    pending = []
+    for path in paths:
+        entry = state.get(os.path.basename(path))
+        slug = os.path.splitext(os.path.basename(path))[0]
+        if entry and entry['hash'] == file_hash(path) and slug in manifest:
+            continue
+        pending.append(path)
+
+    print(f"🖼️  {len(paths)} screenshots in {screenshots_dir}, "
+          f"{len(paths) - len(pending)} unchanged since the last run, {len(pending)} to re-encode")
+
+    totals = {'files': len(pending), 'failed': 0, 'bytes_before': 0, 'bytes_after': 0}
+    if not pending:
+        return totals
+
+    entries = {}
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(reencode_file, path, screenshots_dir) for path in pending]
+
+        for future in concurrent.futures.as_completed(futures):
+            outcome = future.result()
+            if outcome['error']:
+                totals['failed'] += 1
+                print(f"❌ {outcome['file']}: {outcome['error']}")
+                continue
+
+            saved = outcome['bytes_before'] - outcome['bytes_after']
+            totals['bytes_before'] += outcome['bytes_before']
+            totals['bytes_after'] += outcome['bytes_after']
+            print(f"✅ {outcome['file']}: {outcome['bytes_before'] // 1024}KB -> "
+                  f"{outcome['bytes_after'] // 1024}KB (saved {saved // 1024}KB, "
+                  f"{outcome['variants']} variants)")
+
+            state[outcome['file']] = {
+                'hash': outcome['hash'],
+                'bytes_before': outcome['bytes_before'],
+                'bytes_after': outcome['bytes_after']
+            }
+            entries[os.path.splitext(outcome['file'])[0]] = outcome['entry']
+
+    # One manifest write for the whole run, under the same lock capture workers use
+    with edit_manifest(manifest_path) as manifest:
+        manifest.update(entries)
+    save_state(state, state_path)
+
+    saved = totals['bytes_before'] - totals['bytes_after']
+    percent = saved / totals['bytes_before'] * 100 if totals['bytes_before'] else 0
+    print("\n" + "=" * 50)
+    print(f"📊 Re-encoded {totals['files'] - totals['failed']}/{totals['files']} files "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(f"💾 PNG bytes: {totals['bytes_before'] / 1e6:.1f}MB -> {totals['bytes_after'] / 1e6:.1f}MB "
+          f"(saved {saved / 1e6:.1f}MB, {percent:.0f}%)")
+    if totals['failed']:
+        print(f"⚠️  {totals['failed']} files failed verification and were left untouched")
+    return totals
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Re-encode the existing screenshot library in parallel')
+    parser.add_argument('--dir', type=str, default=SCREENSHOTS_DIR,
+                        help='Screenshot directory to re-encode')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: one per CPU)')
+    parser.add_argument('--state', type=str, default=STATE_PATH,
+                        help='File recording source hashes of already re-encoded screenshots')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-encode every file, ignoring the state file')
+    parser.add_argument('--manifest', type=str, default=MANIFEST_PATH,
+                        help='Screenshot manifest to record the variants in')
+
+    args = parser.parse_args()
+    reencode_library(screenshots_dir=args.dir, workers=args.workers, state_path=args.state, force=args.force,
+                     manifest_path=args.manifest)
@@ -0,0 +1,263 @@
+import concurrent.futures
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+from screenshot_store import STORE_DIR
+from screenshot_variants import MANIFEST_PATH, SCREENSHOTS_DIR, load_manifest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Screenshots of known bad pages (Cloudflare challenges, cookie walls, parked domains...).
+# See screenshot_templates/README.md; with no images in it template matching is skipped
+TEMPLATES_DIR = os.path.join(current_dir, "screenshot_templates")
+
+# Tools whose screenshots failed the scan; capture_screenshots.py picks them up
+RECAPTURE_QUEUE_PATH = os.path.join(current_dir, ".recapture-queue.json")
+
+# Images are downsampled before analysis; the stats barely change and it is ~20x faster
+ANALYSIS_SIZE = (640, 400)
+FINGERPRINT_SIZE = (64, 40)
+
+# A capture is near-uniform when one colour covers this share of it or the gray levels barely vary
+UNIFORM_FRACTION = 0.98
+MIN_STD = 3.0
+# Shannon entropy (bits) of the gray-level histogram. Calibrated on the shipped library:
+# blank captures score 0, minimalist landing pages (chatgpt.png, leiapix.png) about 0.5
+MIN_ENTROPY = 0.25
+# Mean absolute gray difference (0-255) to a template fingerprint that counts as a match
+TEMPLATE_DISTANCE = 8.0
+
+_templates = None
+
+
+def fingerprint(img):
+    """Tiny grayscale thumbnail as a flat float vector, for template matching"""
+    gray = img.convert("L").resize(FINGERPRINT_SIZE, Image.BILINEAR)
+    return np.asarray(gray, dtype=np.float32).ravel()
+
+
+def load_templates(templates_dir=TEMPLATES_DIR):
+    """
+    Fingerprint every image in the templates directory.
+
+    Returns:
+        tuple: (names, matrix) with one fingerprint per row
+    """
+    names, rows = [], []
+    if os.path.isdir(templates_dir):
+        for name in sorted(os.listdir(templates_dir)):
+            if not name.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
+                continue
+            with Image.open(os.path.join(templates_dir, name)) as img:
+                rows.append(fingerprint(img))
+            names.append(os.path.splitext(name)[0])
+
+    matrix = np.stack(rows) if rows else np.empty((0, FINGERPRINT_SIZE[0] * FINGERPRINT_SIZE[1]), np.float32)
+    return names, matrix
+
+
+def get_templates():
+    """Templates loaded once per process"""
+    global _templates
+    if _templates is None:
+        _templates = load_templates()
+    return _templates
+
+
+def analyze_image(img, templates=None):
+    """
+    Score a screenshot for the usual failure modes.
+
+    Args:
+        img (PIL.Image.Image): The screenshot
+        templates (tuple): (names, matrix) from load_templates(), or None for the defaults
+
+    Returns:
+        dict: Metrics plus 'reasons', a list that is empty for a good capture
+    """
+    names, matrix = templates if templates is not None else get_templates()
+
+    small = img.convert("RGB")
+    small.thumbnail(ANALYSIS_SIZE, Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.uint8)
+
+    # Dominant colour share, with each channel quantized to 16 levels
+    quantized = pixels >> 4
+    codes = (quantized[..., 0].astype(np.uint16) << 8) | (quantized[..., 1].astype(np.uint16) << 4) | quantized[..., 2]
+    dominant_fraction = float(np.bincount(codes.ravel(), minlength=4096).max() / codes.size)
+
+    gray = np.asarray(small.convert("L"), dtype=np.uint8)
+    std = float(gray.std())
+    histogram = np.bincount(gray.ravel(), minlength=256) / gray.size
+    histogram = histogram[histogram > 0]
+    entropy = float(-(histogram * np.log2(histogram)).sum())
+
+    metrics = {
+        'dominant_fraction': round(dominant_fraction, 4),
+        'std': round(std, 2),
+        'entropy': round(entropy, 3),
+        'template': None,
+        'template_distance': None,
+        'reasons': []
+    }
+
+    if dominant_fraction >= UNIFORM_FRACTION or std < MIN_STD:
+        metrics['reasons'].append('near_uniform')
+    if entropy < MIN_ENTROPY:
+        metrics['reasons'].append('low_entropy')
+
+    if names:
+        # Distance to every template at once
+        distances = np.abs(matrix - fingerprint(img)).mean(axis=1)
+        best = int(distances.argmin())
+        metrics['template'] = names[best]
+        metrics['template_distance'] = round(float(distances[best]), 2)
+        if distances[best] <= TEMPLATE_DISTANCE:
+            metrics['reasons'].append(f"matches_template:{names[best]}")
+
+    return metrics
+
+
+def check_capture(img):
+    """Reasons a fresh capture should not be published (empty list if it looks fine)"""
+    return analyze_image(img)['reasons']
+
+
+def _init_worker(templates_dir):
+    global _templates
+    _templates = load_templates(templates_dir)
+
+
+def scan_file(path):
+    """Analyze one screenshot file (runs in a worker process)"""
+    try:
+        with Image.open(path) as img:
+            img.load()
+            metrics = analyze_image(img)
+    except Exception as e:
+        metrics = {'reasons': [f"unreadable: {e}"]}
+    metrics['path'] = path
+    return metrics
+
+
+def screenshot_files(screenshots_dir=SCREENSHOTS_DIR, store_dir=STORE_DIR):
+    """Every published screenshot: the content-addressed store plus older <slug>.png files"""
+    paths = []
+    for directory in (store_dir, screenshots_dir):
+        if os.path.isdir(directory):
+            paths += [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                      if name.lower().endswith('.png')]
+    return paths
+
+
+def tool_for_file(path, hash_to_name, store_dir=STORE_DIR):
+    """
+    Identify the tool a screenshot belongs to.
+
+    Returns:
+        tuple: (name, slug) - name is None for files from before the store
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if os.path.dirname(os.path.abspath(path)) == os.path.abspath(store_dir):
+        return hash_to_name.get(stem), None
+    return None, stem
+
+
+def scan_screenshots(screenshots_dir=SCREENSHOTS_DIR, store_dir=STORE_DIR, templates_dir=TEMPLATES_DIR,
+                     workers=None, manifest_path=MANIFEST_PATH):
+    """
+    Scan the screenshot library in parallel.
+
+    Returns:
+        list: Metrics of every flagged screenshot, with 'name' and 'slug' filled in
+    """
+    paths = screenshot_files(screenshots_dir, store_dir)
+    hash_to_name = {entry['hash']: name for name, entry in load_manifest(manifest_path).items()
+                    if entry.get('hash')}
+
+    print(f"🔎 Scanning {len(paths)} screenshots...")
+    flagged = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(templates_dir,)) as executor:
+        for metrics in executor.map(scan_file, paths, chunksize=8):
+            if not metrics['reasons']:
+                continue
+            metrics['name'], metrics['slug'] = tool_for_file(metrics['path'], hash_to_name, store_dir)
+            flagged.append(metrics)
+            print(f"⚠️  {metrics['name'] or os.path.basename(metrics['path'])}: {', '.join(metrics['reasons'])}")
+
+    print(f"📊 {len(flagged)}/{len(paths)} screenshots flagged")
+    return flagged
+
+
+def load_recapture_queue(queue_path=RECAPTURE_QUEUE_PATH):
+    if not os.path.exists(queue_path):
+        return {}
+    with open(queue_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_recapture_queue(queue, queue_path=RECAPTURE_QUEUE_PATH):
+    tmp_path = f"{queue_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(queue, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, queue_path)
+
+
+def queue_for_recapture(flagged, queue_path=RECAPTURE_QUEUE_PATH):
+    """Add flagged screenshots to the recapture queue, keyed by file name"""
+    queue = load_recapture_queue(queue_path)
+    for metrics in flagged:
+        queue[os.path.basename(metrics['path'])] = {
+            'name': metrics['name'],
+            'slug': metrics['slug'],
+            'reasons': metrics['reasons'],
+            'flagged_at': datetime.now().isoformat()
+        }
+    save_recapture_queue(queue, queue_path)
+    print(f"📋 {len(queue)} screenshots queued for recapture in {queue_path}")
+    return queue
+
+
+def is_queued_for_recapture(tool_name, queue):
+    """Match a tool against queue entries by name, or by slug for older files"""
+    slug = tool_name.replace(' ', '_').lower()
+    return any(entry['name'] == tool_name or entry['slug'] == slug for entry in queue.values())
+
+
+def dequeue_recapture(tool_name, queue_path=RECAPTURE_QUEUE_PATH):
+    """Drop a tool from the queue once it has a good capture"""
+    queue = load_recapture_queue(queue_path)
+    slug = tool_name.replace(' ', '_').lower()
+    remaining = {key: entry for key, entry in queue.items()
+                 if entry['name'] != tool_name and entry['slug'] != slug}
+    if len(remaining) != len(queue):
+        save_recapture_queue(remaining, queue_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Flag blank, error-page and cookie-wall screenshots')
+    parser.add_argument('--templates', type=str, default=TEMPLATES_DIR,
+                        help='Directory of known bad page screenshots to match against')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: one per CPU)')
+    parser.add_argument('--no-queue', action='store_true',
+                        help='Only report, do not queue flagged tools for recapture')
+    parser.add_argument('--report', type=str,
+                        help='Write the metrics of flagged screenshots to this JSON file')
+
+    args = parser.parse_args()
+
+    flagged = scan_screenshots(templates_dir=args.templates, workers=args.workers)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(flagged, f, indent=2, ensure_ascii=False)
+        print(f"💾 Report saved to {args.report}")
+    if flagged and not args.no_queue:
+        queue_for_recapture(flagged)
@@ -0,0 +1,143 @@
+import glob
+import hashlib
+import os
+from datetime import datetime
+
+from PIL import Image
+
+from screenshot_variants import (MANIFEST_PATH, SCREENSHOTS_DIR, VARIANTS_SUBDIR, edit_manifest, load_manifest,
+                                 process_screenshot)
+
+STORE_DIR = os.path.join(SCREENSHOTS_DIR, "store")
+
+# dHash bits (out of 64) that may differ before a capture counts as a visual change
+DEFAULT_THRESHOLD = 5
+
+
+def dhash(img, hash_size=8):
+    """
+    Difference hash: one bit per horizontally adjacent pixel pair of a tiny
+    grayscale thumbnail. Visually similar images differ in only a few bits.
+
+    Returns:
+        str: Hex-encoded hash (16 hex digits for the default hash_size)
+    """
+    gray = img.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(gray.getdata())
+
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+
+def hamming_distance(hash_a, hash_b):
+    """Number of differing bits between two hex-encoded hashes"""
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+
+def content_hash(img):
+    """Stable identity of the decoded pixels, independent of the PNG encoder"""
+    digest = hashlib.sha256(f"{img.mode}:{img.width}x{img.height}:".encode("ascii"))
+    digest.update(img.tobytes())
+    return digest.hexdigest()[:16]
+
+
+class ScreenshotStore:
+    """
+    Content-addressed screenshot files with a name -> hash index.
+
+    Files are named by the hash of their pixels, so tool names never collide
+    and every real change gets a new URL (no CDN cache busting needed). The
+    index is the screenshot manifest: each tool's entry holds its variants,
+    content hash and dHash. <hash>.png is a lossless master; the PNG served
+    to clients is the quantized variants/<hash>-fallback.png.
+    """
+
+    def __init__(self, store_dir=STORE_DIR, manifest_path=MANIFEST_PATH, threshold=DEFAULT_THRESHOLD):
+        self.store_dir = store_dir
+        self.manifest_path = manifest_path
+        self.threshold = threshold
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def get(self, name):
+        """Return the manifest entry for a tool, or None"""
+        return load_manifest(self.manifest_path).get(name)
+
+    def has(self, name):
+        """True if the tool has a stored screenshot on disk"""
+        entry = self.get(name)
+        return bool(entry and entry.get('hash')
+                    and os.path.exists(os.path.join(self.store_dir, f"{entry['hash']}.png")))
+
+    def save(self, name, img):
+        """
+        Store a capture unless it looks like the previous one.
+
+        Args:
+            name (str): Tool name
+            img (PIL.Image.Image): The captured screenshot
+
+        Returns:
+            tuple: (entry, changed) - changed is False when nothing was written
+        """
+        img = img.convert("RGB")
+        new_dhash = dhash(img)
+        previous = self.get(name)
+
+        if previous and previous.get('dhash'):
+            distance = hamming_distance(previous['dhash'], new_dhash)
+            if distance <= self.threshold:
+                print(f"⏭️  {name}: visual change {distance}/64 bits is below the threshold "
+                      f"({self.threshold}), keeping {previous['src']}")
+                return previous, False
+
+        digest = content_hash(img)
+        if previous and previous.get('hash') == digest:
+            return previous, False
+
+        # Encoding is slow, so it runs outside the manifest lock
+        entry = process_screenshot(img, digest, self.store_dir, master=True)
+        entry.update({
+            'hash': digest,
+            'dhash': new_dhash,
+            'captured_at': datetime.now().isoformat()
+        })
+
+        with edit_manifest(self.manifest_path) as manifest:
+            # Another save may have deleted these files while no entry pointed at the hash yet
+            if not self._complete(entry):
+                process_screenshot(img, digest, self.store_dir, master=True)
+
+            replaced = manifest.get(name)
+            manifest[name] = entry
+            if replaced and replaced.get('hash') and replaced['hash'] != digest:
+                self._remove_unreferenced(replaced['hash'], manifest)
+
+        print(f"🗜️  Stored {name} as {digest} ({len(entry['webp'])} WebP, "
+              f"{len(entry['avif'])} AVIF variants + thumbnail)")
+        return entry, True
+
+    def _files(self, digest):
+        """The master and every variant written for a hash"""
+        paths = glob.glob(os.path.join(self.store_dir, VARIANTS_SUBDIR, f"{digest}-*"))
+        master = os.path.join(self.store_dir, f"{digest}.png")
+        return paths + [master] if os.path.exists(master) else paths
+
+    def _complete(self, entry):
+        """True if every file of an entry is still on disk"""
+        # Master, fallback PNG and thumbnail plus the WebP/AVIF widths
+        expected = 3 + len(entry['webp']) + len(entry['avif'])
+        return len(self._files(entry['hash'])) >= expected
+
+    def _remove_unreferenced(self, digest, manifest):
+        """Delete a hash's files once no tool points at them (call while editing the manifest)"""
+        if any(entry.get('hash') == digest for entry in manifest.values()):
+            return
+
+        for path in self._files(digest):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,161 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+
+from PIL import Image
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: only threads within one process are serialized
+    fcntl = None
+
+try:
+    # Pillow < 11.2 needs the plugin for AVIF; newer builds have it natively
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+SCREENSHOTS_DIR = os.path.join(current_dir, "public", "screenshots")
+VARIANTS_SUBDIR = "variants"
+MANIFEST_PATH = os.path.join(SCREENSHOTS_DIR, "manifest.json")
+
+# Responsive widths for the WebP/AVIF variants (never upscaled)
+VARIANT_WIDTHS = (1280, 640, 320)
+THUMBNAIL_SIZE = (400, 250)
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+_manifest_lock = threading.Lock()
+
+
+def avif_supported():
+    """Check whether this Pillow build can write AVIF"""
+    Image.init()
+    return 'AVIF' in Image.SAVE
+
+
+def _public_url(path):
+    """Map a file under public/ to the URL the site serves it from"""
+    relative = os.path.relpath(path, os.path.join(current_dir, "public"))
+    return "/" + relative.replace(os.sep, "/")
+
+
+def _resized(img, width):
+    if width >= img.width:
+        return img
+    height = round(img.height * width / img.width)
+    return img.resize((width, height), Image.LANCZOS)
+
+
+def process_screenshot(img, slug, screenshots_dir=SCREENSHOTS_DIR, master=False):
+    """
+    Write the responsive derivatives for one screenshot.
+
+    Writes <slug>.png as a palette-quantized fallback, plus WebP (and AVIF
+    when available) at each of VARIANT_WIDTHS and a WebP card thumbnail
+    under screenshots_dir/variants/. With master=True, <slug>.png is a
+    lossless copy that later variants can be regenerated from, and the
+    quantized fallback goes to variants/<slug>-fallback.png instead.
+
+    Args:
+        img (PIL.Image.Image): The captured screenshot
+        slug (str): File name stem, e.g. 'leonardo_ai'
+        screenshots_dir (str): Directory the fallback (or master) PNG is written to
+        master (bool): Keep a lossless <slug>.png
+
+    Returns:
+        dict: Public URLs of every variant; 'src' is the one screenshot_url should use
+    """
+    variants_dir = os.path.join(screenshots_dir, VARIANTS_SUBDIR)
+    os.makedirs(variants_dir, exist_ok=True)
+
+    img = img.convert("RGB")
+    variants = {'width': img.width, 'height': img.height, 'webp': {}, 'avif': {}}
+
+    if master:
+        img.save(os.path.join(screenshots_dir, f"{slug}.png"), "PNG", optimize=True)
+        png_path = os.path.join(variants_dir, f"{slug}-fallback.png")
+    else:
+        png_path = os.path.join(screenshots_dir, f"{slug}.png")
+
+    # Palette-quantized, optimized PNG fallback for clients without WebP
+    img.quantize(colors=256, method=Image.Quantize.MEDIANCUT).save(png_path, "PNG", optimize=True)
+    variants['png'] = _public_url(png_path)
+
+    write_avif = avif_supported()
+    for width in sorted({min(w, img.width) for w in VARIANT_WIDTHS}, reverse=True):
+        resized = _resized(img, width)
+
+        webp_path = os.path.join(variants_dir, f"{slug}-{width}.webp")
+        resized.save(webp_path, "WEBP", quality=WEBP_QUALITY, method=6)
+        variants['webp'][str(width)] = _public_url(webp_path)
+
+        if write_avif:
+            avif_path = os.path.join(variants_dir, f"{slug}-{width}.avif")
+            resized.save(avif_path, "AVIF", quality=AVIF_QUALITY)
+            variants['avif'][str(width)] = _public_url(avif_path)
+
+    thumbnail = img.copy()
+    thumbnail.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+    thumbnail_path = os.path.join(variants_dir, f"{slug}-thumb.webp")
+    thumbnail.save(thumbnail_path, "WEBP", quality=WEBP_QUALITY, method=6)
+    variants['thumbnail'] = _public_url(thumbnail_path)
+
+    # The widest WebP is what cards and the modal display
+    variants['src'] = variants['webp'][str(max(int(w) for w in variants['webp']))]
+    return variants
+
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@contextlib.contextmanager
+def _locked_manifest(manifest_path):
+    """Hold the manifest lock across threads and, via a lock file, across processes"""
+    with _manifest_lock, open(f"{manifest_path}.lock", 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def edit_manifest(manifest_path=MANIFEST_PATH):
+    """
+    Load the manifest under the lock and write it back when the block exits.
+
+    Anything done inside the block (such as deleting files no entry points at
+    any more) is atomic with respect to other writers, threads or processes.
+    """
+    with _locked_manifest(manifest_path):
+        manifest = load_manifest(manifest_path)
+        yield manifest
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(manifest_path),
+                                        prefix=f".{os.path.basename(manifest_path)}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+            os.replace(tmp_path, manifest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def update_manifest(name, variants, manifest_path=MANIFEST_PATH):
+    """Record a tool's variants in the manifest (safe to call from capture workers and processes)"""
+    with edit_manifest(manifest_path) as manifest:
+        manifest[name] = variants
+
@@ -0,0 +1,297 @@
+import json
+import os
+import random
+import time
+import urllib.parse
+
+import httplib2
+from google.auth.exceptions import TransportError
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+# Status codes worth retrying: quota exceeded and transient server errors
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+# Network failures worth retrying (socket.timeout and ConnectionResetError are OSErrors);
+# TransportError covers refreshing the access token
+TRANSPORT_ERRORS = (OSError, httplib2.HttpLib2Error, TransportError)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Cell updates that could not be written; the next buffer for the same sheet replays them
+PENDING_PATH = os.path.join(current_dir, ".sheets-pending.json")
+
+_service = None
+
+
+def get_sheets_service():
+    """
+    Return a Google Sheets service object using credentials from env variables.
+
+    The service is built once per process and reused, so credentials and the
+    discovery document are not rebuilt on every call.
+    """
+    global _service
+    if _service is not None:
+        return _service
+
+    # Get credentials from environment variables
+    account_email = os.getenv("GOOGLE_SERVICE_ACCOUNT_EMAIL")
+    private_key = os.getenv("GOOGLE_PRIVATE_KEY").replace("\\n", "\n")  # Replace literal '\n' with newline
+
+    # Create credentials
+    credentials_dict = {
+        "type": "service_account",
+        "project_id": "sports-innovation-lab-ai",
+        "private_key_id": "key-id",
+        "private_key": private_key,
+        "client_email": account_email,
+        "client_id": "client-id",
+        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+        "token_uri": "https://oauth2.googleapis.com/token",
+        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+        "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{urllib.parse.quote(account_email)}"
+    }
+
+    credentials = service_account.Credentials.from_service_account_info(
+        credentials_dict,
+        scopes=['https://www.googleapis.com/auth/spreadsheets']
+    )
+
+    _service = build('sheets', 'v4', credentials=credentials)
+    return _service
+
+
+def execute_with_backoff(request, max_attempts=5, base_delay=1.0):
+    """
+    Execute a Sheets API request, retrying quota, server and network errors.
+
+    Args:
+        request: An unexecuted googleapiclient request
+        max_attempts (int): Attempts before giving up
+        base_delay (float): First backoff delay in seconds (doubles each retry)
+
+    Returns:
+        dict: The API response
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return request.execute()
+        except HttpError as e:
+            if e.resp.status not in RETRYABLE_STATUS or attempt == max_attempts:
+                raise
+            problem = f"returned {e.resp.status}"
+        except TRANSPORT_ERRORS as e:
+            if attempt == max_attempts:
+                raise
+            problem = f"failed ({type(e).__name__}: {e})"
+
+        delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, base_delay)
+        print(f"⏳ Sheets API {problem}, retrying in {delay:.1f}s...")
+        time.sleep(delay)
+
+
+class SheetsWriteBuffer:
+    """
+    Collects cell updates and writes them with values().batchUpdate.
+
+    Updates are flushed when max_batch cells are pending, when the oldest
+    pending update is older than max_delay seconds (checked by add() and
+    flush_if_due()), or when the buffer is closed (use it as a context
+    manager). Updates that still cannot be written on close are saved to
+    pending_path, and the next buffer for the same sheet replays them.
+    The Sheets service is only built for the first write, so a run that
+    never writes needs no credentials. on_flush(cell_ranges) is called after
+    every successful batch. An offline buffer never calls the API: close()
+    only saves the updates to pending_path for the next online run.
+    """
+
+    def __init__(self, sheet_id, service=None, max_batch=100, max_delay=30.0, pending_path=PENDING_PATH,
+                 on_flush=None, offline=False):
+        self.sheet_id = sheet_id
+        self._service = service
+        self.offline = offline
+        self.on_flush = on_flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending_path = pending_path
+        self.pending = self._load_saved().get(sheet_id, {})
+        self.first_pending_at = time.monotonic() if self.pending else None
+        if self.pending and not offline:
+            print(f"♻️  Replaying {len(self.pending)} sheet updates saved by an earlier run")
+
+    @property
+    def service(self):
+        if self._service is None:
+            self._service = get_sheets_service()
+        return self._service
+
+    def _load_saved(self):
+        if not self.pending_path or not os.path.exists(self.pending_path):
+            return {}
+        with open(self.pending_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_pending(self):
+        """Persist this sheet's pending updates (or drop them from the file once written)"""
+        if not self.pending_path:
+            return
+        saved = self._load_saved()
+        if self.pending:
+            saved[self.sheet_id] = self.pending
+        elif saved.pop(self.sheet_id, None) is None:
+            return
+
+        if not saved:
+            os.remove(self.pending_path)
+            return
+        tmp_path = f"{self.pending_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.pending_path)
+
+    def add(self, cell_range, value):
+        """Queue a single-cell update such as ('Sheet1!E12', '/screenshots/x.png')"""
+        if not self.pending:
+            self.first_pending_at = time.monotonic()
+        # A later write to the same cell replaces the earlier one
+        self.pending[cell_range] = value
+
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Flush if the oldest pending update has waited max_delay seconds"""
+        if self.pending and time.monotonic() - self.first_pending_at >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        """Write all pending updates in one batchUpdate call"""
+        if not self.pending or self.offline:
+            return
+
+        data = [{'range': cell_range, 'values': [[value]]} for cell_range, value in self.pending.items()]
+        request = self.service.spreadsheets().values().batchUpdate(
+            spreadsheetId=self.sheet_id,
+            body={'valueInputOption': 'RAW', 'data': data}
+        )
+
+        try:
+            execute_with_backoff(request)
+            print(f"✅ Wrote {len(data)} cell updates to Google Sheets")
+        except (HttpError, *TRANSPORT_ERRORS) as e:
+            print(f"❌ Error updating Google Sheet ({len(data)} updates kept pending): {e}")
+            return
+
+        written = list(self.pending)
+        self.pending.clear()
+        self.first_pending_at = None
+        self._save_pending()
+        if self.on_flush:
+            self.on_flush(written)
+
+    def close(self):
+        """
+        Write everything still pending.
+
+        Raises:
+            RuntimeError: Some updates could not be written; they were saved to pending_path
+        """
+        if self.offline:
+            if self.pending:
+                self._save_pending()
+                print(f"💾 Offline: saved {len(self.pending)} sheet updates to {self.pending_path} "
+                      f"for the next online run")
+            return
+
+        try:
+            self.flush()
+        finally:
+            if self.pending:
+                self._save_pending()
+        if self.pending:
+            raise RuntimeError(f"{len(self.pending)} sheet updates could not be written; "
+                               f"saved to {self.pending_path} for the next run")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except RuntimeError as e:
+            # Do not hide the error that is already propagating
+            if exc_type is None:
+                raise
+            print(f"❌ {e}")
+
+
+def normalize_tool_name(name):
+    """Case- and whitespace-insensitive key for tool names"""
+    return ' '.join((name or '').split()).casefold()
+
+
+class SheetSnapshot:
+    """
+    One read of the tools sheet, indexed by normalized tool name.
+
+    Rows are stored as returned by the API (lists of cell strings) starting at
+    first_row, so find() can return the 1-based sheet row for updates.
+    """
+
+    def __init__(self, rows, cell_range='Sheet1!A2:H', first_row=2, fetched_at=None):
+        self.rows = rows
+        self.cell_range = cell_range
+        self.first_row = first_row
+        self.fetched_at = fetched_at or time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.by_name = {}
+        for i, row in enumerate(rows):
+            if len(row) > 1:
+                # Keep the first occurrence, matching the old linear scan
+                self.by_name.setdefault(normalize_tool_name(row[1]), i)
+
+    @classmethod
+    def fetch(cls, sheet_id, cell_range='Sheet1!A2:H', service=None):
+        """Download the sheet range once"""
+        service = service or get_sheets_service()
+        result = execute_with_backoff(service.spreadsheets().values().get(
+            spreadsheetId=sheet_id,
+            range=cell_range
+        ))
+        snapshot = cls(result.get('values', []), cell_range=cell_range)
+        print(f"📥 Loaded {len(snapshot.rows)} rows from Google Sheets")
+        return snapshot
+
+    @classmethod
+    def load(cls, path):
+        """Load a snapshot saved with save()"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        print(f"📂 Using sheet snapshot from {path} (fetched {data['fetched_at']})")
+        return cls(data['rows'], cell_range=data['cell_range'],
+                   first_row=data['first_row'], fetched_at=data['fetched_at'])
+
+    def save(self, path):
+        """Write the snapshot to disk for offline re-runs"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fetched_at': self.fetched_at,
+                'cell_range': self.cell_range,
+                'first_row': self.first_row,
+                'rows': self.rows
+            }, f, indent=2, ensure_ascii=False)
+
+    def find(self, tool_name):
+        """
+        Look up a tool by name.
+
+        Returns:
+            tuple: (row, row_index) or (None, None) if not found
+        """
+        i = self.by_name.get(normalize_tool_name(tool_name))
+        if i is None:
+            return None, None
+        return self.rows[i], i + self.first_row
@@ -1,5 +1,102 @@
 import { NextResponse } from 'next/server';
+import { promises as fs } from 'fs';
+import path from 'path';
 import { TOOL_DATA } from '../../utils/toolData';
+import { CATEGORIES } from '../../utils/constants';
+
+// Pre-built by audits/build_catalog.py: one JSON file per (type, group) and (type, sector)
+const SHARDS_DIR = path.join(process.cwd(), 'public', 'data', 'shards');
+const MANIFEST_PATH = path.join(SHARDS_DIR, 'manifest.json');
+const CACHE_CONTROL = 'public, max-age=300, s-maxage=3600, stale-while-revalidate=86400';
+
+// Shard file suffix -> Content-Encoding
+const CODINGS = { br: 'br', gz: 'gzip' };
+
+// Sector groups for when there is no manifest; with one, manifest.groups (SECTOR_GROUPS in build_catalog.py) wins
+const DEFAULT_GROUPS = CATEGORIES.reduce((groups, category) => {
+  if (category.group) (groups[category.group] ||= []).push(category.id);
+  return groups;
+}, {});
+
+// { mtimeMs, manifest: Promise, shards: Map<file, Promise<Buffer>> } for the current build
+let catalog = null;
+
+async function loadCatalog() {
+  let stat;
+  try {
+    stat = await fs.stat(MANIFEST_PATH);
+  } catch (error) {
+    // Not cached, so shards built while the server runs are picked up
+    console.warn(`No catalog shards (${error.code || error.message}), filtering TOOL_DATA instead`);
+    catalog = null;
+    return null;
+  }
+
+  // build_catalog.py rewrites the manifest whenever a shard changes, so its mtime keys the cache
+  if (!catalog || catalog.mtimeMs !== stat.mtimeMs) {
+    catalog = {
+      mtimeMs: stat.mtimeMs,
+      manifest: fs.readFile(MANIFEST_PATH, 'utf8').then(JSON.parse),
+      shards: new Map()
+    };
+  }
+
+  const current = catalog;
+  try {
+    return { manifest: await current.manifest, shards: current.shards };
+  } catch (error) {
+    console.warn(`Unreadable catalog manifest (${error.message}), filtering TOOL_DATA instead`);
+    if (catalog === current) catalog = null;
+    return null;
+  }
+}
+
+function readShard(shards, file) {
+  if (!shards.has(file)) {
+    const read = fs.readFile(path.join(SHARDS_DIR, file));
+    // Do not keep a failed read around
+    read.catch(() => shards.delete(file));
+    shards.set(file, read);
+  }
+  return shards.get(file);
+}
+
+// True if the Accept-Encoding header allows a coding with q > 0 (directly or through '*')
+function acceptsEncoding(header, coding) {
+  const qualities = new Map();
+  for (const part of (header || '').split(',')) {
+    const [name, ...params] = part.toLowerCase().split(';').map(value => value.trim());
+    if (!name) continue;
+    const q = params.find(param => param.startsWith('q='));
+    qualities.set(name, q ? parseFloat(q.slice(2)) || 0 : 1);
+  }
+  const quality = qualities.has(coding) ? qualities.get(coding) : qualities.get('*');
+  return quality > 0;
+}
+
+// Same partitioning as the shards: group wins over sector, then all tools of the type
+function shardKey(sector, group, groups) {
+  if (Object.hasOwn(groups, group)) return `group:${group}`;
+  if (sector) return `sector:${sector}`;
+  return 'all';
+}
+
+function filterTools(type, sector, group, groups = DEFAULT_GROUPS) {
+  // Step 1: Filter by type first (personal/enterprise)
+  let filteredTools = TOOL_DATA.filter(tool =>
+    tool.type.toLowerCase() === type.toLowerCase()
+  );
+
+  // Step 2: Apply sector or group filtering
+  if (Object.hasOwn(groups, group)) {
+    const sectors = groups[group];
+    filteredTools = filteredTools.filter(tool => sectors.includes(tool.sector));
+  } else if (sector && sector !== '') {
+    filteredTools = filteredTools.filter(tool => tool.sector === sector);
+  }
+
+  return filteredTools;
+}
 
 export async function GET(request) {
   try {
@@ -9,58 +106,50 @@ export async function GET(request) {
     const type = searchParams.get('type') || 'personal';
     const group = searchParams.get('group') || '';
 
-    console.log(`API Request - Type: ${type}, Sector: ${sector}, Group: ${group}`);
-
-    // Define which sectors belong to which groups
-    const aiSectors = ['Agent Builders', 'LLM Frameworks & Orchestration', 'Model Hubs & Customization', 'AI Coding & App Platforms', 'Embeddings & Vector Search'];
-    const sportsSectors = [
-      'Fan Intelligence',
-      'Advertising & Media',
-      'Creative & Personalization',
-      'Sponsorship & Revenue',
-      'Measurement & Analytics'
-    ];
-
-    // Start with a copy of all tools
-    let filteredTools = [...TOOL_DATA];
-
-    // Step 1: Filter by type first (personal/enterprise)
-    filteredTools = filteredTools.filter(tool =>
-      tool.type.toLowerCase() === type.toLowerCase()
-    );
-    console.log(`After type filter: ${filteredTools.length} tools`);
-
-    // Step 2: Apply sector or group filtering
-    if (group === 'sports') {
-      // All Sports Tools - include any tool with a sports sector
-      filteredTools = filteredTools.filter(tool =>
-        sportsSectors.includes(tool.sector)
-      );
-      console.log(`After 'sports' group filter: ${filteredTools.length} tools`);
+    const loaded = await loadCatalog();
+    if (!loaded) {
+      return NextResponse.json(filterTools(type, sector, group));
     }
-    else if (group === 'ai') {
-      // All AI Tools - include any tool with an AI sector
-      filteredTools = filteredTools.filter(tool =>
-        aiSectors.includes(tool.sector)
-      );
-      console.log(`After 'ai' group filter: ${filteredTools.length} tools`);
+    const { manifest, shards } = loaded;
+
+    const groups = manifest.groups || DEFAULT_GROUPS;
+    const entry = manifest.shards[type.toLowerCase()]?.[shardKey(sector, group, groups)];
+    if (!entry) {
+      // Shards cover every combination present in the catalog, so nothing matches
+      return NextResponse.json([], { headers: { 'Cache-Control': CACHE_CONTROL } });
     }
-    else if (sector && sector !== '') {
-      // Specific sector - only include tools with this exact sector
-      filteredTools = filteredTools.filter(tool =>
-        tool.sector === sector
-      );
-      console.log(`After sector filter '${sector}': ${filteredTools.length} tools`);
+
+    const headers = {
+      'Content-Type': 'application/json; charset=utf-8',
+      'Cache-Control': CACHE_CONTROL,
+      'ETag': entry.etag,
+      'Vary': 'Accept-Encoding'
+    };
+
+    if (request.headers.get('if-none-match') === entry.etag) {
+      return new NextResponse(null, { status: 304, headers });
     }
 
-    // Log the first few tools for debugging
-    if (filteredTools.length > 0) {
-      console.log(`First tool returned: ${filteredTools[0].name} (${filteredTools[0].sector})`);
+    // Serve the pre-compressed variant the client accepts, if the build produced one
+    const accepted = request.headers.get('accept-encoding');
+    // entry.encodings lists file suffixes, best first: 'br' and/or 'gz'
+    const encoding = (entry.encodings || []).find(enc => acceptsEncoding(accepted, CODINGS[enc]));
+    if (encoding) {
+      headers['Content-Encoding'] = CODINGS[encoding];
     }
 
-    return NextResponse.json(filteredTools);
+    const file = encoding ? `${entry.file}.${encoding}` : entry.file;
+    let body;
+    try {
+      body = await readShard(shards, file);
+    } catch (error) {
+      // A shard missing from a half-written build should not fail the request
+      console.warn(`Could not read shard ${file} (${error.code || error.message}), filtering TOOL_DATA instead`);
+      return NextResponse.json(filterTools(type, sector, group, groups));
+    }
+    return new NextResponse(body, { headers });
   } catch (error) {
     console.error('Error in /api/tools:', error);
     return NextResponse.json({ error: error.message }, { status: 500 });
   }
-}
\ No newline at end of file
+}
@@ -1,12 +1,12 @@
-import requests
 import os
-import urllib.parse
 import time
-from PIL import Image
-from io import BytesIO
 from dotenv import load_dotenv
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+
+from capture_backends import BACKENDS, get_backend
+from capture_scheduler import RateLimitError
+from screenshot_quality import check_capture
+from screenshot_store import DEFAULT_THRESHOLD, ScreenshotStore
+from sheets_client import SheetSnapshot, SheetsWriteBuffer
 
 # Load environment variables
 load_dotenv('.env.local')
@@ -37,157 +37,129 @@ TOOLS_TO_UPDATE = [
 # ==========================================================================
 
 
-def get_sheets_service():
-    """
-    Create and return a Google Sheets service object using credentials from env variables
-    """
-    # Get credentials from environment variables
-    account_email = os.getenv("GOOGLE_SERVICE_ACCOUNT_EMAIL")
-    private_key = os.getenv("GOOGLE_PRIVATE_KEY").replace("\\n", "\n")  # Replace literal '\n' with newline
-
-    # Create credentials
-    credentials_dict = {
-        "type": "service_account",
-        "project_id": "sports-innovation-lab-ai",
-        "private_key_id": "key-id",
-        "private_key": private_key,
-        "client_email": account_email,
-        "client_id": "client-id",
-        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-        "token_uri": "https://oauth2.googleapis.com/token",
-        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-        "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{urllib.parse.quote(account_email)}"
-    }
-
-    credentials = service_account.Credentials.from_service_account_info(
-        credentials_dict,
-        scopes=['https://www.googleapis.com/auth/spreadsheets']
-    )
-
-    # Build and return the service
-    service = build('sheets', 'v4', credentials=credentials)
-    return service
-
-
-def get_tool_info_from_sheets(tool_name):
+def get_tool_info_from_sheets(tool_name, snapshot):
     """
-    Retrieve information for a specific tool from Google Sheets.
+    Retrieve information for a specific tool from the sheet snapshot.
 
     Args:
         tool_name (str): Name of the tool to find
+        snapshot (SheetSnapshot): Sheet rows indexed by normalized name
 
     Returns:
         tuple: (url, row_index) or (None, None) if not found
     """
-    service = get_sheets_service()
-    sheet_id = os.getenv("SHEET_ID")
-
-    # Get all tools from the Sheet1 tab
-    result = service.spreadsheets().values().get(
-        spreadsheetId=sheet_id,
-        range='Sheet1!A2:C'  # Only need id, name, and URL columns
-    ).execute()
+    row, row_index = snapshot.find(tool_name)
 
-    rows = result.get('values', [])
+    if row is None:
+        print(f"❌ Tool '{tool_name}' not found in Google Sheets")
+        return None, None
 
-    # Look for the tool by name
-    for i, row in enumerate(rows):
-        if len(row) > 1 and row[1].strip() == tool_name:
-            url = row[2] if len(row) > 2 else None
-            return url, i + 2  # i+2 because index is 0-based and row 1 is header
+    url = row[2] if len(row) > 2 else None
+    return url, row_index
 
-    print(f"❌ Tool '{tool_name}' not found in Google Sheets")
-    return None, None
 
-
-def save_screenshot(url, name):
+def save_screenshot(url, name, store, backend):
     """
     Save a screenshot for a given tool.
 
     Args:
         url (str): URL of the tool
         name (str): Name of the tool
+        store (ScreenshotStore): Content-addressed store the capture goes into
+        backend (CaptureBackend): Renders the page (ScreenshotOne API or local headless browsers)
 
     Returns:
-        str or None: Path to saved screenshot, or None if failed
+        tuple: (screenshot_url, changed) - screenshot_url is None if the capture
+        failed, changed is False when the site looks the same as last time
     """
     try:
-        filename = f"{name.replace(' ', '_').lower()}.png"
-        save_path = os.path.join(SCREENSHOTS_DIR, filename)
-
         if not url or url.strip() == "":
             print(f"No URL provided for {name}, skipping...")
-            return None
-
-        api_key = os.getenv("SCREENSHOTONE_API_KEY")
-        if not api_key:
-            print("ERROR: SCREENSHOTONE_API_KEY not found in .env.local")
-            return None
-
-        screenshot_url = f"https://api.screenshotone.com/take?access_key={api_key}&url={url}&viewport_width=1280&viewport_height=800&format=png"
-
-        print(f"Requesting screenshot from: {url}")
-        response = requests.get(screenshot_url)
-
-        print(f"Response status: {response.status_code}")
-
-        if response.status_code == 200:
-            print(f"Successfully got image, size: {len(response.content)} bytes")
-            img = Image.open(BytesIO(response.content))
-            print(f"Image size: {img.size}")
-
-            # Remove existing screenshot if it exists
-            if os.path.exists(save_path):
-                print(f"Removing existing screenshot: {save_path}")
-                os.remove(save_path)
-
-            img.save(save_path)
-            print(f"Saved image to: {save_path}")
-
-            # Verify the file was saved
-            if os.path.exists(save_path):
-                print(f"✅ Confirmed file exists at: {save_path}")
-                return f"/screenshots/{filename}"
-            else:
-                print(f"❌ Failed to save file to: {save_path}")
-                return None
+            return None, False
+
+        img = backend.capture(url)
+        if img is None:
+            return None, False
+        print(f"Image size: {img.size}")
+
+        # Blank, error and challenge pages also come back as 200
+        problems = check_capture(img)
+        if problems:
+            print(f"❌ Rejected capture for {name}: {', '.join(problems)}")
+            return None, False
+
+        # Files are named by content hash; an unchanged site writes nothing
+        entry, changed = store.save(name, img)
+        save_path = os.path.join(store.store_dir, f"{entry['hash']}.png")
+
+        # Verify the file was saved
+        if os.path.exists(save_path):
+            print(f"✅ Confirmed file exists at: {save_path}")
+            return entry['src'], changed
         else:
-            print(f"Error taking screenshot: HTTP {response.status_code}")
-            if response.status_code == 429:
-                print("Rate limit hit - you may need to wait before trying more screenshots")
-            print(f"Response content: {response.text[:200]}...")  # Show first 200 chars of error
-            return None
+            print(f"❌ Failed to save file to: {save_path}")
+            return None, False
+    except RateLimitError:
+        print("Rate limit hit - you may need to wait before trying more screenshots")
+        return None, False
     except Exception as e:
         print(f"Exception while taking screenshot: {e}")
-        return None
+        return None, False
 
 
-def update_screenshot_url_in_sheets(service, sheet_id, row_index, screenshot_url):
+def update_screenshot_url_in_sheets(sheet_writer, row_index, screenshot_url):
     """
-    Update the screenshot URL for a tool in Google Sheets.
+    Queue an update of the screenshot URL for a tool in Google Sheets.
 
     Args:
-        service: Google Sheets service
-        sheet_id: ID of the spreadsheet
+        sheet_writer: SheetsWriteBuffer that batches the writes
         row_index: Row index (1-based) to update
         screenshot_url: Path to the screenshot
     """
-    try:
-        # Update the screenshot URL in column E
-        service.spreadsheets().values().update(
-            spreadsheetId=sheet_id,
-            range=f'Sheet1!E{row_index}',
-            valueInputOption='RAW',
-            body={'values': [[screenshot_url]]}
-        ).execute()
-        print(f"✅ Updated screenshot URL in Google Sheets for row {row_index}")
-    except Exception as e:
-        print(f"❌ Error updating Google Sheet: {e}")
+    # The screenshot URL lives in column E
+    sheet_writer.add(f'Sheet1!E{row_index}', screenshot_url)
+    print(f"📝 Queued screenshot URL update for row {row_index}")
+
+
+def load_sheet_snapshot(sheet_id, snapshot_path=None, offline=False):
+    """
+    Read the tools sheet once for the whole run.
+
+    Args:
+        sheet_id (str): ID of the spreadsheet
+        snapshot_path (str): Optional file to save the snapshot to (or load it from)
+        offline (bool): Load snapshot_path instead of calling the Sheets API
+
+    Returns:
+        SheetSnapshot: Rows indexed by normalized tool name
+
+    Raises:
+        FileNotFoundError: offline is set but there is no snapshot to load
+    """
+    if offline:
+        if not snapshot_path or not os.path.exists(snapshot_path):
+            raise FileNotFoundError(f"--offline needs a saved sheet snapshot, but {snapshot_path or '--snapshot'} "
+                                    f"does not exist (run once without --offline to create it)")
+        return SheetSnapshot.load(snapshot_path)
+
+    snapshot = SheetSnapshot.fetch(sheet_id, cell_range='Sheet1!A2:C')  # Only need id, name, and URL columns
+    if snapshot_path:
+        snapshot.save(snapshot_path)
+        print(f"💾 Saved sheet snapshot to {snapshot_path}")
+    return snapshot
 
 
-def update_specific_screenshots():
+def update_specific_screenshots(snapshot_path=None, offline=False, threshold=DEFAULT_THRESHOLD, force=False,
+                                backend_name=None):
     """
     Update screenshots for the specified tools only.
+
+    Args:
+        snapshot_path (str): Optional on-disk copy of the sheet for offline re-runs
+        offline (bool): Use snapshot_path instead of downloading the sheet
+        threshold (int): dHash bits that may differ before a capture is stored
+        force (bool): Store every capture, even if it looks unchanged
+        backend_name (str): 'screenshotone' or 'headless' (defaults to $CAPTURE_BACKEND)
     """
     print("=" * 50)
     print("STARTING SPECIFIC SCREENSHOT UPDATER")
@@ -196,52 +168,70 @@ def update_specific_screenshots():
     print(f"Script location: {os.path.abspath(__file__)}")
     print(f"Using screenshots directory: {SCREENSHOTS_DIR}")
 
-    # Setup Google Sheets service for updates
-    service = get_sheets_service()
+    # Spreadsheet that receives the screenshot URL updates
     sheet_id = os.getenv("SHEET_ID")
 
     if not sheet_id:
         print("ERROR: SHEET_ID not found in .env.local")
         return
 
-    # Process each specified tool
-    for i, (tool_name, tool_url) in enumerate(TOOLS_TO_UPDATE):
-        print("\n" + "-" * 50)
-        print(f"Processing tool {i + 1}/{len(TOOLS_TO_UPDATE)}: {tool_name}")
-
-        # If URL is not provided, try to get it from Google Sheets
-        url = tool_url
-        row_index = None
+    # One sheet read for every tool in the list
+    snapshot = load_sheet_snapshot(sheet_id, snapshot_path, offline)
 
-        if url is None:
-            print(f"No URL provided for {tool_name}, fetching from Google Sheets...")
-            url, row_index = get_tool_info_from_sheets(tool_name)
-
-            if url is None:
-                print(f"❌ Could not find URL for {tool_name}, skipping...")
-                continue
-        else:
-            # If we have a URL but need to find the row index
-            _, row_index = get_tool_info_from_sheets(tool_name)
+    # Screenshot URL updates are batched into a few batchUpdate calls; the
+    # Sheets service is only built once there is something to write. Offline
+    # runs save the updates to .sheets-pending.json for the next online run
+    sheet_writer = SheetsWriteBuffer(sheet_id, offline=offline)
 
-        print(f"URL: {url}")
-        print(f"Row index: {row_index}")
+    # A threshold below zero makes every capture count as changed
+    store = ScreenshotStore(threshold=-1 if force else threshold)
+    backend = get_backend(backend_name, workers=1)
 
-        # Take the screenshot
-        screenshot_path = save_screenshot(url, tool_name)
-
-        if screenshot_path and row_index:
-            print(f"🖼️ Saved Screenshot: {screenshot_path}")
-            # Update the screenshot URL in Google Sheets
-            update_screenshot_url_in_sheets(service, sheet_id, row_index, screenshot_path)
-        else:
-            print(f"❌ Failed to update screenshot for {tool_name}")
-
-        # Rate limiting to avoid overloading the screenshot API
-        if i < len(TOOLS_TO_UPDATE) - 1:  # Don't sleep after the last item
-            sleep_time = 2  # 2 seconds between requests
-            print(f"Waiting {sleep_time} seconds before next screenshot...")
-            time.sleep(sleep_time)
+    try:
+        # Queued screenshot URLs are written on exit (raises if some could not be written)
+        with sheet_writer:
+            # Process each specified tool
+            for i, (tool_name, tool_url) in enumerate(TOOLS_TO_UPDATE):
+                print("\n" + "-" * 50)
+                print(f"Processing tool {i + 1}/{len(TOOLS_TO_UPDATE)}: {tool_name}")
+
+                # If URL is not provided, try to get it from Google Sheets
+                url = tool_url
+                row_index = None
+
+                if url is None:
+                    print(f"No URL provided for {tool_name}, fetching from Google Sheets...")
+                    url, row_index = get_tool_info_from_sheets(tool_name, snapshot)
+
+                    if url is None:
+                        print(f"❌ Could not find URL for {tool_name}, skipping...")
+                        continue
+                else:
+                    # If we have a URL but need to find the row index
+                    _, row_index = get_tool_info_from_sheets(tool_name, snapshot)
+
+                print(f"URL: {url}")
+                print(f"Row index: {row_index}")
+
+                # Take the screenshot
+                screenshot_path, changed = save_screenshot(url, tool_name, store, backend)
+
+                if screenshot_path and not changed:
+                    print(f"⏭️  {tool_name} looks unchanged, keeping {screenshot_path} (no sheet update)")
+                elif screenshot_path and row_index:
+                    print(f"🖼️ Saved Screenshot: {screenshot_path}")
+                    # Update the screenshot URL in Google Sheets
+                    update_screenshot_url_in_sheets(sheet_writer, row_index, screenshot_path)
+                else:
+                    print(f"❌ Failed to update screenshot for {tool_name}")
+
+                # Rate limiting to avoid overloading the screenshot API (local browsers need none)
+                if backend.min_interval and i < len(TOOLS_TO_UPDATE) - 1:  # Don't sleep after the last item
+                    sleep_time = 2  # 2 seconds between requests
+                    print(f"Waiting {sleep_time} seconds before next screenshot...")
+                    time.sleep(sleep_time)
+    finally:
+        backend.close()
 
     print("\n" + "=" * 50)
     print(f"COMPLETED UPDATING {len(TOOLS_TO_UPDATE)} TOOLS")
@@ -249,4 +239,26 @@ def update_specific_screenshots():
 
 
 if __name__ == "__main__":
-    update_specific_screenshots()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Update screenshots for the tools in TOOLS_TO_UPDATE')
+    parser.add_argument('--snapshot', type=str,
+                        help='Save the sheet snapshot to this file (or load it with --offline)')
+    parser.add_argument('--offline', action='store_true',
+                        help='Read tool URLs and rows from --snapshot instead of Google Sheets; screenshot URL '
+                             'updates are saved to .sheets-pending.json for the next online run')
+    parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help=f'dHash bits (of 64) that may differ before a capture counts as changed '
+                             f'(default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--force', action='store_true',
+                        help='Store every capture even if it looks the same as the previous one')
+    parser.add_argument('--backend', choices=BACKENDS,
+                        help='Capture with the ScreenshotOne API or local headless Chrome '
+                             '(default: $CAPTURE_BACKEND or screenshotone)')
+
+    args = parser.parse_args()
+    if args.offline and not args.snapshot:
+        parser.error('--offline needs --snapshot')
+
+    update_specific_screenshots(snapshot_path=args.snapshot, offline=args.offline,
+                                threshold=args.threshold, force=args.force, backend_name=args.backend)
\ No newline at end of file